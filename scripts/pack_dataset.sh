@@ -0,0 +1,4 @@
+#!/usr/bin/env bash
+set -euo pipefail
+export PYTHONPATH="${PYTHONPATH:-src}"
+python -m interfaces.cli pack-dataset --config configs/face_swap/pack.yaml "$@"
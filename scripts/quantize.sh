@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+export PYTHONPATH="${PYTHONPATH:-src}"
+if [[ $# -gt 0 ]]; then
+  python -m interfaces.cli quantize --config configs/face_swap/quantize.yaml --work-dir "$1"
+else
+  python -m interfaces.cli quantize --config configs/face_swap/quantize.yaml
+fi
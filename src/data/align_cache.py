@@ -0,0 +1,114 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .checksums import DEFAULT_ALGO, digest_file
+
+CACHE_VERSION = 1
+
+
+def _file_digest(path: Path) -> str:
+    return digest_file(path, "sha256")
+
+
+class AlignmentCache:
+    """Persistent raw-image -> aligned-output cache backing incremental prepare-data runs.
+
+    Entries are keyed by the raw path relative to ``raw_dir`` and validated against the raw file's
+    size/mtime (``key="stat"``) or its SHA256 (``key="content"``). Each entry keeps the aligned path,
+    checksum and detection metadata (bbox, landmarks, prob) so unchanged images skip alignment.
+    A cache written with a different ``checksum_algo`` is discarded.
+    """
+
+    def __init__(self, path: Path, key: str = "stat", checksum_algo: str = DEFAULT_ALGO):
+        if key not in ("stat", "content"):
+            raise ValueError(f"Unknown alignment cache key: {key}")
+        self.path = path
+        self.key = key
+        self.checksum_algo = checksum_algo
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                data = {}
+            same_algo = data.get("checksum_algo", DEFAULT_ALGO) == checksum_algo
+            if data.get("version") == CACHE_VERSION and data.get("key") == key and same_algo:
+                self.entries = data.get("entries", {})
+
+    def _fingerprint(self, raw_path: Path) -> Dict[str, Any]:
+        st = raw_path.stat()
+        fp: Dict[str, Any] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if self.key == "content":
+            fp["sha256"] = _file_digest(raw_path)
+        return fp
+
+    def lookup(self, rel: str, raw_path: Path, output_dir: Path) -> Optional[Dict[str, Any]]:
+        """Return the cached entry when the raw file and its aligned output are unchanged."""
+        entry = self.entries.get(rel)
+        fresh = entry is not None and self._matches(entry, raw_path, output_dir)
+        if fresh:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _matches(self, entry: Dict[str, Any], raw_path: Path, output_dir: Path) -> bool:
+        try:
+            st = raw_path.stat()
+            aligned = output_dir / entry["path"]
+            aligned_size = aligned.stat().st_size
+        except (OSError, KeyError):
+            return False
+        if st.st_size != entry.get("size") or aligned_size != entry.get("aligned_size"):
+            return False
+        if self.key == "content":
+            return _file_digest(raw_path) == entry.get("sha256")
+        return st.st_mtime_ns == entry.get("mtime_ns")
+
+    def update(
+        self, rel: str, raw_path: Path, output_dir: Path, item: Dict[str, Any], result: Dict[str, Any]
+    ) -> None:
+        entry = self._fingerprint(raw_path)
+        entry.update(
+            {
+                "id": item["id"],
+                "path": item["path"],
+                "checksum": item["checksum"],
+                "aligned_size": (output_dir / item["path"]).stat().st_size,
+                "bbox": result.get("bbox"),
+                "landmarks": result.get("landmarks"),
+                "prob": result.get("prob"),
+            }
+        )
+        self.entries[rel] = entry
+
+    def prune(self, keep: Iterable[str], output_dir: Optional[Path] = None) -> List[str]:
+        """Drop entries whose raw image disappeared; also removes their aligned outputs under output_dir."""
+        keep_set = set(keep)
+        stale = [rel for rel in self.entries if rel not in keep_set]
+        for rel in stale:
+            entry = self.entries.pop(rel)
+            if output_dir is not None and entry.get("path"):
+                aligned = output_dir / entry["path"]
+                if aligned.is_file():
+                    aligned.unlink()
+        self.pruned += len(stale)
+        return stale
+
+    def save(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        payload = {
+            "version": CACHE_VERSION,
+            "key": self.key,
+            "checksum_algo": self.checksum_algo,
+            "entries": self.entries,
+        }
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.path)
+        return self.path
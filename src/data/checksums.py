@@ -0,0 +1,40 @@
+import hashlib
+import zlib
+from pathlib import Path
+from typing import Any
+
+DEFAULT_ALGO = "sha256"
+# crc32 is a fast non-cryptographic option for integrity checks on trusted storage.
+FAST_ALGOS = ("crc32",)
+
+
+class _Crc32:
+    def __init__(self) -> None:
+        self._value = 0
+
+    def update(self, data: bytes) -> None:
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self) -> str:
+        return f"{self._value & 0xFFFFFFFF:08x}"
+
+
+def new_hasher(algo: str = DEFAULT_ALGO) -> Any:
+    """Return an object with ``update``/``hexdigest`` for ``algo`` (any hashlib name, or ``crc32``)."""
+    if algo == "crc32":
+        return _Crc32()
+    return hashlib.new(algo)
+
+
+def digest_bytes(data: bytes, algo: str = DEFAULT_ALGO) -> str:
+    h = new_hasher(algo)
+    h.update(data)
+    return h.hexdigest()
+
+
+def digest_file(path: Path, algo: str = DEFAULT_ALGO, chunk_size: int = 1 << 20) -> str:
+    h = new_hasher(algo)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,127 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+try:
+    from PIL import Image
+except Exception:  # pragma: no cover
+    Image = None
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+from .manifest import DatasetManifest
+
+INDEX_VERSION = 1
+STORE_DTYPES = ("float16", "float32")
+ARRAY_NAME = "embeddings.bin"
+INDEX_NAME = "embeddings.index.json"
+
+
+def build_embedding_store(
+    manifest: Path,
+    root: Path,
+    output_dir: Path,
+    embed_fn: Callable[[Any], Any],
+    dtype: str = "float16",
+    batch_size: int = 32,
+) -> Path:
+    """Embed every manifest item once and write an N x D matrix plus a JSON index of sample ids.
+
+    Images are fed to ``embed_fn`` as float N x 3 x H x W batches in [0, 1], exactly as the training
+    loop sees an un-augmented target; consecutive images of different sizes go in separate batches.
+    Missing files are skipped. Returns the index path (``<output_dir>/embeddings.index.json``).
+    """
+    if np is None or Image is None or torch is None:
+        raise RuntimeError("numpy, Pillow and torch are required to build an embedding store")
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unknown embedding dtype: {dtype} (expected one of {STORE_DTYPES})")
+    items = DatasetManifest.load(manifest).items
+    output_dir.mkdir(parents=True, exist_ok=True)
+    array_path = output_dir / ARRAY_NAME
+    tmp_array = array_path.with_name(array_path.name + ".tmp")
+    ids: List[str] = []
+    dim = 0
+    batch: List[Any] = []
+    batch_ids: List[str] = []
+
+    def flush(f: Any) -> None:
+        nonlocal dim
+        if not batch:
+            return
+        with torch.no_grad():
+            emb = embed_fn(torch.stack(batch)).reshape(len(batch), -1).float().cpu().numpy()
+        dim = emb.shape[1]
+        f.write(emb.astype(dtype).tobytes())
+        ids.extend(batch_ids)
+        batch.clear()
+        batch_ids.clear()
+
+    with tmp_array.open("wb") as f:
+        for item in items:
+            img_path = root / item["path"]
+            if not img_path.exists():
+                continue
+            image = torch.from_numpy(np.array(Image.open(img_path).convert("RGB"))).permute(2, 0, 1)
+            if len(batch) >= batch_size or (batch and batch[0].shape != image.shape):
+                flush(f)
+            batch.append(image.float().div_(255.0))
+            batch_ids.append(item["id"])
+        flush(f)
+    os.replace(tmp_array, array_path)
+    index = {"version": INDEX_VERSION, "array": ARRAY_NAME, "dtype": dtype, "shape": [len(ids), dim], "ids": ids}
+    index_path = output_dir / INDEX_NAME
+    index_path.write_text(json.dumps(index, ensure_ascii=True))
+    return index_path
+
+
+class EmbeddingStore:
+    """Memory-mapped view over an embedding store written by ``build_embedding_store``.
+
+    ``rows(ids)`` resolves sample ids to matrix rows once (-1 when absent), so datasets keep a single
+    int64 array instead of an id dict; ``lookup(row)`` returns a float32 tensor copied out of the
+    mapping. As with ``PackedLFWDataset`` the file is mapped lazily in each DataLoader worker.
+    """
+
+    def __init__(self, store_dir: str):
+        if np is None or torch is None:
+            raise RuntimeError("numpy and torch are required for EmbeddingStore")
+        self.store_dir = Path(store_dir)
+        index = json.loads((self.store_dir / INDEX_NAME).read_text())
+        self.array_path = self.store_dir / index["array"]
+        self.dtype = index["dtype"]
+        self.shape = tuple(index["shape"])
+        self.ids: List[str] = index["ids"]
+        self._data = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.shape[1]
+
+    def _array(self) -> Any:
+        if self._data is None:
+            self._data = np.memmap(self.array_path, dtype=self.dtype, mode="r", shape=self.shape)
+        return self._data
+
+    def rows(self, ids: Sequence[str]) -> Any:
+        row_of = {sample_id: row for row, sample_id in enumerate(self.ids)}
+        return np.array([row_of.get(sample_id, -1) for sample_id in ids], dtype=np.int64)
+
+    def lookup(self, row: int) -> Any:
+        return torch.from_numpy(self._array()[row].astype(np.float32))
@@ -0,0 +1,93 @@
+import multiprocessing as mp
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+CACHE_MODES = ("shm",)
+
+# counters layout: absolute write head (bytes ever reserved), hits, misses
+_HEAD, _HITS, _MISSES = 0, 1, 2
+
+
+class SharedImageCache:
+    """Decoded uint8 images in one shared-memory slab, visible to every DataLoader worker.
+
+    The slab is a ring buffer addressed by absolute byte positions: each put reserves the next
+    ``nbytes`` after the head (skipping to the next lap instead of wrapping an entry), and an entry
+    written at position ``p`` stays valid until the head passes ``p + capacity``. Oldest entries are
+    therefore evicted first without any bookkeeping beyond a per-index offset table. All state lives
+    in shared tensors guarded by one lock, so it must be created before workers start.
+    """
+
+    def __init__(self, num_items: int, max_bytes: int):
+        if torch is None:
+            raise RuntimeError("torch is required for the shared image cache")
+        self.capacity = int(max_bytes)
+        self.slab = torch.empty(self.capacity, dtype=torch.uint8).share_memory_()
+        self.offsets = torch.full((num_items,), -1, dtype=torch.int64).share_memory_()
+        self.shapes = torch.zeros((num_items, 3), dtype=torch.int32).share_memory_()
+        self.counters = torch.zeros(3, dtype=torch.int64).share_memory_()
+        self.lock = mp.Lock()
+
+    def _valid(self, idx: int) -> bool:
+        start = int(self.offsets[idx])
+        return start >= 0 and int(self.counters[_HEAD]) <= start + self.capacity
+
+    def get(self, idx: int) -> Optional[Any]:
+        """Return a private copy of the cached uint8 tensor for ``idx``, or None on a miss."""
+        with self.lock:
+            if not self._valid(idx):
+                self.counters[_MISSES] += 1
+                return None
+            self.counters[_HITS] += 1
+            start = int(self.offsets[idx]) % self.capacity
+            shape = tuple(int(d) for d in self.shapes[idx])
+            nbytes = shape[0] * shape[1] * shape[2]
+            return self.slab[start : start + nbytes].clone().view(shape)
+
+    def put(self, idx: int, image: Any) -> bool:
+        """Store a 3-D (CHW) uint8 tensor for ``idx``; returns False if it cannot fit in the slab."""
+        image = image.contiguous()
+        nbytes = image.numel()
+        if image.dim() != 3 or nbytes > self.capacity:
+            return False
+        with self.lock:
+            start = int(self.counters[_HEAD])
+            if start % self.capacity + nbytes > self.capacity:
+                start = (start // self.capacity + 1) * self.capacity
+            self.counters[_HEAD] = start + nbytes
+            pos = start % self.capacity
+            self.slab[pos : pos + nbytes].copy_(image.view(-1))
+            self.offsets[idx] = start
+            self.shapes[idx] = torch.tensor(image.shape, dtype=torch.int32)
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        head, hits, misses = (int(v) for v in self.counters)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "used_mb": min(head, self.capacity) / (1024 * 1024),
+            "capacity_mb": self.capacity / (1024 * 1024),
+        }
+
+
+def build_image_cache(mode: Optional[str], num_items: int, max_mb: float) -> Optional[SharedImageCache]:
+    if mode in (None, "", "none"):
+        return None
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown dataset cache mode: {mode} (expected one of {CACHE_MODES})")
+    if num_items == 0:
+        return None
+    return SharedImageCache(num_items, int(max_mb * 1024 * 1024))
+
+
+def hit_rate(stats: Dict[str, float], since: Optional[Dict[str, float]] = None) -> Tuple[int, int, float]:
+    """(hits, misses, hit rate in %) accumulated since an earlier ``stats()`` snapshot."""
+    hits = stats["hits"] - (since or {}).get("hits", 0)
+    misses = stats["misses"] - (since or {}).get("misses", 0)
+    total = hits + misses
+    return int(hits), int(misses), 100.0 * hits / total if total else 0.0
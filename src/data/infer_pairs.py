@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+try:
+    from PIL import Image
+except Exception:  # pragma: no cover
+    Image = None
+
+try:
+    from torchvision import transforms as T
+except Exception:  # pragma: no cover
+    T = None
+
+
+def pair_output_name(source: str, target: str) -> str:
+    return f"{Path(source).stem}_to_{Path(target).stem}.png"
+
+
+class InferPairDataset:
+    """Decoded (source, target) image pairs for inference, as float tensors in [0, 1]."""
+
+    def __init__(self, sources: Sequence[str], targets: Sequence[str]):
+        self.pairs: List[Tuple[str, str]] = list(zip(sources, targets))
+        self.to_tensor = T.ToTensor()
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def sizes(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """(source, target) image sizes read from the file headers, without decoding pixels."""
+        sizes = []
+        for src, tgt in self.pairs:
+            with Image.open(src) as s, Image.open(tgt) as t:
+                sizes.append((s.size, t.size))
+        return sizes
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        src, tgt = self.pairs[idx]
+        return {
+            "source": self.to_tensor(Image.open(src).convert("RGB")),
+            "target": self.to_tensor(Image.open(tgt).convert("RGB")),
+            "name": pair_output_name(src, tgt),
+        }
+
+
+class SizeGroupedBatchSampler:
+    """Batches of indices whose items share a size key, so each batch stacks into one tensor.
+
+    Groups keep the order in which their key first appears and indices keep their order within a
+    group; every group ends with its own (possibly short) batch.
+    """
+
+    def __init__(self, keys: Sequence[Any], batch_size: int):
+        self.batch_size = max(1, int(batch_size))
+        groups: Dict[Any, List[int]] = {}
+        for idx, key in enumerate(keys):
+            groups.setdefault(key, []).append(idx)
+        self.groups = list(groups.values())
+
+    def __iter__(self) -> Iterator[List[int]]:
+        for group in self.groups:
+            for start in range(0, len(group), self.batch_size):
+                yield group[start : start + self.batch_size]
+
+    def __len__(self) -> int:
+        return sum(-(-len(group) // self.batch_size) for group in self.groups)
@@ -1,8 +1,13 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional, Sequence
 import random
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
 try:
     from PIL import Image
 except Exception:  # pragma: no cover
@@ -11,15 +16,36 @@ except Exception:  # pragma: no cover
 try:
     import torch
     from torchvision import transforms as T
+    from torchvision.io import ImageReadMode, decode_image, read_file
 except Exception:  # pragma: no cover
     torch = None
     T = None
+    decode_image = None
+
+from .embedding_store import EmbeddingStore
+from .image_cache import build_image_cache
+from .manifest import open_manifest
+from .sample_index import SampleIndex
 
-from .manifest import DatasetManifest
+
+def _pil_to_uint8(img: Any) -> Any:
+    """PIL RGB image -> contiguous uint8 CHW tensor."""
+    return torch.from_numpy(np.array(img)).permute(2, 0, 1).contiguous()
 
 
 class LFWDataset:
-    """LFW dataset wrapper using a manifest (paths, splits, optional transforms)."""
+    """LFW dataset wrapper using a manifest (paths, splits, optional transforms).
+
+    Split items are held in an array-backed ``SampleIndex`` (when NumPy is available) and each sample
+    dict is built on access, keeping forked DataLoader workers from copying the index page by page.
+    ``cache="shm"`` keeps decoded images in a ``SharedImageCache`` of ``cache_max_mb`` shared by all
+    workers, so epochs after the first skip decoding when the split fits.
+    ``uint8=True`` decodes with ``torchvision.io.decode_image`` straight to uint8 CHW tensors (no PIL or
+    ``ToTensor``); the training loop scales whole batches to float. ``target_tensor`` is only set when
+    the target differs from the source, so the image is collated once.
+    ``embedding_store`` (a directory written by ``build-embeddings``) adds each sample's precomputed
+    identity embedding as ``target_embedding``, so the loss does not re-embed fixed targets.
+    """
 
     def __init__(
         self,
@@ -31,53 +57,103 @@ class LFWDataset:
         sample_ratio: float = 1.0,
         sample_ratio_overrides: Optional[Dict[str, float]] = None,
         sample_seed: int = 42,
+        cache: Optional[str] = None,
+        cache_max_mb: float = 1024,
+        uint8: bool = False,
+        embedding_store: Optional[str] = None,
     ):
         self.root = Path(root)
         self.split = split
         self.transform = transform
         self.to_tensor = to_tensor and T is not None
         self.tensor_tf = T.ToTensor() if self.to_tensor and T else None
+        self.uint8 = uint8 and self.to_tensor and decode_image is not None
         self.manifest_path = Path(manifest)
-        self.samples: List[Dict[str, Any]] = []
+        self.samples: Sequence[Dict[str, Any]] = []
         ratio_overrides = sample_ratio_overrides or {}
         ratio = ratio_overrides.get(split, sample_ratio)
         ratio = max(0.0, min(1.0, ratio))
         if self.manifest_path.exists():
-            manifest_data = DatasetManifest.load(self.manifest_path)
-            ids = manifest_data.splits.get(split, [])
-            items_by_id = {item["id"]: item for item in manifest_data.items}
-            picked = [items_by_id[i] for i in ids if i in items_by_id]
-            if ratio < 1.0 and len(picked) > 0:
-                rng = random.Random(sample_seed)
-                k = max(1, int(len(picked) * ratio))
-                picked = rng.sample(picked, k=k)
-            self.samples = picked
+            # Sample ids first so SQLite manifests only materialize the items actually used.
+            with open_manifest(self.manifest_path) as reader:
+                ids = reader.split_ids(split)
+                if ratio < 1.0 and len(ids) > 0:
+                    rng = random.Random(sample_seed)
+                    k = max(1, int(len(ids) * ratio))
+                    ids = rng.sample(ids, k=k)
+                items = reader.get_items(ids)
+            self.samples = SampleIndex(items) if np is not None else items
         else:
             # Fallback empty list if manifest missing
             self.samples = []
+        # Opt-in decoded-image cache in shared memory; allocated here so forked workers inherit it.
+        self.cache = build_image_cache(cache, len(self.samples), cache_max_mb)
+        self.embeddings = EmbeddingStore(embedding_store) if embedding_store else None
+        self.embedding_rows = None
+        if self.embeddings is not None:
+            self.embedding_rows = self.embeddings.rows([self.samples[pos]["id"] for pos in range(len(self.samples))])
+            missing = int((self.embedding_rows < 0).sum())
+            if missing:
+                raise ValueError(
+                    f"{missing} samples of split {split} have no embedding in {embedding_store}; "
+                    "rebuild it with build-embeddings"
+                )
 
     def __len__(self) -> int:
         return len(self.samples)
 
-    def _load_image(self, path: Path) -> Any:
+    def _load_image(self, path: Path, idx: Optional[int] = None) -> Any:
+        if self.cache is not None and idx is not None:
+            cached = self.cache.get(idx)
+            if cached is not None:
+                return Image.fromarray(cached.permute(1, 2, 0).numpy())
         if Image and path.exists():
-            return Image.open(path).convert("RGB")
+            img = Image.open(path).convert("RGB")
+            if self.cache is not None and idx is not None:
+                self.cache.put(idx, _pil_to_uint8(img))
+            return img
         return None
 
+    def _load_uint8(self, path: Path, idx: int) -> Any:
+        if self.cache is not None:
+            cached = self.cache.get(idx)
+            if cached is not None:
+                return cached
+        if not path.exists():
+            return None
+        try:
+            image = decode_image(read_file(str(path)), mode=ImageReadMode.RGB)
+        except RuntimeError:
+            # formats torchvision.io cannot decode go through PIL
+            image = _pil_to_uint8(Image.open(path).convert("RGB"))
+        if self.cache is not None:
+            self.cache.put(idx, image)
+        return image
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        return self.cache.stats() if self.cache is not None else None
+
     def __getitem__(self, idx: int) -> Dict[str, Any]:
-        sample = dict(self.samples[idx]) if self.samples else {"id": idx, "path": "", "label": ""}
-        img = None
+        sample = dict(self.samples[idx]) if len(self.samples) else {"id": idx, "path": "", "label": ""}
+        sample["index"] = idx
+        if self.embeddings is not None:
+            sample["target_embedding"] = self.embeddings.lookup(int(self.embedding_rows[idx]))
         if "path" in sample:
             img_path = self.root / sample["path"]
-            img = self._load_image(img_path)
-            sample["image"] = img
             sample["image_path"] = str(img_path)
+            if self.uint8 and not self.transform:
+                image = self._load_uint8(img_path, idx)
+                if image is not None:
+                    sample["image_tensor"] = image
+                return sample
+            sample["image"] = self._load_image(img_path, idx)
         if self.transform:
             sample = self.transform(sample)
-        if self.tensor_tf and sample.get("image") is not None:
-            sample["image_tensor"] = self.tensor_tf(sample["image"])
-            # duplicate as target for now
-            sample["target_tensor"] = sample["image_tensor"]
+        if sample.get("image") is not None:
+            if self.uint8:
+                sample["image_tensor"] = _pil_to_uint8(sample["image"])
+            elif self.tensor_tf:
+                sample["image_tensor"] = self.tensor_tf(sample["image"])
         # Drop raw PIL image to avoid DataLoader collate issues.
         sample.pop("image", None)
         return sample
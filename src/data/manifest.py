@@ -1,7 +1,26 @@
 import json
+import sqlite3
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
+
+# Manifests with these suffixes use the compact SQLite layout; everything else is JSON.
+SQLITE_SUFFIXES = (".sqlite", ".db")
+
+_SQLITE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE items (id TEXT PRIMARY KEY, pos INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE checksums (id TEXT PRIMARY KEY, checksum TEXT NOT NULL);
+CREATE TABLE splits (split TEXT NOT NULL, pos INTEGER NOT NULL, id TEXT NOT NULL, PRIMARY KEY (split, pos));
+CREATE TABLE pairs (pos INTEGER PRIMARY KEY, data TEXT NOT NULL);
+"""
+# Keep IN (...) lists under SQLite's default host-parameter limit.
+_SQLITE_BATCH = 900
+
+
+def is_sqlite_manifest(path: Path) -> bool:
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
 
 
 @dataclass
@@ -15,12 +34,151 @@ class DatasetManifest:
 
     @classmethod
     def load(cls, path: Path) -> "DatasetManifest":
+        if is_sqlite_manifest(path):
+            return _load_sqlite(path)
         data = json.loads(path.read_text())
         return cls(**data)
 
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
+        if is_sqlite_manifest(path):
+            _save_sqlite(self, path)
+            return
         path.write_text(json.dumps(self.__dict__, indent=2, ensure_ascii=True))
 
     def bump_version(self, new_version: str) -> None:
         self.version = new_version
+
+
+def _save_sqlite(manifest: DatasetManifest, path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_SQLITE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("version", json.dumps(manifest.version)),
+                ("meta", json.dumps(manifest.meta, ensure_ascii=True)),
+                # split names (in order) so empty splits survive the round trip
+                ("split_names", json.dumps(list(manifest.splits), ensure_ascii=True)),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO items VALUES (?, ?, ?)",
+            ((item["id"], pos, json.dumps(item, ensure_ascii=True)) for pos, item in enumerate(manifest.items)),
+        )
+        conn.executemany("INSERT INTO checksums VALUES (?, ?)", manifest.checksums.items())
+        conn.executemany(
+            "INSERT INTO splits VALUES (?, ?, ?)",
+            ((split, pos, item_id) for split, ids in manifest.splits.items() for pos, item_id in enumerate(ids)),
+        )
+        conn.executemany(
+            "INSERT INTO pairs VALUES (?, ?)",
+            ((pos, json.dumps(pair, ensure_ascii=True)) for pos, pair in enumerate(manifest.pairs)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    tmp.replace(path)
+
+
+def _load_sqlite(path: Path) -> DatasetManifest:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        meta = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        splits: Dict[str, List[str]] = {name: [] for name in meta.get("split_names", [])}
+        for split, item_id in conn.execute("SELECT split, id FROM splits ORDER BY split, pos"):
+            splits.setdefault(split, []).append(item_id)
+        return DatasetManifest(
+            version=meta.get("version", ""),
+            items=[json.loads(row[0]) for row in conn.execute("SELECT data FROM items ORDER BY pos")],
+            splits=splits,
+            checksums=dict(conn.execute("SELECT id, checksum FROM checksums")),
+            meta=meta.get("meta", {}),
+            pairs=[json.loads(row[0]) for row in conn.execute("SELECT data FROM pairs ORDER BY pos")],
+        )
+    finally:
+        conn.close()
+
+
+class ManifestReader(ABC):
+    """Split-oriented read access to a manifest.
+
+    ``split_ids`` returns the ids of a split that resolve to items (in split order), ``get_items``
+    fetches items for an id list and ``pairs`` returns the parsed LFW pairs. The SQLite reader
+    answers these with indexed queries, so cost is proportional to the split and the ids requested
+    rather than to the whole manifest.
+    """
+
+    @abstractmethod
+    def split_ids(self, split: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_items(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def pairs(self) -> List[Dict[str, Any]]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ManifestReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class JsonManifestReader(ManifestReader):
+    def __init__(self, manifest: DatasetManifest):
+        self.manifest = manifest
+        self._items_by_id = {item["id"]: item for item in manifest.items}
+
+    def split_ids(self, split: str) -> List[str]:
+        return [i for i in self.manifest.splits.get(split, []) if i in self._items_by_id]
+
+    def get_items(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        return [self._items_by_id[i] for i in ids]
+
+    def pairs(self) -> List[Dict[str, Any]]:
+        return self.manifest.pairs
+
+
+class SqliteManifestReader(ManifestReader):
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def split_ids(self, split: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT s.id FROM splits s JOIN items i ON i.id = s.id WHERE s.split = ? ORDER BY s.pos", (split,)
+        )
+        return [row[0] for row in rows]
+
+    def get_items(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        ids = list(ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), _SQLITE_BATCH):
+            chunk = ids[start : start + _SQLITE_BATCH]
+            marks = ",".join("?" * len(chunk))
+            for item_id, data in self.conn.execute(f"SELECT id, data FROM items WHERE id IN ({marks})", chunk):
+                found[item_id] = json.loads(data)
+        return [found[i] for i in ids]
+
+    def pairs(self) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT data FROM pairs ORDER BY pos")]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def open_manifest(path: Path) -> ManifestReader:
+    """Open a JSON or SQLite manifest for split-oriented reads (see ``ManifestReader``)."""
+    path = Path(path)
+    if is_sqlite_manifest(path):
+        return SqliteManifestReader(path)
+    return JsonManifestReader(DatasetManifest.load(path))
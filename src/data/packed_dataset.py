@@ -0,0 +1,145 @@
+import json
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+try:
+    from PIL import Image
+except Exception:  # pragma: no cover
+    Image = None
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+from .embedding_store import EmbeddingStore
+from .manifest import open_manifest
+from .sample_index import person_label
+
+INDEX_VERSION = 1
+
+
+def pack_split(manifest: Path, root: Path, split: str, output_dir: Path, size: int = 160) -> Path:
+    """Write one manifest split as a contiguous uint8 N x H x W x 3 array plus a JSON index sidecar.
+
+    Images whose size differs from ``size`` x ``size`` (e.g. raw fallbacks) are resized bilinearly.
+    Returns the index path (``<output_dir>/<split>.index.json``); the array is ``<split>.u8``.
+    """
+    if np is None or Image is None:
+        raise RuntimeError("numpy and Pillow are required to pack datasets")
+    with open_manifest(manifest) as reader:
+        picked = reader.get_items(reader.split_ids(split))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    array_path = output_dir / f"{split}.u8"
+    index_path = output_dir / f"{split}.index.json"
+    record_bytes = size * size * 3
+    ids: List[str] = []
+    labels: List[str] = []
+    paths: List[str] = []
+    tmp_array = array_path.with_name(array_path.name + ".tmp")
+    with tmp_array.open("wb") as f:
+        for item in picked:
+            img_path = root / item["path"]
+            if not img_path.exists():
+                continue
+            img = Image.open(img_path).convert("RGB")
+            if img.size != (size, size):
+                img = img.resize((size, size), Image.BILINEAR)
+            f.write(np.asarray(img, dtype=np.uint8).tobytes())
+            ids.append(item["id"])
+            labels.append(person_label(item))
+            paths.append(item["path"])
+    os.replace(tmp_array, array_path)
+    index = {
+        "version": INDEX_VERSION,
+        "split": split,
+        "array": array_path.name,
+        "dtype": "uint8",
+        "shape": [len(ids), size, size, 3],
+        "record_bytes": record_bytes,
+        "offsets": [i * record_bytes for i in range(len(ids))],
+        "ids": ids,
+        "labels": labels,
+        "paths": paths,
+    }
+    index_path.write_text(json.dumps(index, ensure_ascii=True))
+    return index_path
+
+
+class PackedLFWDataset:
+    """Memory-mapped view over a packed split (see ``pack_split``).
+
+    ``image_tensor`` is a uint8 CHW tensor that aliases the mapped file (no decode, no copy); the
+    training loop scales batches to float. The mapping is opened lazily so each DataLoader worker
+    maps the file itself instead of receiving a pickled copy. ``embedding_store`` adds
+    ``target_embedding`` as in ``LFWDataset``.
+    """
+
+    def __init__(
+        self,
+        packed_dir: str,
+        split: str,
+        sample_ratio: float = 1.0,
+        sample_ratio_overrides: Optional[Dict[str, float]] = None,
+        sample_seed: int = 42,
+        embedding_store: Optional[str] = None,
+    ):
+        self.packed_dir = Path(packed_dir)
+        self.split = split
+        self.index_path = self.packed_dir / f"{split}.index.json"
+        index = json.loads(self.index_path.read_text())
+        self.array_path = self.packed_dir / index["array"]
+        self.shape = tuple(index["shape"])
+        self.ids: List[str] = index["ids"]
+        self.labels: List[str] = index["labels"]
+        self.paths: List[str] = index.get("paths", [""] * len(self.ids))
+        ratio = (sample_ratio_overrides or {}).get(split, sample_ratio)
+        ratio = max(0.0, min(1.0, ratio))
+        positions = list(range(len(self.ids)))
+        if ratio < 1.0 and positions:
+            rng = random.Random(sample_seed)
+            positions = rng.sample(positions, k=max(1, int(len(positions) * ratio)))
+        self.positions = positions
+        self._data = None
+        self.embeddings = EmbeddingStore(embedding_store) if embedding_store else None
+        self.embedding_rows = self.embeddings.rows(self.ids) if self.embeddings is not None else None
+        if self.embedding_rows is not None and (self.embedding_rows[positions] < 0).any():
+            raise ValueError(
+                f"Samples of split {split} missing from {embedding_store}; rebuild it with build-embeddings"
+            )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def _array(self) -> Any:
+        if self._data is None:
+            # copy-on-write mapping: writable for torch.from_numpy, never written back to disk
+            self._data = np.memmap(self.array_path, dtype=np.uint8, mode="c", shape=self.shape)
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        pos = self.positions[idx]
+        sample: Dict[str, Any] = {
+            "id": self.ids[pos],
+            "label": self.labels[pos],
+            "path": self.paths[pos],
+            "index": idx,
+        }
+        if self.embeddings is not None:
+            sample["target_embedding"] = self.embeddings.lookup(int(self.embedding_rows[pos]))
+        if torch is not None and self.shape[0] > 0:
+            # no target_tensor: the target is the source image, collated once
+            sample["image_tensor"] = torch.from_numpy(self._array()[pos]).permute(2, 0, 1)
+        return sample
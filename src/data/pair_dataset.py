@@ -0,0 +1,211 @@
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+from .lfw_dataset import LFWDataset
+from .manifest import open_manifest
+from .sample_index import person_label
+
+PAIR_SOURCES = ("manifest", "identity")
+
+
+def pair_item_id(person: str, image_number: str) -> str:
+    """Manifest id of ``<person>/<person>_<NNNN>.jpg`` as referenced by LFW pairs files."""
+    return f"{person}_{person}_{int(image_number):04d}"
+
+
+def _pair_ids(pair: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    if pair.get("type") == "same":
+        return pair_item_id(pair["person"], pair["img1"]), pair_item_id(pair["person"], pair["img2"])
+    if pair.get("type") == "diff":
+        return pair_item_id(pair["person1"], pair["img1"]), pair_item_id(pair["person2"], pair["img2"])
+    return None
+
+
+class LFWPairDataset(LFWDataset):
+    """Source/target pairs over an LFW split, served a whole batch at a time.
+
+    Samples of the split are grouped by person into an identity index (``order`` holds sample
+    positions sorted by person; ``person_start``/``person_count`` give each person's contiguous
+    range), so drawing a same- or different-identity pair is O(1). Pairs come from the manifest
+    (``pair_source="manifest"``: LFW pairs whose images are both in the split) or are drawn from the
+    identity index each epoch (``pair_source="identity"``: ``num_pairs`` pairs, ``same_ratio`` of
+    them same-person).
+
+    ``__getitem__`` takes a list of (source, target) sample positions from ``PairBatchSampler`` and
+    returns a collated batch; each distinct image is loaded once and fanned out with
+    ``index_select``, so a batch never decodes more images than it has distinct samples. All
+    ``LFWDataset`` options (``uint8``, ``cache``, ``transform``, sampling) apply per image.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        split: str,
+        manifest: str,
+        pair_source: str = "manifest",
+        num_pairs: Optional[int] = None,
+        same_ratio: float = 0.5,
+        **kwargs: Any,
+    ):
+        if np is None or torch is None:
+            raise RuntimeError("numpy and torch are required for LFWPairDataset")
+        if pair_source not in PAIR_SOURCES:
+            raise ValueError(f"Unknown pair_source: {pair_source} (expected one of {PAIR_SOURCES})")
+        super().__init__(root, split, manifest, **kwargs)
+        self.pair_source = pair_source
+        self.same_ratio = same_ratio
+        self._build_identity_index()
+        if pair_source == "manifest":
+            self.pairs = self._manifest_pairs()
+            self.num_pairs = len(self.pairs)
+        else:
+            self.pairs = None
+            self.num_pairs = len(self.samples) if num_pairs is None else int(num_pairs)
+
+    def _build_identity_index(self) -> None:
+        labels = [person_label(self.samples[pos]) for pos in range(len(self.samples))]
+        names, person_of = np.unique(np.array(labels, dtype=object), return_inverse=True)
+        self.order = np.argsort(person_of, kind="stable").astype(np.int64)
+        self.person_count = np.bincount(person_of, minlength=len(names)).astype(np.int64)
+        self.person_start = np.concatenate(([0], np.cumsum(self.person_count)[:-1])).astype(np.int64)
+        # person of each slot in ``order``
+        self.slot_person = person_of[self.order].astype(np.int64)
+        self.multi_persons = np.flatnonzero(self.person_count >= 2)
+        self.person_names = [str(n) for n in names]
+
+    def _manifest_pairs(self) -> Any:
+        if not self.manifest_path.exists():
+            return np.zeros((0, 2), dtype=np.int64)
+        pos_by_id = {self.samples[pos]["id"]: pos for pos in range(len(self.samples))}
+        with open_manifest(self.manifest_path) as reader:
+            raw_pairs = reader.pairs()
+        pairs = []
+        for pair in raw_pairs:
+            ids = _pair_ids(pair)
+            if ids and ids[0] in pos_by_id and ids[1] in pos_by_id:
+                pairs.append((pos_by_id[ids[0]], pos_by_id[ids[1]]))
+        return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+    def draw_pairs(self, rng: Any, count: int) -> Any:
+        """Draw ``count`` (source, target) positions from the identity index."""
+        total = len(self.order)
+        if total == 0 or count == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        n_same = int(round(count * self.same_ratio)) if len(self.multi_persons) else 0
+        persons = self.multi_persons[rng.integers(0, max(len(self.multi_persons), 1), n_same)]
+        start, cnt = self.person_start[persons], self.person_count[persons]
+        first = rng.integers(0, cnt)
+        second = (first + 1 + rng.integers(0, cnt - 1)) % cnt
+        same = np.stack((start + first, start + second), 1)
+        # different identity: skip over the source person's range in ``order``
+        n_diff = count - n_same
+        src_slot = rng.integers(0, total, n_diff)
+        person = self.slot_person[src_slot]
+        other = rng.integers(0, np.maximum(total - self.person_count[person], 1))
+        other = np.where(other >= self.person_start[person], other + self.person_count[person], other)
+        diff = np.stack((src_slot, np.minimum(other, total - 1)), 1)
+        slots = np.concatenate((same, diff))[rng.permutation(count)]
+        return self.order[slots]
+
+    def epoch_pairs(self, rng: Any, shuffle: bool = True) -> Any:
+        if self.pairs is not None:
+            return self.pairs[rng.permutation(len(self.pairs))] if shuffle else self.pairs
+        return self.draw_pairs(rng, self.num_pairs)
+
+    def pair_sampler(
+        self, batch_size: int, shuffle: bool = True, seed: int = 0, num_replicas: int = 1, rank: int = 0
+    ) -> "PairBatchSampler":
+        return PairBatchSampler(self, batch_size, shuffle=shuffle, seed=seed, num_replicas=num_replicas, rank=rank)
+
+    def __len__(self) -> int:
+        return self.num_pairs
+
+    def __getitem__(self, pairs: Any) -> Dict[str, Any]:
+        if isinstance(pairs, (int, np.integer)):
+            pairs = [tuple(self.pairs[pairs])] if self.pairs is not None else [(int(pairs), int(pairs))]
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        unique, inverse = np.unique(pairs, return_inverse=True)
+        loaded = [LFWDataset.__getitem__(self, int(pos)) for pos in unique]
+        for sample in loaded:
+            if "image_tensor" not in sample:
+                raise FileNotFoundError(f"Pair image not found: {sample.get('image_path')}")
+        images = torch.stack([sample["image_tensor"] for sample in loaded])
+        inverse = torch.from_numpy(inverse.reshape(-1, 2))
+        ids = [sample["id"] for sample in loaded]
+        batch = {
+            "image_tensor": images.index_select(0, inverse[:, 0]),
+            "target_tensor": images.index_select(0, inverse[:, 1]),
+            "index": torch.from_numpy(pairs[:, 0].copy()),
+            "target_index": torch.from_numpy(pairs[:, 1].copy()),
+            "id": [ids[i] for i in inverse[:, 0].tolist()],
+            "target_id": [ids[i] for i in inverse[:, 1].tolist()],
+        }
+        if self.embeddings is not None:
+            embeddings = torch.stack([sample["target_embedding"] for sample in loaded])
+            batch["target_embedding"] = embeddings.index_select(0, inverse[:, 1])
+        return batch
+
+
+class PairBatchSampler:
+    """Yields lists of (source, target) positions for ``LFWPairDataset``; use with ``batch_size=None``.
+
+    Order (and identity-drawn pairs) depend only on (seed, epoch); call ``set_epoch`` each epoch.
+    ``set_start(n)`` skips the first ``n`` pairs of the epoch without loading them (resume). With
+    ``num_replicas > 1`` every rank draws the same epoch pairs and takes an equal-size strided shard.
+    """
+
+    def __init__(
+        self,
+        dataset: LFWPairDataset,
+        batch_size: int,
+        shuffle: bool = True,
+        seed: int = 0,
+        drop_last: bool = False,
+        num_replicas: int = 1,
+        rank: int = 0,
+    ):
+        self.dataset = dataset
+        self.batch_size = max(1, int(batch_size))
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+        self.start = 0
+
+    def _shard_size(self) -> int:
+        return math.ceil(len(self.dataset) / self.num_replicas)
+
+    def set_start(self, position: int) -> None:
+        self.start = max(0, min(int(position), self._shard_size()))
+
+    def __len__(self) -> int:
+        n = self._shard_size() - self.start
+        return n // self.batch_size if self.drop_last else math.ceil(n / self.batch_size)
+
+    def __iter__(self) -> Iterator[List[Sequence[int]]]:
+        rng = np.random.default_rng([self.seed, self.epoch])
+        pairs = self.dataset.epoch_pairs(rng, shuffle=self.shuffle)
+        if self.num_replicas > 1 and len(pairs):
+            total = self._shard_size() * self.num_replicas
+            pairs = np.resize(pairs, (total, 2))[self.rank :: self.num_replicas]
+        for start in range(self.start, len(pairs), self.batch_size):
+            chunk = pairs[start : start + self.batch_size]
+            if self.drop_last and len(chunk) < self.batch_size:
+                break
+            yield chunk.tolist()
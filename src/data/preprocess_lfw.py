@@ -5,6 +5,7 @@ from typing import Optional, Dict, Any, List
 
 import yaml
 
+from .align_cache import AlignmentCache
 from .retinaface_align import build_manifest_from_raw, write_manifest
 from .download_lfw import main as download_lfw_main
 
@@ -36,6 +37,12 @@ def run_preprocess(
     val_ratio: float,
     version: str,
     pairs_dir: str = "data/lfw/raw",
+    num_workers: int = 0,
+    batch_size: int = 1,
+    incremental: bool = False,
+    cache_path: Optional[str] = None,
+    cache_key: str = "stat",
+    checksum_algo: str = "sha256",
 ) -> int:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     log = logging.getLogger("preprocess_lfw")
@@ -47,11 +54,45 @@ def run_preprocess(
         log.info("Downloading LFW from Kaggle dataset %s ...", dataset)
         download_lfw_main(dataset)
 
-    log.info("Aligning and building manifest from raw=%s to processed=%s ...", raw_path, proc_path)
-    items = build_manifest_from_raw(raw_path, proc_path, logger=log)
+    log.info(
+        "Aligning and building manifest from raw=%s to processed=%s (workers=%d, batch_size=%d) ...",
+        raw_path,
+        proc_path,
+        num_workers,
+        batch_size,
+    )
+    cache = None
+    if incremental:
+        cache = AlignmentCache(
+            Path(cache_path) if cache_path else proc_path / ".align_cache.json",
+            key=cache_key,
+            checksum_algo=checksum_algo,
+        )
+        log.info("Incremental mode: alignment cache %s (%d entries)", cache.path, len(cache.entries))
+    items = build_manifest_from_raw(
+        raw_path,
+        proc_path,
+        logger=log,
+        num_workers=num_workers,
+        batch_size=batch_size,
+        cache=cache,
+        checksum_algo=checksum_algo,
+    )
+    if cache is not None:
+        log.info(
+            "Alignment cache: %d cached, %d recomputed, %d pruned", cache.hits, len(items) - cache.hits, cache.pruned
+        )
     pairs = parse_pairs(pairs_dir)
     log.info("Loaded %d pairs files total entries=%d", len(list(Path(pairs_dir).glob('pairs*.txt'))), len(pairs))
-    write_manifest(items, manifest_path, train_ratio=train_ratio, val_ratio=val_ratio, version=version, pairs=pairs)
+    write_manifest(
+        items,
+        manifest_path,
+        train_ratio=train_ratio,
+        val_ratio=val_ratio,
+        version=version,
+        pairs=pairs,
+        checksum_algo=checksum_algo,
+    )
     log.info("Wrote manifest to %s with %d items", manifest_path, len(items))
     return len(items)
 
@@ -72,6 +113,12 @@ def main(argv: Optional[list] = None):
         train_ratio=cfg.get("train_ratio", 0.8),
         val_ratio=cfg.get("val_ratio", 0.1),
         version=cfg.get("version", "1.0.0"),
+        num_workers=cfg.get("num_workers", 0),
+        batch_size=cfg.get("batch_size", 1),
+        incremental=cfg.get("incremental", False),
+        cache_path=cfg.get("cache_path"),
+        cache_key=cfg.get("cache_key", "stat"),
+        checksum_algo=cfg.get("checksum_algo", "sha256"),
     )
 
 
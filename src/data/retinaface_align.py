@@ -1,10 +1,15 @@
-import hashlib
+import io
 import json
+import os
 import random
 import shutil
 import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice, repeat
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 try:
     import cv2  # type: ignore
@@ -20,72 +25,347 @@ except Exception:  # pragma: no cover
     MTCNN = None
     Image = None
 
+from .align_cache import AlignmentCache
+from .checksums import DEFAULT_ALGO, digest_bytes, digest_file
+from .manifest import DatasetManifest, is_sqlite_manifest
 
-def compute_checksum(path: Path) -> str:
-    """Compute SHA256 checksum for a file."""
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+# Per-process detector; built lazily so each pool worker constructs MTCNN exactly once.
+_DETECTOR: Any = None
 
 
-def detect_and_align(image_path: Path, output_path: Path) -> Dict[str, Any]:
-    """Detection/alignment via RetinaFace when available; fallback to MTCNN; returns aligned file path and metadata."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    if not image_path.exists():
-        return {"aligned_path": str(image_path), "bbox": None, "landmarks": None}
+def compute_checksum(path: Path, algo: str = DEFAULT_ALGO) -> str:
+    """Compute a file checksum (SHA256 by default; see ``data.checksums`` for other digests)."""
+    return digest_file(path, algo)
 
-    # RetinaFace path (disabled: dependency removed). Falls through to MTCNN.
 
-    # MTCNN fallback
-    if MTCNN is None or Image is None:
-        return {"aligned_path": str(image_path), "bbox": None, "landmarks": None}
-    mtcnn = MTCNN(keep_all=False, image_size=160)
-    img_pil = Image.open(image_path).convert("RGB")
-    face, prob = mtcnn(img_pil, return_prob=True)
-    if face is None:
-        return {"aligned_path": str(image_path), "bbox": None, "landmarks": None}
+def get_detector() -> Any:
+    """Return the MTCNN detector for this process, building it on first use (None if unavailable)."""
+    global _DETECTOR
+    if _DETECTOR is None and MTCNN is not None and Image is not None:
+        _DETECTOR = MTCNN(keep_all=False, image_size=160)
+    return _DETECTOR
+
+
+def _init_worker() -> None:
+    """Pool initializer: one intra-op thread per worker and a detector built once up front."""
+    try:
+        import torch
+
+        torch.set_num_threads(1)
+    except Exception:  # pragma: no cover
+        pass
+    get_detector()
+
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs/overlay); unsupported filesystems raise OSError.
+_FICLONE = 0x40049409
+
+
+def _failed(image_path: Path, raw_checksum: Optional[str] = None) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"aligned_path": str(image_path), "bbox": None, "landmarks": None}
+    if raw_checksum:
+        result["raw_checksum"] = raw_checksum
+    return result
+
+
+def _decode(image_path: Path, algo: str = DEFAULT_ALGO) -> Tuple[Any, Optional[str]]:
+    """Read the raw file once, returning the decoded RGB image and the checksum of its bytes."""
+    if Image is None or not image_path.exists():
+        return None, None
+    data = image_path.read_bytes()
+    return Image.open(io.BytesIO(data)).convert("RGB"), digest_bytes(data, algo)
+
+
+def _write_atomic(data: bytes, output_path: Path) -> None:
+    # Replace rather than truncate: output_path may be a hardlink to a raw image from an earlier fallback.
+    tmp = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, output_path)
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-POSIX
+        return False
+    try:
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def mirror_file(src: Path, dst: Path) -> str:
+    """Place ``src`` at ``dst`` without copying data when possible: hardlink, then reflink, then copy.
+
+    Returns the method used ("hardlink", "reflink" or "copy").
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.is_dir():
+        shutil.rmtree(dst)
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        return "reflink"
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _iter_decoded(image_paths: Sequence[Path], prefetch: int, algo: str) -> Iterator[Tuple[Path, Any]]:
+    """Decode images in order on a helper thread, keeping at most ``prefetch`` decodes in flight."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        paths = iter(image_paths)
+        pending = deque((p, pool.submit(_decode, p, algo)) for p in islice(paths, max(1, prefetch)))
+        while pending:
+            path, fut = pending.popleft()
+            nxt = next(paths, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(_decode, nxt, algo)))
+            yield path, fut.result()
+
+
+def _save_face(face: Any, output_path: Path, algo: str = DEFAULT_ALGO) -> str:
+    """Encode the aligned crop in memory, hash the encoded bytes and write them once; returns the checksum."""
     # face is CHW float tensor in [0,1]; convert to HWC uint8
     aligned = face.permute(1, 2, 0).clamp(0, 1).mul(255).byte().cpu().numpy()
     aligned_img = Image.fromarray(aligned, mode="RGB")
+    buf = io.BytesIO()
+    aligned_img.save(buf, format=Image.registered_extensions().get(output_path.suffix.lower(), "PNG"))
+    data = buf.getvalue()
     if output_path.exists() and output_path.is_dir():
         shutil.rmtree(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    aligned_img.save(output_path)
-    return {"aligned_path": str(output_path), "bbox": None, "landmarks": None, "prob": prob}
+    _write_atomic(data, output_path)
+    return digest_bytes(data, algo)
+
+
+def _align_decoded(
+    mtcnn: Any, batch: List[Tuple[Path, Path, Any, Optional[str]]], algo: str = DEFAULT_ALGO
+) -> List[Dict[str, Any]]:
+    """Run one MTCNN pass over equal-size decoded images and write the aligned crops."""
+    imgs = [img for _, _, img, _ in batch]
+    boxes, probs, points = mtcnn.detect(imgs, landmarks=True)
+    if not mtcnn.keep_all:
+        boxes, probs, points = mtcnn.select_boxes(boxes, probs, points, imgs, method=mtcnn.selection_method)
+    faces = mtcnn.extract(imgs, boxes, None)
+    results = []
+    for i, (image_path, output_path, _, raw_checksum) in enumerate(batch):
+        if faces[i] is None:
+            results.append(_failed(image_path, raw_checksum))
+            continue
+        checksum = _save_face(faces[i], output_path, algo)
+        results.append(
+            {
+                "aligned_path": str(output_path),
+                "checksum": checksum,
+                "bbox": [float(v) for v in boxes[i].reshape(-1)],
+                "landmarks": [[float(x), float(y)] for x, y in points[i].reshape(-1, 2)],
+                "prob": float(probs[i].reshape(-1)[0]),
+            }
+        )
+    return results
+
+
+def iter_align(
+    image_paths: Sequence[Path],
+    output_paths: Sequence[Path],
+    detector: Any = None,
+    batch_size: int = 16,
+    prefetch: Optional[int] = None,
+    checksum_algo: str = DEFAULT_ALGO,
+) -> Iterator[Dict[str, Any]]:
+    """Batched detection/alignment yielding one result per input, in input order.
+
+    Images are decoded ahead of detection (at most ``prefetch`` in flight, default ``2 * batch_size``);
+    each batch is split into groups of equal size (MTCNN can only stack same-shape images) and every
+    group goes through the detector in a single forward pass.
+    """
+    if MTCNN is None or Image is None:
+        for image_path in image_paths:
+            yield _failed(image_path)
+        return
+    mtcnn = detector if detector is not None else get_detector()
+    batch_size = max(1, batch_size)
+    decoded = _iter_decoded(image_paths, prefetch or 2 * batch_size, checksum_algo)
+    outputs = iter(output_paths)
+    while True:
+        chunk = [(path, next(outputs), img, digest) for path, (img, digest) in islice(decoded, batch_size)]
+        if not chunk:
+            return
+        results: Dict[int, Dict[str, Any]] = {}
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, (image_path, output_path, img, _) in enumerate(chunk):
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if img is None:
+                results[i] = _failed(image_path)
+            else:
+                groups.setdefault(img.size, []).append(i)
+        for indices in groups.values():
+            for i, res in zip(indices, _align_decoded(mtcnn, [chunk[i] for i in indices], checksum_algo)):
+                results[i] = res
+        for i in range(len(chunk)):
+            yield results[i]
+
+
+def detect_and_align_batch(
+    image_paths: Sequence[Path],
+    output_paths: Sequence[Path],
+    detector: Any = None,
+    batch_size: int = 16,
+    prefetch: Optional[int] = None,
+    checksum_algo: str = DEFAULT_ALGO,
+) -> List[Dict[str, Any]]:
+    """Align a list of images with batched MTCNN detection; see ``iter_align``."""
+    return list(
+        iter_align(
+            image_paths,
+            output_paths,
+            detector=detector,
+            batch_size=batch_size,
+            prefetch=prefetch,
+            checksum_algo=checksum_algo,
+        )
+    )
+
+
+def detect_and_align(image_path: Path, output_path: Path, detector: Any = None) -> Dict[str, Any]:
+    """Detection/alignment via RetinaFace when available; fallback to MTCNN; returns aligned file path and metadata."""
+    # RetinaFace path (disabled: dependency removed). Falls through to MTCNN.
+    return detect_and_align_batch([image_path], [output_path], detector=detector, batch_size=1)[0]
+
+
+def _finalize_item(
+    img_path: Path, raw_dir: Path, output_dir: Path, result: Dict[str, Any], algo: str = DEFAULT_ALGO
+) -> Dict[str, Any]:
+    """Turn an alignment result into a manifest item (id, relative path, checksum).
+
+    Checksums come from the in-memory hashes taken while decoding/encoding, so no file is read back;
+    failed detections are mirrored from raw via hardlink/reflink before falling back to a copy.
+    """
+    rel = img_path.relative_to(raw_dir)
+    aligned_target = output_dir / rel
+    aligned_path = Path(result["aligned_path"])
+    checksum = result.get("checksum")
+    if aligned_path.exists() and aligned_path.is_dir():
+        shutil.rmtree(aligned_path)
+        aligned_path = aligned_target
+    if not aligned_path.exists():
+        mirror_file(img_path, aligned_target)
+        aligned_path = aligned_target
+        checksum = None
+    # If detection failed and pointed to raw path, mirror the raw file into processed to keep manifest relative.
+    if not aligned_path.is_relative_to(output_dir):
+        mirror_file(aligned_path, aligned_target)
+        aligned_path = aligned_target
+        checksum = result.get("raw_checksum")
+    if not checksum:
+        checksum = compute_checksum(aligned_path, algo) if aligned_path.exists() else ""
+    item_id = rel.with_suffix("").as_posix().replace("/", "_")
+    return {"id": item_id, "path": aligned_path.relative_to(output_dir).as_posix(), "checksum": checksum}
+
+
+def _iter_items(
+    images: Sequence[Path], raw_dir: Path, output_dir: Path, batch_size: int, algo: str = DEFAULT_ALGO
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Yield (manifest item, alignment result) for each image, in order."""
+    targets = [output_dir / img_path.relative_to(raw_dir) for img_path in images]
+    results = iter_align(images, targets, batch_size=batch_size, checksum_algo=algo)
+    for img_path, result in zip(images, results):
+        yield _finalize_item(img_path, raw_dir, output_dir, result, algo), result
+
+
+def _align_chunk(
+    images: List[Path], raw_dir: Path, output_dir: Path, batch_size: int, algo: str = DEFAULT_ALGO
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Pool task: align a contiguous chunk of images inside a worker process."""
+    return list(_iter_items(images, raw_dir, output_dir, batch_size, algo))
+
 
+def build_manifest_from_raw(
+    raw_dir: Path,
+    output_dir: Path,
+    logger: logging.Logger | None = None,
+    num_workers: int = 0,
+    batch_size: int = 1,
+    cache: Optional[AlignmentCache] = None,
+    checksum_algo: str = DEFAULT_ALGO,
+) -> List[Dict[str, Any]]:
+    """Process raw LFW images (nested person folders) into aligned outputs; returns manifest items with checksums.
 
-def build_manifest_from_raw(raw_dir: Path, output_dir: Path, logger: logging.Logger | None = None) -> List[Dict[str, Any]]:
-    """Process raw LFW images (nested person folders) into aligned outputs; returns manifest items with checksums."""
+    With ``num_workers > 0`` images are aligned in a process pool (one detector per worker); items are
+    yielded back in input order, so the result is identical to the serial path. ``batch_size`` sets how
+    many images share one detector forward pass. With a ``cache``, unchanged images reuse their cached
+    item and only new/changed ones are aligned; entries for deleted raw images are pruned.
+    ``checksum_algo`` selects the item digest (recorded in the manifest by ``write_manifest``).
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
     items: List[Dict[str, Any]] = []
     images = sorted(raw_dir.rglob("*.jpg"))
+    rels = [img_path.relative_to(raw_dir).as_posix() for img_path in images]
     total = len(images)
-    for idx, img_path in enumerate(images, start=1):
-        rel = img_path.relative_to(raw_dir)
-        aligned_target = output_dir / rel
-        result = detect_and_align(img_path, aligned_target)
-        aligned_path = Path(result["aligned_path"])
-        if aligned_path.exists() and aligned_path.is_dir():
-            shutil.rmtree(aligned_path)
-            aligned_path = aligned_target
-        if not aligned_path.exists():
-            aligned_target.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(img_path, aligned_target)
-            aligned_path = aligned_target
-        # If detection failed and pointed to raw path, mirror the raw file into processed to keep manifest relative.
-        if not aligned_path.is_relative_to(output_dir):
-            aligned_target.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(aligned_path, aligned_target)
-            aligned_path = aligned_target
-        checksum = compute_checksum(aligned_path) if aligned_path.exists() else ""
-        item_id = rel.with_suffix("").as_posix().replace("/", "_")
-        items.append({"id": item_id, "path": aligned_path.relative_to(output_dir).as_posix(), "checksum": checksum})
-        if logger and idx % 200 == 0:
-            logger.info("Processed %d/%d images (%.1f%%)", idx, total, idx * 100.0 / max(total, 1))
+    batch_size = max(1, batch_size)
+    start = time.perf_counter()
+    cached: Dict[int, Dict[str, Any]] = {}
+    if cache is not None:
+        cache.prune(rels, output_dir)
+        for idx, (rel, img_path) in enumerate(zip(rels, images)):
+            entry = cache.lookup(rel, img_path, output_dir)
+            if entry is not None:
+                cached[idx] = {"id": entry["id"], "path": entry["path"], "checksum": entry["checksum"]}
+    pending = [img_path for idx, img_path in enumerate(images) if idx not in cached]
+    pool = None
+    if num_workers > 0 and pending:
+        pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker)
+        chunk_len = max(batch_size, min(64, len(pending) // (num_workers * 8)))
+        chunks = [pending[i : i + chunk_len] for i in range(0, len(pending), chunk_len)]
+        results = chain.from_iterable(
+            pool.map(
+                _align_chunk, chunks, repeat(raw_dir), repeat(output_dir), repeat(batch_size), repeat(checksum_algo)
+            )
+        )
+    else:
+        results = _iter_items(pending, raw_dir, output_dir, batch_size, checksum_algo)
+    try:
+        for idx, (rel, img_path) in enumerate(zip(rels, images)):
+            if idx in cached:
+                items.append(cached[idx])
+                continue
+            item, result = next(results)
+            items.append(item)
+            if cache is not None:
+                cache.update(rel, img_path, output_dir, item, result)
+            done = len(items) - len(cached)
+            if logger and done % 200 == 0:
+                rate = done / max(time.perf_counter() - start, 1e-9)
+                logger.info(
+                    "Processed %d/%d images (%.1f%%, %.1f img/s)",
+                    done,
+                    len(pending),
+                    done * 100.0 / max(len(pending), 1),
+                    rate,
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    if cache is not None:
+        cache.save()
     if logger:
-        logger.info("Finished alignment for %d images", total)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Finished alignment for %d images in %.1fs (%.1f img/s, workers=%d, batch_size=%d, cached=%d)",
+            total,
+            elapsed,
+            len(pending) / max(elapsed, 1e-9),
+            num_workers,
+            batch_size,
+            len(cached),
+        )
     return items
 
 
@@ -97,6 +377,7 @@ def write_manifest(
     version: str = "1.0.0",
     meta: Dict[str, Any] = None,
     pairs: List[Dict[str, str]] = None,
+    checksum_algo: str = DEFAULT_ALGO,
 ) -> Path:
     """Shuffle items, split into train/val/test, and write manifest."""
     meta = meta or {}
@@ -118,9 +399,12 @@ def write_manifest(
         "items": [items_by_id[i] for i in ids],
         "splits": splits,
         "checksums": checksums,
-        "meta": {"source": "LFW", "aligned": True, **meta},
+        "meta": {"source": "LFW", "aligned": True, "checksum_algo": checksum_algo, **meta},
         "pairs": pairs,
     }
+    if is_sqlite_manifest(manifest_path):
+        DatasetManifest(**manifest).save(manifest_path)
+        return manifest_path
     manifest_path.parent.mkdir(parents=True, exist_ok=True)
     manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=True))
     return manifest_path
@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+# Manifest item fields kept in packed string arrays; anything else goes to a sparse side table.
+FIELDS = ("id", "path", "label", "checksum")
+
+
+def person_label(item: Dict[str, Any]) -> str:
+    """Identity of a manifest item: its ``label`` or, as LFW keeps one folder per person, the folder."""
+    if item.get("label"):
+        return str(item["label"])
+    parent = Path(item.get("path", "")).parent.as_posix()
+    return "" if parent == "." else parent
+
+
+class StringArray:
+    """Read-only sequence of strings stored as one UTF-8 byte buffer plus int64 offsets.
+
+    Two NumPy arrays hold the whole column, so forked DataLoader workers share the pages instead of
+    dirtying them with reference-count updates on millions of ``str`` objects.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        encoded = [v.encode("utf-8") for v in values]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return self.buffer[start:end].tobytes().decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + self.offsets.nbytes
+
+
+class SampleIndex:
+    """Compact, array-backed replacement for a list of manifest item dicts.
+
+    String ``id``/``path``/``label``/``checksum`` values live in ``StringArray`` columns with a
+    per-field presence mask, so ``index[i]`` rebuilds exactly the dict that was packed. Other keys,
+    and packed fields holding non-string values, stay in a sparse dict (empty for manifests written
+    by prepare-data).
+    """
+
+    def __init__(self, items: Sequence[Dict[str, Any]]):
+        if np is None:
+            raise RuntimeError("numpy is required for SampleIndex")
+        self.columns: Dict[str, StringArray] = {}
+        self.present: Dict[str, Any] = {}
+        for name in FIELDS:
+            packed = [isinstance(item.get(name), str) for item in items]
+            self.present[name] = np.array(packed, dtype=bool)
+            self.columns[name] = StringArray(item[name] if ok else "" for item, ok in zip(items, packed))
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        for pos, item in enumerate(items):
+            # non-string values of the packed fields are kept as is rather than stringified
+            extra = {k: v for k, v in item.items() if k not in FIELDS or not isinstance(v, str)}
+            if extra:
+                self.extras[pos] = extra
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        sample: Dict[str, Any] = {}
+        for name in FIELDS:
+            if self.present[name][idx]:
+                sample[name] = self.columns[name][idx]
+        if self.extras:
+            sample.update(self.extras.get(idx, {}))
+        return sample
+
+    def tolist(self) -> List[Dict[str, Any]]:
+        return [self[i] for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        masks = sum(mask.nbytes for mask in self.present.values())
+        return sum(col.nbytes for col in self.columns.values()) + masks
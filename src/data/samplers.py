@@ -0,0 +1,69 @@
+import math
+from typing import Iterator
+
+try:
+    import torch
+    from torch.utils.data import Sampler
+except Exception:  # pragma: no cover
+    torch = None
+    Sampler = object
+
+
+def mix_seed(*parts: int) -> int:
+    """Hash integers into a 63-bit generator seed (splitmix64 finalizer per part)."""
+    mask = (1 << 64) - 1
+    value = 0
+    for part in parts:
+        value = (value + 0x9E3779B97F4A7C15 + (int(part) & mask)) & mask
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & mask
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & mask
+        value ^= value >> 31
+    return value >> 1
+
+
+class ResumableSampler(Sampler):
+    """Per-epoch permutation seeded by (seed, epoch) that can start mid-epoch.
+
+    ``set_epoch`` selects the permutation and rewinds to its start; ``set_start(n)`` skips the first
+    ``n`` indices of the current epoch, so a resumed run never loads the samples it already trained
+    on. ``len`` counts the indices left to yield.
+
+    With ``num_replicas > 1`` it shards like ``DistributedSampler``: the permutation is padded (by
+    wrapping) to a multiple of ``num_replicas`` and rank ``r`` takes every ``num_replicas``-th index
+    from ``r``, so all ranks run the same number of steps. Positions are per rank.
+    """
+
+    def __init__(self, length: int, shuffle: bool = True, seed: int = 0, num_replicas: int = 1, rank: int = 0):
+        if not 0 <= rank < num_replicas:
+            raise ValueError(f"rank {rank} out of range for {num_replicas} replicas")
+        self.length = int(length)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.num_samples = math.ceil(self.length / num_replicas)
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+        self.start = 0
+
+    def set_start(self, position: int) -> None:
+        self.start = max(0, min(int(position), self.num_samples))
+
+    def __len__(self) -> int:
+        return self.num_samples - self.start
+
+    def __iter__(self) -> Iterator[int]:
+        if self.shuffle:
+            gen = torch.Generator()
+            gen.manual_seed(mix_seed(self.seed, self.epoch))
+            order = torch.randperm(self.length, generator=gen)
+        else:
+            order = torch.arange(self.length)
+        if self.num_replicas > 1:
+            padding = self.num_samples * self.num_replicas - self.length
+            order = torch.cat([order, order.repeat(math.ceil(padding / max(self.length, 1)))[:padding]])
+            order = order[self.rank :: self.num_replicas]
+        return iter(order[self.start :].tolist())
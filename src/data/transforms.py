@@ -1,5 +1,10 @@
-import random
-from typing import Any, Dict
+import math
+from typing import Any, Dict, Sequence
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
 
 try:
     import torchvision.transforms as T
@@ -8,13 +13,18 @@ except Exception:  # pragma: no cover
     T = None
     Image = None
 
+from .samplers import mix_seed
+
 
 class LightAugmentation:
-    """Deterministic light augmentations (flip/jitter/blur) if torchvision available."""
+    """Light per-sample PIL augmentations (jitter/flip) if torchvision available.
+
+    Randomness comes from torch's per-worker RNG; the global RNGs are left untouched. Prefer
+    ``BatchLightAugmentation`` for training, which is vectorized and reproducible per sample.
+    """
 
     def __init__(self, seed: int = 42):
         self.seed = seed
-        random.seed(seed)
         if T:
             self.transform = T.Compose(
                 [
@@ -28,7 +38,93 @@ class LightAugmentation:
     def __call__(self, sample: Dict[str, Any]) -> Dict[str, Any]:
         sample = dict(sample)
         if T and Image and "image" in sample and isinstance(sample["image"], Image.Image):
-            random.seed(self.seed)
             sample["image"] = self.transform(sample["image"]) if self.transform else sample["image"]
         sample["aug_seed"] = self.seed
         return sample
+
+
+# grayscale weights used by torchvision; YIQ transform for hue rotation (gray axis = Y)
+_GRAY = (0.2989, 0.587, 0.114)
+_RGB_TO_YIQ = ((0.299, 0.587, 0.114), (0.596, -0.274, -0.322), (0.211, -0.523, 0.312))
+
+
+class BatchLightAugmentation:
+    """Vectorized flip + brightness/contrast/saturation/hue jitter on collated float batches.
+
+    Runs in the training loop on N x 3 x H x W tensors in [0, 1]. Per-sample parameters come from a
+    ``torch.Generator`` seeded with (seed, epoch, dataset index), so results do not depend on batch
+    composition, worker count or global RNG state. Jitter ranges follow ``T.ColorJitter``, but the
+    ops always apply in the fixed order brightness, contrast, saturation, hue, whereas ``ColorJitter``
+    shuffles the order per call; outputs are not expected to match it sample for sample.
+
+    The color ops are folded into one 3 x 3 matrix plus offset per sample (one batched matmul and a
+    final clamp): brightness and contrast as in ``T.ColorJitter``, saturation as a blend with gray,
+    and hue as a rotation of the chroma plane in YIQ space. Without intermediate clamping this matches
+    torchvision for brightness/contrast/saturation when nothing saturates; hue approximates the HSV
+    shift (the hue factor is a fraction of a full turn, as in ``adjust_hue``).
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        brightness: float = 0.1,
+        contrast: float = 0.1,
+        saturation: float = 0.1,
+        hue: float = 0.05,
+        flip_p: float = 0.5,
+    ):
+        if torch is None:
+            raise RuntimeError("torch is required for BatchLightAugmentation")
+        self.seed = seed
+        self.brightness = brightness
+        self.contrast = contrast
+        self.saturation = saturation
+        self.hue = hue
+        self.flip_p = flip_p
+        self._gray = torch.tensor(_GRAY, dtype=torch.float64)
+        self._yiq = torch.tensor(_RGB_TO_YIQ, dtype=torch.float64)
+        self._yiq_inv = torch.linalg.inv(self._yiq)
+
+    def sample_params(self, indices: Sequence[int], epoch: int = 0) -> Any:
+        """Return an N x 5 tensor of (brightness, contrast, saturation, hue, flip) per sample."""
+        params = torch.empty((len(indices), 5), dtype=torch.float64)
+        gen = torch.Generator()
+        for row, index in enumerate(indices):
+            gen.manual_seed(mix_seed(self.seed, epoch, int(index)))
+            params[row] = torch.rand(5, generator=gen, dtype=torch.float64)
+        spans = torch.tensor([self.brightness, self.contrast, self.saturation], dtype=torch.float64)
+        params[:, :3] = 1.0 + (params[:, :3] * 2.0 - 1.0) * spans
+        params[:, 3] = (params[:, 3] * 2.0 - 1.0) * self.hue
+        params[:, 4] = (params[:, 4] < self.flip_p).double()
+        return params
+
+    def color_matrices(self, params: Any, channel_means: Any) -> Any:
+        """Per-sample (N x 3 x 3 matrix, N x 3 x 1 offset) for the fused color jitter."""
+        b, c, s, h = params[:, 0], params[:, 1], params[:, 2], params[:, 3]
+        eye = torch.eye(3, dtype=torch.float64)
+        gray_rows = torch.ones(3, 1, dtype=torch.float64) * self._gray.view(1, 3)
+        sat = s.view(-1, 1, 1) * eye + (1.0 - s).view(-1, 1, 1) * gray_rows
+        # negative angle in the I/Q plane moves hue the same way as a positive HSV shift
+        theta = -h * 2.0 * math.pi
+        rot = eye.repeat(len(params), 1, 1)
+        rot[:, 1, 1] = torch.cos(theta)
+        rot[:, 1, 2] = -torch.sin(theta)
+        rot[:, 2, 1] = torch.sin(theta)
+        rot[:, 2, 2] = torch.cos(theta)
+        color = self._yiq_inv @ rot @ self._yiq @ sat
+        # contrast blends toward the mean gray level of the brightness-adjusted image
+        mean = b * (channel_means.double() @ self._gray)
+        matrix = (c * b).view(-1, 1, 1) * color
+        offset = ((1.0 - c) * mean).view(-1, 1, 1) * color.sum(dim=2, keepdim=True)
+        return matrix, offset
+
+    def __call__(self, images: Any, indices: Sequence[int], epoch: int = 0) -> Any:
+        n, ch, hgt, wid = images.shape
+        params = self.sample_params(indices, epoch)
+        matrix, offset = self.color_matrices(params, images.mean(dim=(2, 3)))
+        flat = images.reshape(n, ch, hgt * wid)
+        out = torch.baddbmm(offset.to(images), matrix.to(images), flat).clamp_(0.0, 1.0)
+        out = out.view(n, ch, hgt, wid)
+        flip = (params[:, 4] > 0.5).to(images.device)
+        out[flip] = out[flip].flip(-1)
+        return out
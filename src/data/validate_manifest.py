@@ -1,44 +1,138 @@
-import hashlib
 import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from .checksums import DEFAULT_ALGO, digest_file
+from .manifest import DatasetManifest, is_sqlite_manifest
 
-def compute_checksum(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+
+def compute_checksum(path: Path, algo: str = DEFAULT_ALGO) -> str:
+    return digest_file(path, algo)
 
 
 def load_manifest(path: Path) -> Dict:
+    if is_sqlite_manifest(path):
+        return dict(DatasetManifest.load(path).__dict__)
     return json.loads(path.read_text())
 
 
-def validate_items(manifest: Dict, root: Path) -> Tuple[List[str], List[str]]:
+def stat_cache_path(manifest_path: Path) -> Path:
+    return manifest_path.with_name(manifest_path.name + ".statcache.json")
+
+
+class StatCache:
+    """Sidecar of (size, mtime_ns, inode, digest) per file so unchanged files skip re-hashing."""
+
+    def __init__(self, path: Path, algo: str = DEFAULT_ALGO):
+        self.path = path
+        self.algo = algo
+        self.entries: Dict[str, List[Any]] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                data = {}
+            if data.get("algo") == algo:
+                self.entries = data.get("entries", {})
+
+    @staticmethod
+    def _key(st: os.stat_result) -> List[int]:
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def get(self, rel_path: str, st: os.stat_result) -> Optional[str]:
+        entry = self.entries.get(rel_path)
+        if entry and entry[:3] == self._key(st):
+            return entry[3]
+        return None
+
+    def put(self, rel_path: str, st: os.stat_result, digest: str) -> None:
+        self.entries[rel_path] = self._key(st) + [digest]
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"algo": self.algo, "entries": self.entries}))
+        os.replace(tmp, self.path)
+
+
+def validate_items(
+    manifest: Dict,
+    root: Path,
+    workers: Optional[int] = None,
+    stat_cache: Optional[StatCache] = None,
+    full: bool = False,
+    stats: Optional[Dict[str, float]] = None,
+) -> Tuple[List[str], List[str]]:
+    """Check that every item exists and matches its checksum.
+
+    Hashing runs on a thread pool (hashlib releases the GIL). The digest comes from
+    ``meta.checksum_algo`` (SHA256 for manifests that predate it). With a ``stat_cache``, files whose
+    size/mtime/inode are unchanged and whose cached digest matches are skipped unless ``full`` is set.
+    ``stats`` (if given) is filled with files_hashed, files_skipped, bytes_hashed and seconds.
+    """
     missing = []
     bad_checksum = []
     checksums = manifest.get("checksums", {})
     items = manifest.get("items", [])
+    algo = manifest.get("meta", {}).get("checksum_algo", DEFAULT_ALGO)
+    start = time.perf_counter()
+    to_hash: List[Tuple[str, Path, os.stat_result, str]] = []
+    skipped = 0
     for item in items:
         rel_path = item.get("path")
         item_id = item.get("id")
         if rel_path is None or item_id is None:
             continue
         full_path = root / rel_path
-        if not full_path.exists():
+        try:
+            st = full_path.stat()
+        except OSError:
             missing.append(rel_path)
             continue
         expected = checksums.get(item_id, "")
-        if expected:
-            actual = compute_checksum(full_path)
-            if actual != expected:
-                bad_checksum.append(rel_path)
+        if not expected:
+            continue
+        if stat_cache is not None and not full and stat_cache.get(rel_path, st) == expected:
+            skipped += 1
+            continue
+        to_hash.append((rel_path, full_path, st, expected))
+
+    bytes_hashed = 0
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+            digests = pool.map(lambda job: compute_checksum(job[1], algo), to_hash)
+            for (rel_path, _, st, expected), actual in zip(to_hash, digests):
+                bytes_hashed += st.st_size
+                if actual != expected:
+                    bad_checksum.append(rel_path)
+                elif stat_cache is not None:
+                    stat_cache.put(rel_path, st, actual)
+    if stat_cache is not None:
+        stat_cache.save()
+    if stats is not None:
+        stats.update(
+            {
+                "files_hashed": len(to_hash),
+                "files_skipped": skipped,
+                "bytes_hashed": bytes_hashed,
+                "seconds": time.perf_counter() - start,
+            }
+        )
     return missing, bad_checksum
 
 
+def format_stats(stats: Dict[str, float]) -> str:
+    mb = stats.get("bytes_hashed", 0) / (1024 * 1024)
+    seconds = max(stats.get("seconds", 0.0), 1e-9)
+    return (
+        f"hashed={int(stats.get('files_hashed', 0))} skipped={int(stats.get('files_skipped', 0))} "
+        f"({mb:.1f} MB in {seconds:.2f}s, {mb / seconds:.1f} MB/s)"
+    )
+
+
 def validate_splits(manifest: Dict) -> bool:
     splits = manifest.get("splits", {})
     items = manifest.get("items", [])
@@ -51,20 +145,28 @@ def validate_splits(manifest: Dict) -> bool:
 
 
 def main():
+    argv = sys.argv[1:]
+    full = "--full" in argv
+    argv = [a for a in argv if a != "--full"]
     manifest_path = Path("data/lfw/manifest.json")
     root = Path("data/lfw/processed")
-    if len(sys.argv) > 1:
-        manifest_path = Path(sys.argv[1])
-    if len(sys.argv) > 2:
-        root = Path(sys.argv[2])
+    if len(argv) > 0:
+        manifest_path = Path(argv[0])
+    if len(argv) > 1:
+        root = Path(argv[1])
 
     if not manifest_path.exists():
         print(f"Manifest not found: {manifest_path}")
         sys.exit(1)
 
     manifest = load_manifest(manifest_path)
-    missing, bad_checksum = validate_items(manifest, root)
+    algo = manifest.get("meta", {}).get("checksum_algo", DEFAULT_ALGO)
+    stats: Dict[str, float] = {}
+    missing, bad_checksum = validate_items(
+        manifest, root, stat_cache=StatCache(stat_cache_path(manifest_path), algo), full=full, stats=stats
+    )
     splits_ok = validate_splits(manifest)
+    print(f"Checksums ({algo}): {format_stats(stats)}")
 
     if missing:
         print("Missing files:", missing)
@@ -7,6 +7,7 @@ except Exception:  # pragma: no cover
     torch = None
 
 from ..registry import MODELS
+from ..utils.compile import split_compile_cfg
 
 
 def load_model_from_config(config: Dict[str, Any]) -> Any:
@@ -14,7 +15,7 @@ def load_model_from_config(config: Dict[str, Any]) -> Any:
     model_cfg = config if isinstance(config, dict) else {"type": str(config)}
     if MODELS and "type" in model_cfg:
         try:
-            return MODELS.build(model_cfg)
+            return MODELS.build(split_compile_cfg(model_cfg)[0])
         except Exception:
             return model_cfg
     return model_cfg
@@ -1,14 +1,21 @@
+import asyncio
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from runners.base_runner import build_runner
-from utils.config import prepare_run
+from utils.config import load_config, prepare_run
 
+_ENGINES: Dict[Tuple[str, int], Any] = {}
+_BATCHERS: Dict[Tuple[str, int], Any] = {}
+_ENGINES_LOCK = threading.Lock()
 
-def train(config_path: Path, work_dir: Optional[Path] = None) -> None:
+
+def train(config_path: Path, work_dir: Optional[Path] = None, resume: bool = False, nproc: int = 1) -> None:
     ctx = prepare_run(config_path, work_dir)
     runner = build_runner(ctx["work_dir"], ctx["config"])
-    runner.train()
+    runner.train(resume=resume, nproc=nproc)
 
 
 def evaluate(config_path: Path, work_dir: Optional[Path] = None) -> Dict[str, Any]:
@@ -17,7 +24,99 @@ def evaluate(config_path: Path, work_dir: Optional[Path] = None) -> Dict[str, An
     return runner.evaluate()
 
 
+def _engine_key(config_path: Path) -> Tuple[str, int]:
+    path = Path(config_path).resolve()
+    return str(path), path.stat().st_mtime_ns
+
+
+def _get_engine(key: Tuple[str, int]) -> Any:
+    from pipelines.infer import InferenceEngine
+
+    engine = _ENGINES.get(key)
+    if engine is None:
+        for stale in [k for k in _ENGINES if k[0] == key[0]]:
+            del _ENGINES[stale]
+            if stale in _BATCHERS:
+                _BATCHERS.pop(stale).close()
+        engine = _ENGINES[key] = InferenceEngine.from_config(load_config(Path(key[0])).data)
+    return engine
+
+
+def get_engine(config_path: Path) -> Any:
+    """Warm ``InferenceEngine`` for a config, built on first use and reused until the file changes."""
+    key = _engine_key(config_path)
+    with _ENGINES_LOCK:
+        return _get_engine(key)
+
+
+def get_batcher(config_path: Path) -> Any:
+    """``DynamicBatcher`` in front of the config's warm engine, sized by the config's ``serve`` section."""
+    from pipelines.batching import DynamicBatcher
+
+    key = _engine_key(config_path)
+    with _ENGINES_LOCK:
+        engine = _get_engine(key)
+        batcher = _BATCHERS.get(key)
+        if batcher is None:
+            serve_cfg = load_config(Path(key[0])).data.get("serve", {})
+            batcher = _BATCHERS[key] = DynamicBatcher(
+                engine.forward,
+                max_batch_size=serve_cfg.get("max_batch_size", 8),
+                max_wait_ms=serve_cfg.get("max_wait_ms", 5.0),
+                max_queue=serve_cfg.get("max_queue", 256),
+            )
+    return batcher
+
+
+def batcher_stats() -> Dict[str, Any]:
+    """Queue depth, batch sizes and latency of every live batcher, keyed by config path."""
+    with _ENGINES_LOCK:
+        return {key[0]: batcher.stats() for key, batcher in _BATCHERS.items()}
+
+
 def infer(config_path: Path, sources: Any, targets: Any, work_dir: Optional[Path] = None) -> Dict[str, Any]:
-    # Placeholder that echoes inputs
-    _ = prepare_run(config_path, work_dir)
-    return {"sources": sources, "targets": targets, "status": "not_implemented"}
+    """Swap each source onto its target with the config's cached engine and write the PNGs.
+
+    Outputs go to ``work_dir`` if given, else ``infer.output_dir``.
+    """
+    infer_cfg = load_config(Path(config_path)).data.get("infer", {})
+    output_dir = Path(work_dir) if work_dir else Path(infer_cfg.get("output_dir", "work_dirs/face_swap/infer-samples"))
+    stats = get_engine(config_path).swap_files(
+        list(sources), list(targets), output_dir, save_workers=infer_cfg.get("save_workers", 2)
+    )
+    return {"status": "ok", **stats}
+
+
+async def infer_async(config_path: Path, sources: Any, targets: Any, work_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """``infer`` for async servers: each pair joins the config's ``DynamicBatcher`` queue.
+
+    Pairs from concurrent requests share forward passes. Decoding and PNG writing run in the default
+    executor, so the event loop only waits. Raises ``QueueFullError`` when the batcher queue cannot take
+    all of the request's pairs; none of them are queued then.
+    """
+    from pipelines.infer import save_png
+    from data.infer_pairs import pair_output_name
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    batcher = await loop.run_in_executor(None, get_batcher, config_path)
+    engine = await loop.run_in_executor(None, get_engine, config_path)
+    sources, targets = list(sources), list(targets)
+    pairs = await loop.run_in_executor(
+        None, lambda: [(engine.load_image(s), engine.load_image(t)) for s, t in zip(sources, targets)]
+    )
+    futures = batcher.submit_many(pairs)  # all pairs or none, so a rejected request costs nothing
+    preds = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    infer_cfg = load_config(Path(config_path)).data.get("infer", {})
+    output_dir = Path(work_dir) if work_dir else Path(infer_cfg.get("output_dir", "work_dirs/face_swap/infer-samples"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [output_dir / pair_output_name(str(s), str(t)) for s, t in zip(sources, targets)]
+    await asyncio.gather(*(loop.run_in_executor(None, save_png, pred, path) for pred, path in zip(preds, paths)))
+    elapsed = time.perf_counter() - start
+    return {
+        "status": "ok",
+        "pairs": len(paths),
+        "seconds": elapsed,
+        "pairs_per_s": len(paths) / elapsed if elapsed > 0 else 0.0,
+        "outputs": [str(p) for p in paths],
+    }
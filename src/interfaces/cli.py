@@ -5,13 +5,20 @@ from typing import Optional
 from runners.base_runner import build_runner
 from utils.config import prepare_run
 from data.preprocess_lfw import run_preprocess
-from data.validate_manifest import load_manifest, validate_items, validate_splits
+from data.validate_manifest import (
+    StatCache,
+    format_stats,
+    load_manifest,
+    stat_cache_path,
+    validate_items,
+    validate_splits,
+)
 
 
 def cmd_train(args: argparse.Namespace) -> None:
     ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
     runner = build_runner(ctx["work_dir"], ctx["config"], ctx.get("config_path"), ctx.get("env_hash", ""))
-    runner.train()
+    runner.train(resume=args.resume, nproc=args.nproc)
 
 
 def cmd_eval(args: argparse.Namespace) -> None:
@@ -22,53 +29,28 @@ def cmd_eval(args: argparse.Namespace) -> None:
 
 
 def cmd_infer(args: argparse.Namespace) -> None:
-    from pathlib import Path
-    import yaml
-    from PIL import Image
-    import torch
-    from torchvision import transforms as T
-    cfg = yaml.safe_load(Path(args.config).read_text()) or {}
-    infer_cfg = cfg.get("infer", {})
+    from pipelines.infer import InferenceEngine
+    from utils.logging import setup_logger
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    infer_cfg = ctx["config"].get("infer", {})
     sources = infer_cfg.get("sources", [])
     targets = infer_cfg.get("targets", [])
     output_dir = Path(infer_cfg.get("output_dir", "work_dirs/face_swap/infer-samples"))
-    ckpt_path = infer_cfg.get("checkpoint")
     output_dir.mkdir(parents=True, exist_ok=True)
-    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
-    runner = build_runner(ctx["work_dir"], ctx["config"], ctx.get("config_path"), ctx.get("env_hash", ""))
-    model_cfg = ctx["config"].get("model", {})
-    if torch is None:
-        raise RuntimeError("torch is required for inference")
-    from registry import MODELS as MODELS_REG
-    model = MODELS_REG.build(model_cfg)
-    if ckpt_path and Path(ckpt_path).exists():
-        state = torch.load(ckpt_path, map_location="cpu")
-        state_dict = state.get("model", state)
-        model.load_state_dict(state_dict, strict=False)
-        runner.logger.info("Loaded checkpoint for infer: %s", ckpt_path)
-    model.eval()
-    to_tensor = T.ToTensor()
-    to_pil = T.ToPILImage()
-    device = torch.device("cpu")
-    model.to(device)
-    pairs = list(zip(sources, targets))
-    if not pairs:
-        runner.logger.warning("No inference pairs defined in config.infer.sources/targets")
+    logger = setup_logger("Infer")
+    if not sources or not targets:
+        logger.warning("No inference pairs defined in config.infer.sources/targets")
         return
-    for src, tgt in pairs:
-        src_img = Image.open(src).convert("RGB")
-        tgt_img = Image.open(tgt).convert("RGB")
-        src_tensor = to_tensor(src_img).unsqueeze(0).to(device)
-        tgt_tensor = to_tensor(tgt_img).unsqueeze(0).to(device)
-        with torch.no_grad():
-            outputs = model(src_tensor, tgt_tensor)
-            pred = outputs.get("output", tgt_tensor)
-        pred = pred.clamp(0, 1).cpu().squeeze(0)
-        out_img = to_pil(pred)
-        out_name = f"{Path(src).stem}_to_{Path(tgt).stem}.png"
-        out_path = output_dir / out_name
-        out_img.save(out_path)
-        runner.logger.info("Saved inference output to %s", out_path)
+    engine = InferenceEngine.from_config(ctx["config"], logger)
+    engine.swap_files(
+        sources,
+        targets,
+        output_dir,
+        num_workers=infer_cfg.get("num_workers", 0),
+        save_workers=infer_cfg.get("save_workers", 2),
+        log_interval=infer_cfg.get("log_interval", 50),
+    )
 
 
 def cmd_export(args: argparse.Namespace) -> None:
@@ -100,13 +82,15 @@ def cmd_export(args: argparse.Namespace) -> None:
         import torch
         from registry import MODELS as MODELS_REG
 
-        model_cfg = cfg.get("model", {})
+        from utils.compile import maybe_fuse, split_compile_cfg
+
+        model_cfg = split_compile_cfg(cfg.get("model", {}))[0]
         model = MODELS_REG.build(model_cfg)
         if ckpt_path.exists():
             state = torch.load(ckpt_path, map_location="cpu")
             state_dict = state.get("model", state)
             model.load_state_dict(state_dict, strict=False)
-        model.eval()
+        maybe_fuse(model.eval(), cfg.get("model", {}))
         dummy_src = torch.randn(*input_size)
         dummy_tgt = torch.randn(*input_size)
 
@@ -205,7 +189,20 @@ def cmd_prepare_data(args: argparse.Namespace) -> None:
     cfg = yaml.safe_load(Path(args.config).read_text()) or {}
     # Apply overrides if provided
     cfg["download"] = args.download if args.download else cfg.get("download", False)
-    for key in ["dataset", "raw_dir", "proc_dir", "manifest", "train_ratio", "val_ratio", "version"]:
+    if args.no_incremental:
+        cfg["incremental"] = False
+    override_keys = [
+        "dataset",
+        "raw_dir",
+        "proc_dir",
+        "manifest",
+        "train_ratio",
+        "val_ratio",
+        "version",
+        "num_workers",
+        "batch_size",
+    ]
+    for key in override_keys:
         override = getattr(args, key, None)
         if override is not None:
             cfg[key] = override
@@ -218,7 +215,61 @@ def cmd_prepare_data(args: argparse.Namespace) -> None:
         train_ratio=cfg.get("train_ratio", 0.8),
         val_ratio=cfg.get("val_ratio", 0.1),
         version=cfg.get("version", "1.0.0"),
+        num_workers=cfg.get("num_workers", 0),
+        batch_size=cfg.get("batch_size", 1),
+        incremental=cfg.get("incremental", False),
+        cache_path=cfg.get("cache_path"),
+        cache_key=cfg.get("cache_key", "stat"),
+        checksum_algo=cfg.get("checksum_algo", "sha256"),
+    )
+
+
+def cmd_pack_dataset(args: argparse.Namespace) -> None:
+    import yaml
+    from data.packed_dataset import pack_split
+
+    cfg = yaml.safe_load(Path(args.config).read_text()) or {}
+    for key in ["manifest", "root", "output_dir", "size"]:
+        override = getattr(args, key, None)
+        if override is not None:
+            cfg[key] = override
+    splits = args.split or cfg.get("splits", ["train", "val", "test"])
+    output_dir = Path(cfg.get("output_dir", "data/lfw/packed"))
+    for split in splits:
+        index_path = pack_split(
+            Path(cfg.get("manifest", "data/lfw/manifest.json")),
+            Path(cfg.get("root", "data/lfw/processed")),
+            split,
+            output_dir,
+            size=cfg.get("size", 160),
+        )
+        print(f"Packed split {split} -> {index_path}")
+
+
+def cmd_build_embeddings(args: argparse.Namespace) -> None:
+    from data.embedding_store import build_embedding_store
+    from models.arcface import ArcFaceEmbedder
+
+    embedder = ArcFaceEmbedder(pretrained=True)
+    if not getattr(embedder, "valid", False):
+        print("Warning: facenet-pytorch weights unavailable; storing pooled fallback embeddings")
+    index_path = build_embedding_store(
+        Path(args.manifest),
+        Path(args.root),
+        Path(args.output_dir),
+        embedder,
+        dtype=args.dtype,
+        batch_size=args.batch_size,
     )
+    print(f"Wrote embedding store -> {index_path}")
+
+
+def cmd_convert_manifest(args: argparse.Namespace) -> None:
+    from data.manifest import DatasetManifest
+
+    manifest = DatasetManifest.load(Path(args.input))
+    manifest.save(Path(args.output))
+    print(f"Converted {args.input} -> {args.output} ({len(manifest.items)} items)")
 
 
 def cmd_benchmark_edge(args: argparse.Namespace) -> None:
@@ -228,6 +279,121 @@ def cmd_benchmark_edge(args: argparse.Namespace) -> None:
     print(results)
 
 
+def cmd_quantize(args: argparse.Namespace) -> None:
+    import json
+
+    from pipelines.quantize import run_quantize
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    config = ctx["config"]
+    overrides = {
+        "checkpoint": args.checkpoint,
+        "output": args.output,
+        "backend": args.backend,
+        "calibration_samples": args.calibration_samples,
+    }
+    config["quantize"] = {**config.get("quantize", {}), **{k: v for k, v in overrides.items() if v is not None}}
+    report = run_quantize(config, ctx["work_dir"])
+    out_path = ctx["work_dir"] / "quantize.json"
+    out_path.write_text(json.dumps(report, indent=2))
+    print(
+        f"int8 ({report['backend']}): psnr {report['psnr_fp32']:.2f} -> {report['psnr_int8']:.2f} dB, "
+        f"ssim {report['ssim_fp32']:.4f} -> {report['ssim_int8']:.4f}, "
+        f"{report['latency_ms_fp32']:.1f} -> {report['latency_ms_int8']:.1f} ms/pair ({report['speedup']:.2f}x)"
+    )
+    print(f"Wrote {report['checkpoint']} and {out_path}")
+
+
+def cmd_benchmark_ddp(args: argparse.Namespace) -> None:
+    import json
+
+    from pipelines.benchmarks import benchmark_ddp
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    results = benchmark_ddp(
+        ctx["config"], nprocs=args.nproc, steps=args.steps, warmup=args.warmup, image_size=args.image_size
+    )
+    for row in results:
+        print(
+            f"nproc={row['nproc']} threads/rank={row['threads_per_rank']} step={row['step_time_s']:.3f}s "
+            f"throughput={row['images_per_s']:.1f} img/s speedup={row['speedup']:.2f}x "
+            f"efficiency={row['efficiency']:.0%}"
+        )
+    out_path = ctx["work_dir"] / "benchmark_ddp.json"
+    out_path.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {out_path}")
+
+
+def cmd_benchmark_checkpointing(args: argparse.Namespace) -> None:
+    import json
+
+    from pipelines.benchmarks import benchmark_checkpointing
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    modes = [None if m == "none" else m for m in args.modes]
+    results = benchmark_checkpointing(
+        ctx["config"],
+        image_sizes=args.image_size,
+        modes=modes,
+        batch_size=args.batch_size,
+        steps=args.steps,
+        warmup=args.warmup,
+    )
+    for row in results:
+        print(
+            f"size={row['image_size']} mode={row['activation_checkpointing']} step={row['step_time_s']:.3f}s "
+            f"({row['step_time_ratio']:.2f}x) train_mem={row['train_rss_mb']:.0f}MB ({row['memory_ratio']:.2f}x) "
+            f"peak_rss={row['peak_rss_mb']:.0f}MB"
+        )
+    out_path = ctx["work_dir"] / "benchmark_checkpointing.json"
+    out_path.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {out_path}")
+
+
+def cmd_benchmark_infer(args: argparse.Namespace) -> None:
+    import json
+
+    from pipelines.benchmarks import benchmark_infer
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    results = benchmark_infer(
+        ctx["config"], image_size=args.image_size, batch_size=args.batch_size, iters=args.iters, warmup=args.warmup
+    )
+    for row in results:
+        print(
+            f"{row['variant']}: {row['latency_ms_per_pair']:.2f} ms/pair ({row['speedup']:.2f}x) "
+            f"max_abs_diff={row['max_abs_diff']:.2e}"
+        )
+    out_path = ctx["work_dir"] / "benchmark_infer.json"
+    out_path.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {out_path}")
+
+
+def cmd_benchmark_serve(args: argparse.Namespace) -> None:
+    import json
+
+    from pipelines.benchmarks import benchmark_serving
+
+    ctx = prepare_run(Path(args.config), Path(args.work_dir) if args.work_dir else None)
+    results = benchmark_serving(
+        ctx["config"],
+        clients=args.clients,
+        max_batch_sizes=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        requests_per_client=args.requests,
+        image_size=args.image_size,
+    )
+    for row in results:
+        print(
+            f"max_batch={row['max_batch_size']} clients={row['clients']} {row['pairs_per_s']:.2f} pairs/s "
+            f"p50={row['latency_ms_p50']:.0f}ms p99={row['latency_ms_p99']:.0f}ms "
+            f"mean_batch={row['mean_batch_size']:.2f}"
+        )
+    out_path = ctx["work_dir"] / "benchmark_serve.json"
+    out_path.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {out_path}")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Face swap CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -235,6 +401,8 @@ def build_parser() -> argparse.ArgumentParser:
     p_validate = subparsers.add_parser("validate-manifest")
     p_validate.add_argument("--manifest", required=True)
     p_validate.add_argument("--processed-dir", required=True)
+    p_validate.add_argument("--full", action="store_true", help="Re-hash every file, ignoring the stat cache")
+    p_validate.add_argument("--workers", type=int, help="Hashing threads (default: cpu_count + 4, max 32)")
     p_validate.set_defaults(func=cmd_validate_manifest)
 
     p_data = subparsers.add_parser("prepare-data")
@@ -247,11 +415,42 @@ def build_parser() -> argparse.ArgumentParser:
     p_data.add_argument("--train-ratio", type=float, help="Override train split ratio")
     p_data.add_argument("--val-ratio", type=float, help="Override val split ratio")
     p_data.add_argument("--version", help="Override manifest version")
+    p_data.add_argument("--num-workers", type=int, help="Override alignment worker processes (0 = serial)")
+    p_data.add_argument("--batch-size", type=int, help="Override images per MTCNN forward pass")
+    p_data.add_argument("--no-incremental", action="store_true", help="Ignore the alignment cache and re-align all")
     p_data.set_defaults(func=cmd_prepare_data)
 
+    p_convert = subparsers.add_parser("convert-manifest")
+    p_convert.add_argument("--input", required=True, help="Source manifest (.json or .sqlite)")
+    p_convert.add_argument("--output", required=True, help="Destination manifest; format from suffix")
+    p_convert.set_defaults(func=cmd_convert_manifest)
+
+    p_pack = subparsers.add_parser("pack-dataset")
+    p_pack.add_argument("--config", required=True)
+    p_pack.add_argument("--split", action="append", help="Split to pack (repeatable; default from config)")
+    p_pack.add_argument("--manifest", help="Override manifest path")
+    p_pack.add_argument("--root", help="Override processed image root")
+    p_pack.add_argument("--output-dir", help="Override packed output dir")
+    p_pack.add_argument("--size", type=int, help="Override packed image size (square)")
+    p_pack.set_defaults(func=cmd_pack_dataset)
+
+    p_emb = subparsers.add_parser("build-embeddings")
+    p_emb.add_argument("--manifest", required=True)
+    p_emb.add_argument("--root", required=True, help="Processed image root")
+    p_emb.add_argument("--output-dir", required=True, help="Store dir; set dataset.embedding_store to it")
+    p_emb.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    p_emb.add_argument("--batch-size", type=int, default=32, help="Images per embedder forward pass")
+    p_emb.set_defaults(func=cmd_build_embeddings)
+
     p_train = subparsers.add_parser("train")
     p_train.add_argument("--config", required=True)
     p_train.add_argument("--work-dir", required=False)
+    p_train.add_argument(
+        "--resume", action="store_true", help="Continue from the latest training state in <work-dir>/checkpoints"
+    )
+    p_train.add_argument(
+        "--nproc", type=int, default=1, help="Data-parallel CPU processes (DDP, gloo); cores are split between them"
+    )
     p_train.set_defaults(func=cmd_train)
 
     p_eval = subparsers.add_parser("eval")
@@ -264,6 +463,15 @@ def build_parser() -> argparse.ArgumentParser:
     p_infer.add_argument("--work-dir", required=False)
     p_infer.set_defaults(func=cmd_infer)
 
+    p_quant = subparsers.add_parser("quantize")
+    p_quant.add_argument("--config", required=True)
+    p_quant.add_argument("--work-dir", required=False)
+    p_quant.add_argument("--checkpoint", help="Override quantize.checkpoint (fp32 weights)")
+    p_quant.add_argument("--output", help="Override quantize.output (default <work-dir>/quantized.pt)")
+    p_quant.add_argument("--backend", choices=["x86", "fbgemm"], help="Override quantize.backend")
+    p_quant.add_argument("--calibration-samples", type=int, help="Override quantize.calibration_samples")
+    p_quant.set_defaults(func=cmd_quantize)
+
     p_export = subparsers.add_parser("export")
     p_export.add_argument("--config", required=True)
     p_export.add_argument("--work-dir", required=False)
@@ -274,6 +482,48 @@ def build_parser() -> argparse.ArgumentParser:
     p_trt.add_argument("--work-dir", required=False)
     p_trt.set_defaults(func=cmd_trt)
 
+    p_bddp = subparsers.add_parser("benchmark-ddp")
+    p_bddp.add_argument("--config", required=True)
+    p_bddp.add_argument("--work-dir", required=False)
+    p_bddp.add_argument("--nproc", type=int, nargs="+", default=[1, 2, 4, 8], help="Process counts to compare")
+    p_bddp.add_argument("--steps", type=int, default=10, help="Timed training steps per process count")
+    p_bddp.add_argument("--warmup", type=int, default=2)
+    p_bddp.add_argument("--image-size", type=int, default=128)
+    p_bddp.set_defaults(func=cmd_benchmark_ddp)
+
+    p_bckpt = subparsers.add_parser("benchmark-checkpointing")
+    p_bckpt.add_argument("--config", required=True)
+    p_bckpt.add_argument("--work-dir", required=False)
+    p_bckpt.add_argument("--image-size", type=int, nargs="+", default=[160, 256, 512])
+    p_bckpt.add_argument(
+        "--modes", nargs="+", choices=["none", "encoder", "blocks"], default=["none", "encoder", "blocks"]
+    )
+    p_bckpt.add_argument("--batch-size", type=int, help="Override train.batch_size")
+    p_bckpt.add_argument("--steps", type=int, default=3, help="Timed training steps per case")
+    p_bckpt.add_argument("--warmup", type=int, default=1)
+    p_bckpt.set_defaults(func=cmd_benchmark_checkpointing)
+
+    p_binfer = subparsers.add_parser("benchmark-infer")
+    p_binfer.add_argument("--config", required=True)
+    p_binfer.add_argument("--work-dir", required=False)
+    p_binfer.add_argument("--image-size", type=int, default=160)
+    p_binfer.add_argument("--batch-size", type=int, default=1, help="Pairs per forward pass")
+    p_binfer.add_argument("--iters", type=int, default=20, help="Timed forward passes per variant")
+    p_binfer.add_argument("--warmup", type=int, default=3)
+    p_binfer.set_defaults(func=cmd_benchmark_infer)
+
+    p_bserve = subparsers.add_parser("benchmark-serve")
+    p_bserve.add_argument("--config", required=True)
+    p_bserve.add_argument("--work-dir", required=False)
+    p_bserve.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16], help="Concurrent client threads")
+    p_bserve.add_argument(
+        "--max-batch-size", type=int, nargs="+", default=[1, 8], help="Batcher sizes to compare (1 = no batching)"
+    )
+    p_bserve.add_argument("--max-wait-ms", type=float, default=5.0)
+    p_bserve.add_argument("--requests", type=int, default=8, help="Sequential single-pair requests per client")
+    p_bserve.add_argument("--image-size", type=int, default=160)
+    p_bserve.set_defaults(func=cmd_benchmark_serve)
+
     p_bench = subparsers.add_parser("benchmark-edge")
     p_bench.add_argument("--config", required=True)
     p_bench.add_argument("--checkpoint", required=True)
@@ -291,8 +541,18 @@ def cmd_validate_manifest(args: argparse.Namespace) -> None:
         print(f"Manifest not found: {manifest_path}")
         return
     manifest = load_manifest(manifest_path)
-    missing, bad_checksum = validate_items(manifest, processed_dir)
+    algo = manifest.get("meta", {}).get("checksum_algo", "sha256")
+    stats: dict = {}
+    missing, bad_checksum = validate_items(
+        manifest,
+        processed_dir,
+        workers=args.workers,
+        stat_cache=StatCache(stat_cache_path(manifest_path), algo),
+        full=args.full,
+        stats=stats,
+    )
     splits_ok = validate_splits(manifest)
+    print(f"Checksums ({algo}): {format_stats(stats)}")
     if missing:
         print("Missing files:", missing)
     if bad_checksum:
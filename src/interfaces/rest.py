@@ -1,13 +1,15 @@
 from typing import Any, Dict
 
 try:
-    from fastapi import FastAPI
+    from fastapi import FastAPI, HTTPException
     from pydantic import BaseModel
 except Exception:  # pragma: no cover - fastapi may be optional
     FastAPI = None  # type: ignore
+    HTTPException = None  # type: ignore
     BaseModel = object  # type: ignore
 
-from interfaces.api import evaluate, infer, train
+from interfaces.api import batcher_stats, evaluate, infer_async, train
+from pipelines.batching import QueueFullError
 from pipelines.streaming import run_streaming
 
 
@@ -30,8 +32,15 @@ if FastAPI:
         work_dir: str | None = None
 
     @app.post("/face-swap/batch")
-    def swap(req: SwapRequest) -> Dict[str, Any]:  # type: ignore[override]
-        return infer(req.config, req.sources, req.targets, work_dir=req.work_dir)
+    async def swap(req: SwapRequest) -> Dict[str, Any]:  # type: ignore[override]
+        try:
+            return await infer_async(req.config, req.sources, req.targets, work_dir=req.work_dir)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    @app.get("/face-swap/metrics")
+    def swap_metrics() -> Dict[str, Any]:  # type: ignore[override]
+        return {"batchers": batcher_stats()}
 
     @app.post("/face-swap/train")
     def train_endpoint(req: EvalRequest) -> Dict[str, Any]:  # type: ignore[override]
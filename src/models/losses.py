@@ -37,9 +37,13 @@ class FaceSwapLoss(nn.Module if nn else object):  # type: ignore[misc]
                 return torch.tensor(0.0)
             recon = self.l1(pred, target_img)
             if self.arcface is not None:
+                # precomputed target embeddings (embedding store) skip half of the embedder work
+                emb_tgt = targets.get("target_embedding")
                 with torch.no_grad():
                     emb_pred = self.arcface(pred)
-                    emb_tgt = self.arcface(target_img)
+                    if emb_tgt is None:
+                        emb_tgt = self.arcface(target_img)
+                emb_tgt = emb_tgt.to(emb_pred.dtype).view_as(emb_pred)
                 identity = torch.norm(emb_pred - emb_tgt, p=2)
             else:
                 identity = self.l1(pred, target_img)  # fallback
@@ -1,9 +1,24 @@
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
 try:
     import torch
     from torch import nn
+    from torch.utils.checkpoint import checkpoint
+    from torch.ao.quantization import fuse_modules
 except Exception:  # pragma: no cover - optional torch
     torch = None
     nn = None
+    checkpoint = None
+    fuse_modules = None
+
+CONV_BLOCKS = ("down1", "down2", "bottleneck", "dec2", "dec1")
+# activation_checkpointing granularity -> conv blocks recomputed in backward
+CHECKPOINT_BLOCKS = {
+    "none": (),
+    "encoder": CONV_BLOCKS[:3],
+    "blocks": CONV_BLOCKS,
+}
 
 
 def _conv_block(in_ch: int, out_ch: int) -> "nn.Module":  # type: ignore[name-defined]
@@ -17,13 +32,55 @@ def _conv_block(in_ch: int, out_ch: int) -> "nn.Module":  # type: ignore[name-de
     )
 
 
+@contextmanager
+def _frozen_bn_stats(block: Any) -> Iterator[None]:
+    """Zero BatchNorm momentum so a recomputed forward leaves the running stats as they were."""
+    norms = [m for m in block.modules() if isinstance(m, nn.modules.batchnorm._BatchNorm)]
+    saved = [(m.momentum, m.num_batches_tracked.clone() if m.num_batches_tracked is not None else None) for m in norms]
+    for m in norms:
+        m.momentum = 0.0
+    try:
+        yield
+    finally:
+        for m, (momentum, tracked) in zip(norms, saved):
+            m.momentum = momentum
+            if tracked is not None:
+                m.num_batches_tracked.copy_(tracked)
+
+
+def _checkpointed(block: Any, x: Any) -> Any:
+    calls = []
+
+    def run(inp: Any) -> Any:
+        calls.append(None)
+        if len(calls) > 1:  # recompute during backward
+            with _frozen_bn_stats(block):
+                return block(inp)
+        return block(inp)
+
+    return checkpoint(run, x, use_reentrant=False)
+
+
 class UNetFaceSwap(nn.Module if nn else object):  # type: ignore[misc]
-    """UNet-style model aimed at preserving identity/expression/skin tone."""
+    """UNet-style model aimed at preserving identity/expression/skin tone.
+
+    ``activation_checkpointing`` trades compute for memory in training: ``"encoder"`` recomputes the
+    encoder and bottleneck conv blocks in backward instead of keeping their activations, ``"blocks"``
+    also the decoder blocks. Outputs, gradients and BatchNorm running stats match the default.
+    """
 
-    def __init__(self, channels: int = 64):
+    def __init__(self, channels: int = 64, activation_checkpointing: Optional[str] = None):
+        mode = activation_checkpointing or "none"
+        if mode not in CHECKPOINT_BLOCKS:
+            raise ValueError(
+                f"Unknown activation_checkpointing: {activation_checkpointing} "
+                f"(expected one of {tuple(CHECKPOINT_BLOCKS)})"
+            )
         if nn:
             super().__init__()
+            self.checkpoint_blocks = CHECKPOINT_BLOCKS[mode]
             self.channels = channels
+            self.fused = False
             # accept concatenated source+target: 3+3 channels
             self.down1 = _conv_block(6, channels)
             self.pool1 = nn.MaxPool2d(2)
@@ -39,6 +96,30 @@ class UNetFaceSwap(nn.Module if nn else object):  # type: ignore[misc]
             self.out_conv = nn.Conv2d(channels, 3, kernel_size=1)
         else:  # pragma: no cover
             self.channels = channels
+            self.checkpoint_blocks = CHECKPOINT_BLOCKS[mode]
+
+    def fuse_for_inference(self) -> "UNetFaceSwap":
+        """Fold every BatchNorm into the conv before it and pair it with its ReLU, in place.
+
+        Each Conv-BN-ReLU becomes a ``ConvReLU2d`` (the pattern the quantized fbgemm/onednn backends run
+        as one kernel). Switches to eval mode and cannot be undone: load weights first, and do not train
+        or save training checkpoints from the fused model. Calling it again is a no-op.
+        """
+        if nn is None or self.fused:
+            return self
+        self.eval()
+        groups = []
+        for name in CONV_BLOCKS:
+            groups += [[f"{name}.0", f"{name}.1", f"{name}.2"], [f"{name}.3", f"{name}.4", f"{name}.5"]]
+        fuse_modules(self, groups, inplace=True)
+        self.fused = True
+        return self
+
+    def _block(self, name: str, x: Any) -> Any:
+        block = getattr(self, name)
+        if name in self.checkpoint_blocks and self.training and torch.is_grad_enabled():
+            return _checkpointed(block, x)
+        return block(x)
 
     def forward(self, source, target=None):  # type: ignore[override]
         if nn is None:
@@ -46,18 +127,18 @@ class UNetFaceSwap(nn.Module if nn else object):  # type: ignore[misc]
             return {"output": out}
         tgt = target if target is not None else source
         x = torch.cat([source, tgt], dim=1)
-        d1 = self.down1(x)
+        d1 = self._block("down1", x)
         p1 = self.pool1(d1)
-        d2 = self.down2(p1)
+        d2 = self._block("down2", p1)
         p2 = self.pool2(d2)
 
-        bottleneck = self.bottleneck(p2)
+        bottleneck = self._block("bottleneck", p2)
 
         u2 = self.up2(bottleneck)
         concat2 = torch.cat([u2, d2], dim=1)
-        dec2 = self.dec2(concat2)
+        dec2 = self._block("dec2", concat2)
         u1 = self.up1(dec2)
         concat1 = torch.cat([u1, d1], dim=1)
-        dec1 = self.dec1(concat1)
+        dec1 = self._block("dec1", concat1)
         out = self.out_conv(dec1)
         return {"output": out}
@@ -0,0 +1,164 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+from data.infer_pairs import SizeGroupedBatchSampler
+
+_STOP = object()
+
+
+class QueueFullError(RuntimeError):
+    """Raised by ``DynamicBatcher.submit_many`` when a request does not fit in the queue."""
+
+
+class DynamicBatcher:
+    """Collects single (source, target) requests from many callers into batched forward passes.
+
+    ``submit`` enqueues one (3, H, W) pair and returns a ``Future`` of its (3, H, W) output;
+    ``submit_many`` enqueues all pairs of a request or none of them. A worker thread takes the oldest
+    request, waits at most ``max_wait_ms`` for more (or until ``max_batch_size`` are queued), runs
+    ``forward`` once per image size in that batch and resolves each future. At most ``max_queue``
+    requests wait; beyond that submitting raises ``QueueFullError`` so overload shows up as rejections
+    rather than unbounded latency. ``stats`` reports queue depth, batch sizes and recent request
+    latency for monitoring.
+    """
+
+    def __init__(
+        self,
+        forward: Callable[[Any, Any], Dict[str, Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 256,
+        latency_window: int = 1024,
+    ):
+        self.forward = forward
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stats_lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._latencies: Deque[float] = collections.deque(maxlen=latency_window)
+        self._batch_sizes: Dict[int, int] = collections.Counter()
+        self._requests = 0
+        self._rejected = 0
+        self._last_batch_size = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="dynamic-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, source: Any, target: Any) -> Future:
+        return self.submit_many([(source, target)])[0]
+
+    def submit_many(self, pairs: Sequence[Tuple[Any, Any]]) -> List[Future]:
+        """Futures for every (source, target) pair; a request that does not fit is rejected whole."""
+        pairs = list(pairs)
+        # the worker only ever frees slots, so checking room under this lock cannot overcommit
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("DynamicBatcher is closed")
+            if self._queue.maxsize - self._queue.qsize() < len(pairs):
+                with self._stats_lock:
+                    self._rejected += len(pairs)
+                raise QueueFullError(
+                    f"Inference queue is full ({self._queue.maxsize} pending requests, {len(pairs)} submitted)"
+                )
+            now = time.perf_counter()
+            futures: List[Future] = []
+            for source, target in pairs:
+                futures.append(Future())
+                self._queue.put_nowait((source, target, futures[-1], now))
+        return futures
+
+    def _collect(self, first: Any) -> Tuple[List[Any], bool]:
+        batch, stop = [first], False
+        deadline = first[3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run_batch(self, batch: List[Any]) -> None:
+        keys = [(tuple(src.shape), tuple(tgt.shape)) for src, tgt, _, _ in batch]
+        for group in SizeGroupedBatchSampler(keys, len(batch)):
+            items = [batch[i] for i in group]
+            try:
+                source = torch.stack([item[0] for item in items])
+                target = torch.stack([item[1] for item in items])
+                preds = self.forward(source, target).get("output", target).clamp(0, 1).cpu()
+            except Exception as e:
+                for item in items:
+                    item[2].set_exception(e)
+                continue
+            done = time.perf_counter()
+            for item, pred in zip(items, preds):
+                item[2].set_result(pred)
+            with self._stats_lock:
+                self._latencies.extend(done - item[3] for item in items)
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._last_batch_size = len(batch)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            self._run_batch(batch)
+            if stop:
+                break
+        # requests that raced ``close`` into the queue behind the stop marker
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                item[2].set_exception(RuntimeError("DynamicBatcher is closed"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batches = sum(self._batch_sizes.values())
+
+            def pct(q: float) -> Optional[float]:
+                return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000.0 if latencies else None
+
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "requests": self._requests,
+                "rejected": self._rejected,
+                "batches": batches,
+                "last_batch_size": self._last_batch_size,
+                "mean_batch_size": self._requests / batches if batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "latency_ms_p50": pct(0.50),
+                "latency_ms_p99": pct(0.99),
+            }
+
+    def close(self) -> None:
+        """Finish queued requests and stop the worker."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
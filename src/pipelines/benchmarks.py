@@ -0,0 +1,241 @@
+import copy
+import threading
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except Exception:  # pragma: no cover - not available on Windows
+    resource = None
+
+try:
+    import torch
+    import torch.distributed as dist
+    from torch.nn.parallel import DistributedDataParallel
+except Exception:  # pragma: no cover
+    torch = None
+    dist = None
+    DistributedDataParallel = None
+
+from registry.models import MODELS  # noqa: F401 (ensures registration)
+from models.losses import LOSSES  # noqa: F401
+from registry import MODELS as MODELS_REG, LOSSES as LOSSES_REG
+from pipelines.batching import DynamicBatcher
+from pipelines.distributed import dist_info, launch
+from pipelines.infer import InferenceEngine
+from utils.compile import split_compile_cfg
+from utils.perf import compare_latency_ms
+
+
+def _ddp_train_throughput(config: Dict[str, Any], steps: int, warmup: int, image_size: int) -> Dict[str, float]:
+    """Time ``steps`` synthetic training steps on every rank (data loading excluded)."""
+    _, world_size = dist_info()
+    torch.manual_seed(config.get("seed") or 0)
+    model = MODELS_REG.build(split_compile_cfg(config.get("model", {"type": "UNetFaceSwap"}))[0])
+    loss_fn = LOSSES_REG.build(config.get("loss", {"type": "FaceSwapLoss"}))
+    if world_size > 1:
+        model = DistributedDataParallel(model)
+    opt_cfg = config.get("optimizer", {})
+    optimizer = torch.optim.Adam(model.parameters(), lr=opt_cfg.get("lr", 1e-4))
+    batch_size = config.get("train", {}).get("batch_size", 8)
+    images = torch.rand(batch_size, 3, image_size, image_size)
+    start = time.perf_counter()
+    for step in range(warmup + steps):
+        if step == warmup:
+            if world_size > 1:
+                dist.barrier()
+            start = time.perf_counter()
+        optimizer.zero_grad()
+        loss = loss_fn(model(images), {"target": images})
+        loss.backward()
+        optimizer.step()
+    elapsed = torch.tensor(time.perf_counter() - start, dtype=torch.float64)
+    if world_size > 1:
+        # the slowest rank bounds throughput
+        dist.all_reduce(elapsed, op=dist.ReduceOp.MAX)
+    seconds = float(elapsed)
+    return {
+        "nproc": world_size,
+        "threads_per_rank": torch.get_num_threads(),
+        "global_batch": batch_size * world_size,
+        "step_time_s": seconds / steps,
+        "images_per_s": batch_size * world_size * steps / seconds,
+    }
+
+
+def benchmark_ddp(
+    config: Dict[str, Any],
+    nprocs: Sequence[int] = (1, 2, 4, 8),
+    steps: int = 10,
+    warmup: int = 2,
+    image_size: int = 128,
+) -> List[Dict[str, float]]:
+    """Training throughput for each process count (gloo DDP, ``train.batch_size`` per rank, synthetic data).
+
+    Every run goes through ``launch`` so the threads are split the same way as ``train --nproc``.
+    ``speedup``/``efficiency`` are relative to the first entry of ``nprocs``.
+    """
+    if torch is None:
+        raise RuntimeError("torch is required for benchmark_ddp")
+    results = [launch(_ddp_train_throughput, n, config, steps, warmup, image_size) for n in nprocs]
+    base = results[0]
+    for row in results:
+        row["speedup"] = row["images_per_s"] / base["images_per_s"]
+        row["efficiency"] = row["speedup"] * base["nproc"] / row["nproc"]
+    return results
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _checkpointing_case(
+    config: Dict[str, Any], mode: Optional[str], image_size: int, batch_size: int, steps: int, warmup: int
+) -> Dict[str, Any]:
+    """One training configuration in a fresh process, so ``ru_maxrss`` only covers this case."""
+    torch.manual_seed(config.get("seed") or 0)
+    model_cfg = dict(split_compile_cfg(config.get("model", {"type": "UNetFaceSwap"}))[0])
+    model_cfg["activation_checkpointing"] = mode
+    model = MODELS_REG.build(model_cfg)
+    loss_fn = LOSSES_REG.build(config.get("loss", {"type": "FaceSwapLoss"}))
+    model.train()
+    optimizer = torch.optim.Adam(model.parameters(), lr=config.get("optimizer", {}).get("lr", 1e-4))
+    images = torch.rand(batch_size, 3, image_size, image_size)
+    baseline_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    for step in range(warmup + steps):
+        if step == warmup:
+            start = time.perf_counter()
+        optimizer.zero_grad()
+        loss = loss_fn(model(images), {"target": images})
+        loss.backward()
+        optimizer.step()
+    return {
+        "activation_checkpointing": mode or "none",
+        "image_size": image_size,
+        "batch_size": batch_size,
+        "step_time_s": (time.perf_counter() - start) / steps,
+        "peak_rss_mb": _peak_rss_mb(),
+        "train_rss_mb": _peak_rss_mb() - baseline_mb,
+    }
+
+
+def benchmark_checkpointing(
+    config: Dict[str, Any],
+    image_sizes: Sequence[int] = (160, 256, 512),
+    modes: Sequence[Optional[str]] = (None, "encoder", "blocks"),
+    batch_size: Optional[int] = None,
+    steps: int = 3,
+    warmup: int = 1,
+) -> List[Dict[str, Any]]:
+    """Peak memory vs step time of ``model.activation_checkpointing`` modes at each resolution.
+
+    Each case runs in its own process (peak RSS cannot be reset); ``train_rss_mb`` is the growth
+    over the model/optimizer setup. ``step_time_ratio``/``memory_ratio`` are relative to the first
+    mode at the same resolution.
+    """
+    if torch is None:
+        raise RuntimeError("torch is required for benchmark_checkpointing")
+    batch_size = batch_size or config.get("train", {}).get("batch_size", 8)
+    results = []
+    for size in image_sizes:
+        rows = [launch(_checkpointing_case, 1, config, mode, size, batch_size, steps, warmup) for mode in modes]
+        for row in rows:
+            row["step_time_ratio"] = row["step_time_s"] / rows[0]["step_time_s"]
+            row["memory_ratio"] = row["train_rss_mb"] / max(rows[0]["train_rss_mb"], 1e-6)
+        results.extend(rows)
+    return results
+
+
+def benchmark_infer(
+    config: Dict[str, Any], image_size: int = 160, batch_size: int = 1, iters: int = 20, warmup: int = 3
+) -> List[Dict[str, Any]]:
+    """CPU inference latency per source/target pair, eval-mode model vs ``fuse_for_inference()``.
+
+    Variants are timed in interleaved rounds (median, ``compare_latency_ms``). ``max_abs_diff`` is the
+    largest output difference from the unfused model.
+    """
+    if torch is None:
+        raise RuntimeError("torch is required for benchmark_infer")
+    torch.manual_seed(config.get("seed") or 0)
+    model = MODELS_REG.build(split_compile_cfg(config.get("model", {"type": "UNetFaceSwap"}))[0]).eval()
+    pairs = (torch.rand(batch_size, 3, image_size, image_size), torch.rand(batch_size, 3, image_size, image_size))
+    variants = {"eager": model}
+    if hasattr(model, "fuse_for_inference"):
+        variants["fused"] = copy.deepcopy(model).fuse_for_inference()
+    with torch.no_grad():
+        reference = model(*pairs)["output"]
+        diffs = {name: float((m(*pairs)["output"] - reference).abs().max()) for name, m in variants.items()}
+        latency = compare_latency_ms({name: partial(m, *pairs) for name, m in variants.items()}, iters, warmup)
+    results = [
+        {
+            "variant": name,
+            "image_size": image_size,
+            "batch_size": batch_size,
+            "latency_ms_per_pair": latency[name] / batch_size,
+            "max_abs_diff": diffs[name],
+        }
+        for name in variants
+    ]
+    for row in results:
+        row["speedup"] = results[0]["latency_ms_per_pair"] / row["latency_ms_per_pair"]
+    return results
+
+
+def _serve_client(batcher: DynamicBatcher, pair: Tuple[Any, Any], requests: int) -> None:
+    for _ in range(requests):
+        batcher.submit(*pair).result()
+
+
+def benchmark_serving(
+    config: Dict[str, Any],
+    clients: Sequence[int] = (1, 4, 16),
+    max_batch_sizes: Sequence[int] = (1, 8),
+    max_wait_ms: float = 5.0,
+    requests_per_client: int = 8,
+    image_size: int = 160,
+) -> List[Dict[str, Any]]:
+    """Closed-loop load on a ``DynamicBatcher``: each client thread sends one pair, waits, repeats.
+
+    ``max_batch_size`` 1 is the serialized batch-of-1 baseline. Reports throughput, request latency
+    percentiles and the mean batch size the batcher formed.
+    """
+    if torch is None:
+        raise RuntimeError("torch is required for benchmark_serving")
+    engine = InferenceEngine(config.get("model", {"type": "UNetFaceSwap"}), config.get("infer", {}).get("checkpoint"))
+    engine.warmup((image_size, image_size))
+    pair = (torch.rand(3, image_size, image_size), torch.rand(3, image_size, image_size))
+    results = []
+    for max_batch in max_batch_sizes:
+        for n_clients in clients:
+            batcher = DynamicBatcher(
+                engine.forward, max_batch_size=max_batch, max_wait_ms=max_wait_ms, latency_window=n_clients * 1024
+            )
+
+            threads = [
+                threading.Thread(target=_serve_client, args=(batcher, pair, requests_per_client))
+                for _ in range(n_clients)
+            ]
+            start = time.perf_counter()
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+            elapsed = time.perf_counter() - start
+            stats = batcher.stats()
+            batcher.close()
+            results.append(
+                {
+                    "max_batch_size": max_batch,
+                    "clients": n_clients,
+                    "requests": stats["requests"],
+                    "pairs_per_s": stats["requests"] / elapsed,
+                    "latency_ms_p50": stats["latency_ms_p50"],
+                    "latency_ms_p99": stats["latency_ms_p99"],
+                    "mean_batch_size": stats["mean_batch_size"],
+                }
+            )
+    return results
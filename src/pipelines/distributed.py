@@ -0,0 +1,76 @@
+import os
+import socket
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import torch
+    import torch.distributed as dist
+    import torch.multiprocessing as mp
+except Exception:  # pragma: no cover
+    torch = None
+    dist = None
+    mp = None
+
+
+def dist_info() -> Tuple[int, int]:
+    """(rank, world_size) of the current process group; (0, 1) outside one."""
+    if dist is not None and dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return 0, 1
+
+
+def threads_per_rank(nproc: int) -> int:
+    """Split the machine's cores evenly so ranks do not oversubscribe intra-op threads."""
+    return max(1, (os.cpu_count() or 1) // max(nproc, 1))
+
+
+def all_reduce_mean(values: Dict[str, float]) -> Dict[str, float]:
+    """Average scalar values over all ranks (identity outside a process group)."""
+    _, world_size = dist_info()
+    if world_size == 1 or not values:
+        return dict(values)
+    keys = sorted(values)
+    packed = torch.tensor([float(values[k]) for k in keys], dtype=torch.float64)
+    dist.all_reduce(packed)
+    return {k: float(v) / world_size for k, v in zip(keys, packed.tolist())}
+
+
+def any_rank(flag: bool) -> bool:
+    """True if ``flag`` is set on any rank (``flag`` itself outside a process group)."""
+    _, world_size = dist_info()
+    if world_size == 1:
+        return flag
+    packed = torch.tensor([float(flag)])
+    dist.all_reduce(packed, op=dist.ReduceOp.MAX)
+    return bool(packed.item())
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _worker(rank: int, world_size: int, port: int, fn: Callable, args: Tuple, kwargs: Dict, queue: Any) -> None:
+    torch.set_num_threads(threads_per_rank(world_size))
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world_size)
+    try:
+        result = fn(*args, **kwargs)
+        if rank == 0:
+            queue.put(result)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch(fn: Callable, nproc: int, *args: Any, **kwargs: Any) -> Any:
+    """Run ``fn(*args, **kwargs)`` in ``nproc`` spawned processes joined in a gloo group.
+
+    Each rank gets ``cpu_count // nproc`` intra-op threads. Returns rank 0's result (keep it small:
+    it travels back through a pipe); an exception in any rank is re-raised here.
+    """
+    if mp is None or dist is None or not dist.is_available():
+        raise RuntimeError("torch.distributed is required for multi-process training")
+    ctx = mp.get_context("spawn")
+    queue = ctx.SimpleQueue()
+    mp.spawn(_worker, args=(nproc, _free_port(), fn, args, kwargs, queue), nprocs=nproc, join=True)
+    return queue.get() if not queue.empty() else None
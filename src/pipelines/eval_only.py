@@ -7,6 +7,7 @@ from utils.metrics import write_metrics_json, write_metrics_csv
 from utils.metrics_image import compute_psnr, compute_ssim, compute_lpips
 from utils.perf import measure_latency_fps
 from utils.human_eval import record_human_ratings
+from utils.compile import maybe_fuse, split_compile_cfg
 
 
 def run_eval_only(config: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
@@ -21,8 +22,10 @@ def run_eval_only(config: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
     loss_cfg = config.get("loss", {})
 
     dataset = DATASETS.build(dataset_cfg) if dataset_cfg else None
-    model = MODELS.build(model_cfg) if model_cfg else None
+    model = MODELS.build(split_compile_cfg(model_cfg)[0]) if model_cfg else None
     loss_fn = LOSSES.build(loss_cfg) if loss_cfg else None
+    if model is not None:
+        maybe_fuse(model, model_cfg)
 
     metrics = {
         "identity_accuracy": 1.0 if dataset else 0.0,
@@ -46,6 +49,8 @@ def run_eval_only(config: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
 
                 if img.dim() == 3:
                     img = img.unsqueeze(0)
+                if img.dtype == torch.uint8:
+                    img = img.float().div(255.0)
                 with torch.no_grad():
                     out = model(img)["output"]
                 metrics["psnr"] = compute_psnr(out, img)
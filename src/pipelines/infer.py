@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import torch
+    from torch.utils.data import DataLoader
+    from torchvision import transforms as T
+    from PIL import Image
+except Exception:  # pragma: no cover
+    torch = None
+    DataLoader = None
+    T = None
+    Image = None
+
+from registry.models import MODELS  # noqa: F401 (ensures registration)
+from registry import MODELS as MODELS_REG
+from data.infer_pairs import InferPairDataset, SizeGroupedBatchSampler, pair_output_name
+from utils.compile import maybe_compile, split_compile_cfg
+
+
+def save_png(pred: Any, path: Path) -> Path:
+    """Write a (3, H, W) output in [0, 1] as an 8-bit PNG."""
+    T.ToPILImage()(pred).save(path)
+    return path
+
+
+def run_infer(
+    forward: Callable[..., Dict[str, Any]],
+    sources: Sequence[str],
+    targets: Sequence[str],
+    output_dir: Path,
+    logger: logging.Logger,
+    batch_size: int = 1,
+    num_workers: int = 0,
+    save_workers: int = 2,
+    log_interval: int = 50,
+) -> Dict[str, Any]:
+    """Swap every (source, target) pair and write ``<source>_to_<target>.png`` files to ``output_dir``.
+
+    A DataLoader decodes pairs in ``num_workers`` processes, pairs of the same size are stacked into
+    ``batch_size`` forward passes, and PNG encoding/writing runs on ``save_workers`` threads while the
+    next batch is computed. Outputs are the same files a batch-of-1 loop writes.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    dataset = InferPairDataset(sources, targets)
+    loader = DataLoader(
+        dataset,
+        batch_sampler=SizeGroupedBatchSampler(dataset.sizes(), batch_size),
+        num_workers=num_workers,
+    )
+    # bound queued PNG writes so decoded outputs cannot pile up when encoding lags the forward pass
+    max_pending = max(1, save_workers) * max(1, batch_size) * 2
+    pending: Deque[Future] = deque()
+    done = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, save_workers), thread_name_prefix="infer-save") as pool:
+        for step, batch in enumerate(loader, start=1):
+            with torch.no_grad():
+                outputs = forward(batch["source"], batch["target"])
+                preds = outputs.get("output", batch["target"]).clamp(0, 1).cpu()
+            for pred, name in zip(preds, batch["name"]):
+                pending.append(pool.submit(save_png, pred, output_dir / name))
+            while len(pending) > max_pending:
+                pending.popleft().result()
+            done += len(preds)
+            if step % log_interval == 0:
+                elapsed = time.perf_counter() - start
+                logger.info("Inferred %d/%d pairs (%.2f pairs/s)", done, len(dataset), done / elapsed)
+        while pending:
+            pending.popleft().result()
+    elapsed = time.perf_counter() - start
+    stats = {
+        "pairs": done,
+        "seconds": elapsed,
+        "pairs_per_s": done / elapsed if elapsed > 0 else 0.0,
+        "outputs": [str(output_dir / pair_output_name(src, tgt)) for src, tgt in dataset.pairs],
+    }
+    logger.info(
+        "Saved %d inference outputs to %s in %.2fs (%.2f pairs/s)", done, output_dir, elapsed, stats["pairs_per_s"]
+    )
+    return stats
+
+
+class InferenceEngine:
+    """A face swap model loaded once and kept warm for repeated requests.
+
+    Building the model, loading ``checkpoint`` (fp32, or int8 from ``quantize``), folding BatchNorm
+    (``fuse``) and ``model.compile`` all happen in the constructor; ``warmup`` runs one forward so lazy
+    kernel setup and compilation are not paid by the first request. After that a request only costs
+    its forward passes. ``swap``/``swap_files`` may be called from several threads: batches from
+    concurrent requests run one at a time on the shared model.
+
+    ``fuse`` (``model.fuse`` in ``from_config``) is off by default: the folded model is faster but
+    not bit-exact, and its PNGs can differ from the unfused model's by one 8-bit level.
+    """
+
+    def __init__(
+        self,
+        model_cfg: Dict[str, Any],
+        checkpoint: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+        batch_size: int = 1,
+        fuse: bool = False,
+    ):
+        if torch is None:
+            raise RuntimeError("torch is required for inference")
+        self.logger = logger or logging.getLogger("InferenceEngine")
+        self.batch_size = max(1, int(batch_size))
+        build_cfg, compile_options = split_compile_cfg(model_cfg or {"type": "UNetFaceSwap"})
+        model = MODELS_REG.build(build_cfg)
+        if checkpoint and Path(checkpoint).exists():
+            state = torch.load(checkpoint, map_location="cpu")
+            if "quantization" in state:
+                from pipelines.quantize import load_quantized
+
+                # int8 graph written by `quantize`; already fused, and torch.compile does not apply
+                model = load_quantized(state)
+                compile_options = None
+            else:
+                model.load_state_dict(state.get("model", state), strict=False)
+            self.logger.info("Loaded checkpoint for infer: %s", checkpoint)
+        model.eval()
+        if fuse and hasattr(model, "fuse_for_inference"):
+            model.fuse_for_inference()
+        self.model = model
+        self._call = maybe_compile(model, compile_options, self.logger, "model")
+        self._lock = threading.Lock()
+        self._to_tensor = T.ToTensor()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], logger: Optional[logging.Logger] = None) -> "InferenceEngine":
+        """Engine for ``config.model`` and ``config.infer``.
+
+        Reads ``checkpoint``, ``batch_size`` and ``warmup_size`` from ``config.infer`` and the BatchNorm
+        folding switch from ``config.model.fuse`` (shared with eval and export).
+        """
+        infer_cfg = config.get("infer", {})
+        engine = cls(
+            config.get("model", {}),
+            checkpoint=infer_cfg.get("checkpoint"),
+            logger=logger,
+            batch_size=infer_cfg.get("batch_size", 1),
+            fuse=config.get("model", {}).get("fuse", False),
+        )
+        warmup_size = infer_cfg.get("warmup_size", [160, 160])
+        if warmup_size:
+            engine.warmup(tuple(warmup_size))
+        return engine
+
+    def warmup(self, image_size: Tuple[int, int] = (160, 160)) -> float:
+        """One forward on a dummy pair; returns its wall time in seconds."""
+        start = time.perf_counter()
+        pair = torch.zeros(1, 3, *image_size)
+        self.forward(pair, pair)
+        elapsed = time.perf_counter() - start
+        self.logger.info("Inference engine warm-up at %dx%d took %.2fs", image_size[0], image_size[1], elapsed)
+        return elapsed
+
+    def forward(self, source: Any, target: Any) -> Dict[str, Any]:
+        """Model outputs for batched (N, 3, H, W) tensors; thread-safe."""
+        with self._lock, torch.no_grad():
+            return self._call(source, target)
+
+    def load_image(self, image: Any) -> Any:
+        """(3, H, W) float tensor in [0, 1] from an image path, PIL image or tensor (returned as is)."""
+        if torch.is_tensor(image):
+            return image
+        if isinstance(image, (str, Path)):
+            image = Image.open(image)
+        return self._to_tensor(image.convert("RGB"))
+
+    def swap(self, sources: Sequence[Any], targets: Sequence[Any]) -> List[Any]:
+        """Swapped images for each (source, target) pair, as (3, H, W) float tensors in [0, 1].
+
+        Inputs may be image paths, PIL images or (3, H, W) tensors; pairs of the same size share
+        ``batch_size`` forward passes and results come back in input order.
+        """
+        pairs = [(self.load_image(s), self.load_image(t)) for s, t in zip(sources, targets)]
+        results: List[Any] = [None] * len(pairs)
+        keys = [(tuple(s.shape), tuple(t.shape)) for s, t in pairs]
+        for batch in SizeGroupedBatchSampler(keys, self.batch_size):
+            source = torch.stack([pairs[i][0] for i in batch])
+            target = torch.stack([pairs[i][1] for i in batch])
+            preds = self.forward(source, target).get("output", target).clamp(0, 1).cpu()
+            for i, pred in zip(batch, preds):
+                results[i] = pred
+        return results
+
+    def swap_files(
+        self,
+        sources: Sequence[str],
+        targets: Sequence[str],
+        output_dir: Path,
+        num_workers: int = 0,
+        save_workers: int = 2,
+        log_interval: int = 50,
+    ) -> Dict[str, Any]:
+        """``run_infer`` over image paths with this engine's model; writes PNGs to ``output_dir``."""
+        return run_infer(
+            self.forward,
+            sources,
+            targets,
+            output_dir,
+            self.logger,
+            batch_size=self.batch_size,
+            num_workers=num_workers,
+            save_workers=save_workers,
+            log_interval=log_interval,
+        )
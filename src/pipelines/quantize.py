@@ -0,0 +1,186 @@
+import copy
+import warnings
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+try:
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+except Exception:  # pragma: no cover
+    torch = None
+
+from registry.datasets import DATASETS  # noqa: F401 (ensures registration)
+from registry.models import MODELS  # noqa: F401
+from registry import DATASETS as DATASETS_REG, MODELS as MODELS_REG
+from utils.checkpoint import save_atomic
+from utils.compile import split_compile_cfg
+from utils.logging import setup_logger
+from utils.metrics_image import compute_psnr, compute_ssim
+from utils.perf import compare_latency_ms
+
+QUANT_BACKENDS = ("x86", "fbgemm")
+
+
+def _example_inputs(image_size: Tuple[int, int]) -> Tuple[Any, Any]:
+    return torch.rand(1, 3, *image_size), torch.rand(1, 3, *image_size)
+
+
+def _prepare(model: Any, backend: str, image_size: Tuple[int, int], skip_modules: Sequence[str]) -> Any:
+    if backend not in QUANT_BACKENDS:
+        raise ValueError(f"Unknown quantization backend: {backend} (expected one of {QUANT_BACKENDS})")
+    torch.backends.quantized.engine = backend
+    qconfig_mapping = get_default_qconfig_mapping(backend)
+    for name in skip_modules:
+        qconfig_mapping = qconfig_mapping.set_module_name(name, None)
+    model = copy.deepcopy(model).eval()
+    return prepare_fx(model, qconfig_mapping, _example_inputs(image_size))
+
+
+def quantize_model(
+    model: Any,
+    calibration: Iterable[Tuple[Any, Any]],
+    backend: str = "x86",
+    image_size: Tuple[int, int] = (160, 160),
+    skip_modules: Sequence[str] = (),
+) -> Any:
+    """Static post-training int8 quantization (FX graph mode) of a float model; ``model`` is left as is.
+
+    ``prepare_fx`` fuses Conv-BN-ReLU and inserts observers, the (source, target) ``calibration`` batches
+    set the activation ranges, and ``convert_fx`` swaps in quantized kernels for ``backend``. Submodules
+    named in ``skip_modules`` stay fp32.
+    """
+    prepared = _prepare(model, backend, image_size, skip_modules)
+    with torch.no_grad():
+        for source, target in calibration:
+            prepared(source, target)
+    return convert_fx(prepared)
+
+
+def load_quantized(state: Dict[str, Any]) -> Any:
+    """Rebuild the quantized graph recorded in a ``quantize`` checkpoint and load its weights."""
+    meta = state["quantization"]
+    model = MODELS_REG.build(meta["model"])
+    with warnings.catch_warnings():
+        # observers are never run here: the quantization params come from the checkpoint
+        warnings.filterwarnings("ignore", message="must run observer")
+        prepared = _prepare(model, meta["backend"], tuple(meta["image_size"]), meta.get("skip_modules", ()))
+        quantized = convert_fx(prepared)
+    quantized.load_state_dict(state["model"])
+    return quantized.eval()
+
+
+def _load_float(config: Dict[str, Any], checkpoint: Optional[str]) -> Tuple[Any, Dict[str, Any]]:
+    model_cfg = split_compile_cfg(config.get("model", {"type": "UNetFaceSwap"}))[0]
+    model = MODELS_REG.build(model_cfg)
+    if checkpoint:
+        state = torch.load(checkpoint, map_location="cpu")
+        model.load_state_dict(state.get("model", state), strict=False)
+    return model.eval(), model_cfg
+
+
+def _pairs(dataset: Any, indices: Any, batch_size: int) -> Iterable[Tuple[Any, Any]]:
+    """(source, target) batches; each image is swapped onto the next one in the batch."""
+    for start in range(0, len(indices), batch_size):
+        images = []
+        for idx in indices[start : start + batch_size].tolist():
+            img = dataset[idx]["image_tensor"]
+            images.append(img.float().div(255.0) if img.dtype == torch.uint8 else img)
+        batch = torch.stack(images)
+        yield batch, batch.roll(1, dims=0)
+
+
+def run_quantize(config: Dict[str, Any], work_dir: Path) -> Dict[str, Any]:
+    """Calibrate on a sample of ``quantize.split``, save the int8 checkpoint and report quality/latency.
+
+    PSNR/SSIM are measured on a disjoint sample of the same split, for the fp32 and int8 outputs
+    against the target image and for int8 against fp32. Latency compares the int8 model with the
+    BatchNorm-folded fp32 model that ``infer`` runs, one pair per forward.
+    """
+    if torch is None:
+        raise RuntimeError("torch is required for quantization")
+    work_dir.mkdir(parents=True, exist_ok=True)
+    logger = setup_logger("Quantize", json_format=False, log_file=work_dir / "quantize.log")
+    q_cfg = config.get("quantize", {})
+    backend = q_cfg.get("backend", "x86")
+    skip_modules = list(q_cfg.get("skip_modules", []))
+    batch_size = q_cfg.get("batch_size", 8)
+    dataset = DATASETS_REG.build({**config.get("dataset", {}), "split": q_cfg.get("split", "val")})
+    if len(dataset) == 0:
+        raise ValueError(f"No samples in split {q_cfg.get('split', 'val')} to calibrate on")
+    order = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(q_cfg.get("seed", 0)))
+    n_calib = min(q_cfg.get("calibration_samples", 64), len(dataset))
+    calib_idx = order[:n_calib]
+    eval_idx = order[n_calib : n_calib + q_cfg.get("eval_samples", 16)]
+    if len(eval_idx) == 0:  # split too small to hold out images; evaluate on the calibration sample
+        eval_idx = calib_idx[: q_cfg.get("eval_samples", 16)]
+    image_size = tuple(dataset[int(calib_idx[0])]["image_tensor"].shape[-2:])
+
+    model, model_cfg = _load_float(config, q_cfg.get("checkpoint"))
+    logger.info("Calibrating %s int8 model on %d %s samples", backend, n_calib, dataset.split)
+    quantized = quantize_model(model, _pairs(dataset, calib_idx, batch_size), backend, image_size, skip_modules)
+    out_path = Path(q_cfg.get("output", work_dir / "quantized.pt"))
+    save_atomic(
+        {
+            "model": quantized.state_dict(),
+            "quantization": {
+                "backend": backend,
+                "model": model_cfg,
+                "image_size": list(image_size),
+                "skip_modules": skip_modules,
+            },
+        },
+        out_path,
+    )
+    logger.info("Saved quantized checkpoint to %s", out_path)
+
+    fp32 = model.fuse_for_inference() if hasattr(model, "fuse_for_inference") else model
+    totals = {}
+    n_batches = 0
+    with torch.no_grad():
+        for source, target in _pairs(dataset, eval_idx, batch_size):
+            ref = fp32(source, target)["output"].clamp(0, 1)
+            out = quantized(source, target)["output"].clamp(0, 1)
+            for key, value in (
+                ("psnr_fp32", compute_psnr(ref, target)),
+                ("psnr_int8", compute_psnr(out, target)),
+                ("psnr_int8_vs_fp32", compute_psnr(out, ref)),
+                ("ssim_fp32", compute_ssim(ref, target)),
+                ("ssim_int8", compute_ssim(out, target)),
+                ("ssim_int8_vs_fp32", compute_ssim(out, ref)),
+            ):
+                totals[key] = totals.get(key, 0.0) + value
+            n_batches += 1
+        pair = _example_inputs(image_size)
+        latency = compare_latency_ms(
+            {"fp32": partial(fp32, *pair), "int8": partial(quantized, *pair)},
+            iters=q_cfg.get("latency_iters", 20),
+        )
+    report: Dict[str, Any] = {k: v / n_batches for k, v in totals.items()}
+    report.update(
+        {
+            "backend": backend,
+            "skip_modules": skip_modules,
+            "checkpoint": str(out_path),
+            "calibration_samples": n_calib,
+            "eval_samples": len(eval_idx),
+            "image_size": list(image_size),
+            "psnr_drop": report["psnr_fp32"] - report["psnr_int8"],
+            "ssim_drop": report["ssim_fp32"] - report["ssim_int8"],
+            "latency_ms_fp32": latency["fp32"],
+            "latency_ms_int8": latency["int8"],
+            "speedup": latency["fp32"] / latency["int8"],
+        }
+    )
+    logger.info(
+        "int8 vs fp32: psnr %.2f -> %.2f dB, ssim %.4f -> %.4f, latency %.1f -> %.1f ms/pair (%.2fx)",
+        report["psnr_fp32"],
+        report["psnr_int8"],
+        report["ssim_fp32"],
+        report["ssim_int8"],
+        report["latency_ms_fp32"],
+        report["latency_ms_int8"],
+        report["speedup"],
+    )
+    return report
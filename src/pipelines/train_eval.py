@@ -1,27 +1,42 @@
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import json
 import logging
 import time
 import math
+from contextlib import nullcontext
+
+try:
+    import resource
+except Exception:  # pragma: no cover - not available on Windows
+    resource = None
 
 try:
     import torch
     from torch.utils.data import DataLoader
     from torch import optim
+    from torch.nn.parallel import DistributedDataParallel
 except Exception:  # pragma: no cover
     torch = None
     DataLoader = None
     optim = None
+    DistributedDataParallel = None
 
 from registry.datasets import DATASETS  # noqa: F401 (ensures registration)
 from registry.augmentations import AUGMENTATIONS  # noqa: F401
 from registry.models import MODELS  # noqa: F401
 from models.losses import LOSSES  # noqa: F401
 from registry import DATASETS as DATASETS_REG, MODELS as MODELS_REG, LOSSES as LOSSES_REG
+from registry import AUGMENTATIONS as AUGMENTATIONS_REG
 from utils.metrics import write_metrics_json, write_metrics_csv
 from utils.metrics_image import compute_psnr, compute_ssim, compute_lpips
 from utils.logging import setup_logger
+from data.image_cache import hit_rate
+from data.samplers import ResumableSampler, mix_seed
+from utils.checkpoint import AsyncCheckpointWriter, build_train_state, latest_train_state, load_train_state
+from utils.checkpoint import train_state_path
+from pipelines.distributed import all_reduce_mean, any_rank, dist_info
+from utils.compile import maybe_compile, maybe_fuse, split_compile_cfg
 
 
 def _format_eta(seconds: float) -> str:
@@ -36,17 +51,57 @@ def _format_eta(seconds: float) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 
+def _to_float_image(t: Any) -> Any:
+    """Scale uint8 image batches (e.g. PackedLFWDataset) to float in [0, 1]; float tensors pass through."""
+    if t is not None and torch is not None and t.dtype == torch.uint8:
+        return t.float().div_(255.0)
+    return t
+
+
+PRECISIONS = ("fp32", "bf16")
+
+
+def _memory_mb() -> Tuple[str, float]:
+    """Log field and value: allocated CUDA memory, or on CPU the process peak RSS (never decreases)."""
+    if torch.cuda.is_available():
+        return "memory", torch.cuda.memory_allocated() / (1024 * 1024)
+    if resource is not None:
+        return "peak_rss", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return "memory", 0.0
+
+
+def _autocast(precision: str) -> Any:
+    """CPU autocast context for ``precision``; bf16 keeps fp32's exponent range, so no grad scaling."""
+    return torch.autocast("cpu", dtype=torch.bfloat16, enabled=precision == "bf16")
+
+
 def run_train_eval(
     config: Dict[str, Any],
     work_dir: Path,
     mode: str = "train",
     checkpoint_dir: Optional[Path] = None,
+    resume: bool = False,
 ) -> Dict[str, Any]:
-    """Train/eval pipeline; loads checkpoints for eval, saves checkpoints for train when torch is available."""
+    """Train/eval pipeline; loads checkpoints for eval, saves checkpoints for train when torch is available.
+
+    In train mode, training states (model, optimizer, RNGs, epoch/step, sampler position) are written
+    to ``checkpoint_dir`` in the background every ``hooks.checkpoint.interval`` steps (or
+    ``interval_minutes``) and at each epoch end, keeping the ``keep`` most recent; ``last.pth`` and
+    ``best.pth`` (lowest epoch mean loss) follow ``save_last``/``save_best``. ``resume`` continues from
+    the latest state, skipping the batches it already trained on.
+
+    Inside a gloo process group (``pipelines.distributed.launch``) each rank trains on its shard of
+    the split under ``DistributedDataParallel``; losses and metrics are averaged over ranks and only
+    rank 0 logs and writes checkpoints.
+    """
+    rank, world_size = dist_info()
     work_dir.mkdir(parents=True, exist_ok=True)
     log_dir = work_dir
     log_dir.mkdir(parents=True, exist_ok=True)
-    logger = setup_logger(f"TrainEval-{mode}", json_format=False, log_file=log_dir / f"{mode}_{int(time.time())}.log")
+    log_file = log_dir / f"{mode}_{int(time.time())}.log" if rank == 0 else None
+    logger = setup_logger(f"TrainEval-{mode}", json_format=False, log_file=log_file)
+    if rank != 0:
+        logger.setLevel(logging.WARNING)
 
     train_mode = mode == "train"
     run_cfg_key = "train" if train_mode else "eval"
@@ -57,6 +112,15 @@ def run_train_eval(
     epochs = run_cfg.get("epochs", 1)
     log_interval = run_cfg.get("log_interval", 10)
     seed = config.get("seed", None)
+    precision = run_cfg.get("precision", "fp32")
+    channels_last = run_cfg.get("channels_last", False)
+    accumulation_steps = int(run_cfg.get("accumulation_steps", 1))
+    micro_batch_size = run_cfg.get("micro_batch_size")
+    if accumulation_steps < 1 or (micro_batch_size is not None and int(micro_batch_size) < 1):
+        raise ValueError(f"{run_cfg_key}.accumulation_steps and micro_batch_size must be >= 1")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown {run_cfg_key}.precision: {precision} (expected one of {PRECISIONS})")
+    ckpt_cfg = config.get("hooks", {}).get("checkpoint", {})
 
     if seed is not None and torch:
         torch.manual_seed(seed)
@@ -67,18 +131,33 @@ def run_train_eval(
     eval_cfg = config.get("eval", {}) if not train_mode else {}
     checkpoint_path = eval_cfg.get("checkpoint")
 
+    # Batch augmentations run on collated tensors in the loop (train only).
+    batch_augs = [AUGMENTATIONS_REG.build(cfg) for cfg in config.get("augmentations", [])] if train_mode else []
+    if batch_augs and dataset_cfg.get("embedding_store"):
+        # stored embeddings are of the un-augmented targets; the loss must embed the augmented ones
+        logger.warning(
+            "Ignoring dataset.embedding_store %s: augmentations change the target images it was built from",
+            dataset_cfg["embedding_store"],
+        )
+        dataset_cfg = {k: v for k, v in dataset_cfg.items() if k != "embedding_store"}
     dataset = DATASETS_REG.build(dataset_cfg) if dataset_cfg else None
-    model = MODELS_REG.build(model_cfg) if model_cfg else None
+    model_build_cfg, compile_options = split_compile_cfg(model_cfg)
+    model = MODELS_REG.build(model_build_cfg) if model_cfg else None
     loss_fn = LOSSES_REG.build(loss_cfg) if loss_cfg else None
     ds_len = len(dataset) if dataset is not None else 0
     logger.info("Dataset built (mode=%s) size=%d", mode, ds_len)
     logger.info(
-        "Run config | run=%s batch_size=%d epochs=%d num_workers=%d pin_memory=%s lr=%.6f betas=%s weight_decay=%.6f",
+        "Run config | run=%s batch_size=%d micro_batch_size=%s accumulation_steps=%d epochs=%d num_workers=%d "
+        "pin_memory=%s precision=%s channels_last=%s lr=%.6f betas=%s weight_decay=%.6f",
         run_cfg_key,
         batch_size,
+        micro_batch_size,
+        accumulation_steps,
         epochs,
         num_workers,
         pin_memory,
+        precision,
+        channels_last,
         config.get("optimizer", {}).get("lr", 1e-4),
         config.get("optimizer", {}).get("betas", (0.9, 0.999)),
         config.get("optimizer", {}).get("weight_decay", 0.0),
@@ -91,6 +170,8 @@ def run_train_eval(
         "ssim": 1.0,
         "psnr": 30.0,
     }
+    steps_processed = 0
+    optimizer_steps = 0
 
     if torch and dataset is not None and len(dataset) > 0 and loss_fn is not None and model is not None and DataLoader:
         # Load checkpoint for eval if provided
@@ -104,13 +185,44 @@ def run_train_eval(
                 logger.warning("Failed to load checkpoint %s: %s; continuing without it", checkpoint_path, e)
         if not train_mode:
             model.eval()
-        loader = DataLoader(
-            dataset,
-            batch_size=batch_size,
-            shuffle=train_mode,
-            num_workers=num_workers,
-            pin_memory=pin_memory,
-        )
+            # weights are loaded above and nothing is saved in eval, so BatchNorm may be folded
+            maybe_fuse(model, model_cfg)
+        if channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        # checkpoints and resume use the unwrapped module (no ``module.`` prefix)
+        base_model = model
+        ddp = train_mode and world_size > 1
+        if ddp:
+            model = DistributedDataParallel(model)
+        # model.compile: compiled forward/loss, eager fallback on failure; ``model`` stays for no_sync/params
+        forward = maybe_compile(model, compile_options, logger, "model")
+        compute_loss = maybe_compile(loss_fn, compile_options, logger, "loss")
+        # order depends only on (seed, epoch) and the loader's own generator (worker seeds), never on the
+        # global RNG, so a resumed run sees the same batches as an uninterrupted one
+        loader_gen = torch.Generator()
+        if hasattr(dataset, "pair_sampler"):
+            # pair datasets collate whole batches themselves (shared images decoded once)
+            loader = DataLoader(
+                dataset,
+                batch_size=None,
+                sampler=dataset.pair_sampler(
+                    batch_size, shuffle=train_mode, seed=seed or 0, num_replicas=world_size, rank=rank
+                ),
+                num_workers=num_workers,
+                pin_memory=pin_memory,
+                generator=loader_gen,
+            )
+        else:
+            loader = DataLoader(
+                dataset,
+                batch_size=batch_size,
+                sampler=ResumableSampler(
+                    len(dataset), shuffle=train_mode, seed=seed or 0, num_replicas=world_size, rank=rank
+                ),
+                num_workers=num_workers,
+                pin_memory=pin_memory,
+                generator=loader_gen,
+            )
         opt_cfg = config.get("optimizer", {})
         lr = opt_cfg.get("lr", 1e-4)
         betas = opt_cfg.get("betas", (0.9, 0.999))
@@ -120,71 +232,209 @@ def run_train_eval(
             if train_mode and optim and hasattr(model, "parameters")
             else None
         )
-        total_steps = len(loader) * max(epochs, 1)
+        # steps count loaded batches (sampler position, checkpoints); an optimizer step closes a window of
+        # ``accumulation_steps`` batches (or the epoch's remainder) and drives logging and the ETA
+        steps_per_epoch = len(loader)
+        updates_per_epoch = math.ceil(steps_per_epoch / accumulation_steps)
+        total_steps = updates_per_epoch * max(epochs, 1)
+        can_resume = train_mode and optimizer is not None and checkpoint_dir is not None
+        save_states = can_resume and rank == 0
+        start_epoch, start_step = 1, 0
+        best_loss, epoch_loss_sum = None, 0.0
+        state_path = latest_train_state(checkpoint_dir) if resume and can_resume else None
+        if state_path is not None:
+            state = load_train_state(state_path, base_model, optimizer)
+            if state.get("world_size", 1) != world_size:
+                raise ValueError(
+                    f"{state_path} was written by {state.get('world_size', 1)} processes; resume with the same --nproc"
+                )
+            start_epoch, start_step = state["epoch"], state["step"]
+            steps_processed = state["global_step"]
+            optimizer_steps = state.get("optimizer_steps", steps_processed)
+            best_loss, epoch_loss_sum = state.get("best_loss"), state.get("epoch_loss_sum", 0.0)
+            if start_step >= steps_per_epoch:
+                start_epoch, start_step = start_epoch + 1, 0
+            logger.info("Resumed from %s (epoch %d, step %d)", state_path, start_epoch, start_step)
+        elif resume:
+            logger.warning("No training state found in %s; starting from scratch", checkpoint_dir)
+        writer = (
+            AsyncCheckpointWriter(
+                checkpoint_dir,
+                keep=ckpt_cfg.get("keep", 3),
+                interval_steps=ckpt_cfg.get("interval"),
+                interval_minutes=ckpt_cfg.get("interval_minutes"),
+            )
+            if save_states
+            else None
+        )
+        last_aliases = ("last.pth",) if ckpt_cfg.get("save_last", True) else ()
+        ckpt_stall = 0.0
         train_start = time.time()
         last_end = train_start
-        steps_processed = 0
+        run_updates = 0
+        window_loss = window_time = window_data_time = 0.0
         last_pred = None
         last_target = None
-        for epoch in range(1, epochs + 1):
+        cache_stats = getattr(dataset, "cache_stats", None)
+        cache_prev = cache_stats() if cache_stats else None
+        for epoch in range(start_epoch, epochs + 1):
+            if hasattr(loader.sampler, "set_epoch"):
+                loader.sampler.set_epoch(epoch)
+            # worker seeds differ per rank; single-process runs keep the (seed, epoch) seed
+            loader_gen.manual_seed(mix_seed(seed or 0, epoch, rank) if world_size > 1 else mix_seed(seed or 0, epoch))
+            skip = start_step if epoch == start_epoch else 0
+            if skip:
+                # fast-forward by position; the skipped samples are never loaded
+                loader.sampler.set_start(skip * batch_size)
+            else:
+                epoch_loss_sum = 0.0
             iterator = loader
-            for step, batch in enumerate(iterator, start=1):
+            for step, batch in enumerate(iterator, start=skip + 1):
                 iter_start = time.time()
                 data_time = iter_start - last_end
                 batch_dict = batch if isinstance(batch, dict) else batch
                 img = batch_dict.get("image_tensor") if isinstance(batch_dict, dict) else None
                 target = batch_dict.get("target_tensor") if isinstance(batch_dict, dict) else None
-                if img is None or target is None:
+                window_pos = (step - 1) % accumulation_steps
+                window = min(accumulation_steps, steps_per_epoch - (step - window_pos) + 1)
+                if window_pos == 0:
+                    window_loss = window_time = window_data_time = 0.0
+                    if train_mode and optimizer:
+                        optimizer.zero_grad()
+                if ddp and any_rank(img is None):
+                    # every rank skips together; a lone empty rank would leave the others waiting in backward
+                    img = None
+                if img is None:
+                    # an empty batch still fills its slot in the window, keeping updates aligned with steps
+                    last_end = time.time()
+                else:
+                    img = _to_float_image(img)
+                    if target is not None:
+                        target = _to_float_image(target)
+                    if batch_augs:
+                        indices = batch_dict.get("index")
+                        if indices is None:
+                            indices = range((step - 1) * batch_size, (step - 1) * batch_size + img.shape[0])
+                        for aug in batch_augs:
+                            img = aug(img, indices, epoch)
+                            # same (seed, epoch, index) params keep a distinct target aligned with its source
+                            target = aug(target, indices, epoch) if target is not None else None
+                    # datasets omit target_tensor when the target is the source image (collated once)
+                    if target is None:
+                        target = img
+                    if channels_last:
+                        img = img.contiguous(memory_format=torch.channels_last)
+                        target = target.contiguous(memory_format=torch.channels_last)
+                    embedding = batch_dict.get("target_embedding")
+                    n = img.shape[0]
+                    chunk = int(micro_batch_size or n)
+                    for start in range(0, n, chunk):
+                        part = slice(start, start + chunk)
+                        # DDP all-reduces gradients once per window, on its last backward
+                        last_chunk = window_pos + 1 == window and start + chunk >= n
+                        with model.no_sync() if ddp and not last_chunk else nullcontext():
+                            with torch.no_grad() if not train_mode else torch.enable_grad(), _autocast(precision):
+                                outputs = forward(img[part])
+                                targets = {
+                                    "target": target[part],
+                                    "target_embedding": embedding[part] if embedding is not None else None,
+                                }
+                                loss = compute_loss(outputs, targets)
+                            # mean-reduced loss: each micro-batch weighted by its share of the batch,
+                            # each batch by 1/window
+                            loss = loss.float() * (min(chunk, n - start) / n / window)
+                            if train_mode and optimizer:
+                                loss.backward()
+                        window_loss += float(loss)
+                    last_pred = outputs.get("output")
+                    last_pred = last_pred.float() if last_pred is not None else None
+                    last_target = target[part]
+                    steps_processed += 1
+                    now = time.time()
+                    window_time += now - iter_start
+                    window_data_time += data_time
+                    last_end = now
+                global_step = steps_processed
+                if window_pos + 1 < window:
                     continue
                 if train_mode and optimizer:
-                    optimizer.zero_grad()
-                with torch.no_grad() if not train_mode else torch.enable_grad():
-                    outputs = model(img)
-                    loss = loss_fn(outputs, {"target": target})
-                if train_mode and optimizer:
-                    loss.backward()
                     optimizer.step()
-                last_pred = outputs.get("output")
-                last_target = target
-                now = time.time()
-                iter_time = now - iter_start
-                last_end = now
-                global_step = steps_processed + 1
-                elapsed = now - train_start
-                avg_time = elapsed / max(global_step, 1)
-                remaining = total_steps - global_step
+                optimizer_steps += 1
+                run_updates += 1
+                if world_size > 1:
+                    window_loss = all_reduce_mean({"loss": window_loss})["loss"]
+                epoch_loss_sum += window_loss
+                if writer is not None and (step == steps_per_epoch or writer.due(optimizer_steps)):
+                    aliases = last_aliases
+                    if step == steps_per_epoch and ckpt_cfg.get("save_best", False):
+                        epoch_loss = epoch_loss_sum / updates_per_epoch
+                        if best_loss is None or epoch_loss < best_loss:
+                            best_loss = epoch_loss
+                            aliases = aliases + ("best.pth",)
+                    train_state = build_train_state(base_model, optimizer, epoch, step, global_step, step * batch_size)
+                    train_state.update(
+                        optimizer_steps=optimizer_steps,
+                        best_loss=best_loss,
+                        epoch_loss_sum=epoch_loss_sum,
+                        world_size=world_size,
+                    )
+                    ckpt_stall += writer.save(train_state, train_state_path(checkpoint_dir, global_step).name, aliases)
+                    last_end = time.time()
+                elapsed = last_end - train_start
+                avg_time = elapsed / max(run_updates, 1)
+                remaining = total_steps - optimizer_steps
                 eta_seconds = remaining * avg_time
                 lr_cur = optimizer.param_groups[0]["lr"] if optimizer and optimizer.param_groups else lr
-                mem = torch.cuda.memory_allocated() / (1024 * 1024) if torch and torch.cuda.is_available() else 0.0
-                if global_step % log_interval == 0 or global_step == total_steps:
+                mem_field, mem = _memory_mb()
+                if optimizer_steps % log_interval == 0 or optimizer_steps == total_steps:
                     logger.info(
-                        "Epoch [%d][%d/%d]\tlr: %.6f\teta: %s\ttime: %.4f\tdata_time: %.4f\tmemory: %.1fMB\tloss: %.4f",
+                        "Epoch [%d][%d/%d]\tlr: %.6f\teta: %s\ttime: %.4f\tdata_time: %.4f\tckpt_stall: %.4f"
+                        "\t%s: %.1fMB\tloss: %.4f",
                         epoch,
-                        step,
-                        len(loader),
+                        math.ceil(step / accumulation_steps),
+                        updates_per_epoch,
                         lr_cur,
                         _format_eta(eta_seconds),
-                        iter_time,
-                        data_time,
+                        window_time,
+                        window_data_time,
+                        ckpt_stall,
+                        mem_field,
                         mem,
-                        float(loss),
+                        window_loss,
                     )
-                steps_processed += 1
+                    ckpt_stall = 0.0
+            if cache_prev is not None:
+                cache_now = cache_stats()
+                hits, misses, rate = hit_rate(cache_now, cache_prev)
+                logger.info(
+                    "Epoch [%d] image cache\thit_rate: %.1f%%\thits: %d\tmisses: %d\tused: %.1f/%.1fMB",
+                    epoch,
+                    rate,
+                    hits,
+                    misses,
+                    cache_now["used_mb"],
+                    cache_now["capacity_mb"],
+                )
+                cache_prev = cache_now
         metrics["identity_accuracy"] = 1.0  # placeholder computed metric
         if last_pred is not None and last_target is not None:
             metrics["psnr"] = compute_psnr(last_pred, last_target)
             metrics["ssim"] = compute_ssim(last_pred, last_target)
             metrics["lpips"] = compute_lpips(last_pred, last_target)
+        if world_size > 1:
+            metrics.update(all_reduce_mean({k: metrics[k] for k in ("psnr", "ssim", "lpips")}))
         if steps_processed == 0:
             logger.warning("No batches were processed; check dataset/tensors.")
         # Save checkpoint on train
-        if train_mode and checkpoint_dir:
-            checkpoint_dir.mkdir(parents=True, exist_ok=True)
-            ckpt_path = checkpoint_dir / f"epoch_{epochs:02d}.pt"
-            torch.save({"model": model.state_dict()}, ckpt_path)
-            logger.info("Saved checkpoint to %s", ckpt_path)
+        if writer is not None:
+            ckpt_name = f"epoch_{epochs:02d}.pt"
+            writer.save({"model": base_model.state_dict()}, ckpt_name)
+            flush_start = time.perf_counter()
+            writer.close()
+            flush_time = time.perf_counter() - flush_start
+            logger.info("Saved checkpoint to %s (writer flush %.3fs)", checkpoint_dir / ckpt_name, flush_time)
     else:
-        total_steps = len(dataset)
+        total_steps = len(dataset) if dataset is not None else 0
         logger.warning(
             "Torch/model/loss missing; skipping training loop. Using placeholder metrics. total_steps=%d", total_steps
         )
@@ -192,7 +442,7 @@ def run_train_eval(
 
     logger.info(
         "Epoch [1][%d/%d] metrics: id_acc=%.3f lpips=%.3f ssim=%.3f psnr=%.2f",
-        steps_processed if torch and dataset is not None else 0,
+        optimizer_steps if torch and dataset is not None else 0,
         total_steps if dataset is not None else 0,
         metrics["identity_accuracy"],
         metrics["lpips"],
@@ -1,4 +1,5 @@
 from registry import AUGMENTATIONS
-from data.transforms import LightAugmentation
+from data.transforms import BatchLightAugmentation, LightAugmentation
 
 AUGMENTATIONS.register("LightAugmentation")(LightAugmentation)
+AUGMENTATIONS.register("BatchLightAugmentation")(BatchLightAugmentation)
@@ -1,5 +1,9 @@
 from registry import DATASETS
 from data.lfw_dataset import LFWDataset
+from data.packed_dataset import PackedLFWDataset
+from data.pair_dataset import LFWPairDataset
 
 # Register dataset
 DATASETS.register("LFWDataset")(LFWDataset)
+DATASETS.register("PackedLFWDataset")(PackedLFWDataset)
+DATASETS.register("LFWPairDataset")(LFWPairDataset)
@@ -4,6 +4,8 @@ from typing import Any, Dict, Optional
 from utils.logging import setup_logger
 from utils.metrics import write_metrics_json
 from pipelines.train_eval import run_train_eval
+from pipelines.distributed import launch
+from utils.checkpoint import save_atomic
 import time
 import json
 import yaml
@@ -36,23 +38,29 @@ class BaseRunner:
     def after_run(self) -> None:
         self.logger.info('{"event": "after_run"}')
 
-    def save_checkpoint(self, epoch: int = 1, name: Optional[str] = None) -> Path:
+    def save_checkpoint(self, epoch: int = 1, name: Optional[str] = None, state: Optional[Dict[str, Any]] = None) -> Path:
         ckpt_name = name or f"epoch_{epoch:02d}.pt"
-        path = self.checkpoints_dir / ckpt_name
-        path.write_text("checkpoint-placeholder")
+        path = save_atomic(state if state is not None else {"epoch": epoch}, self.checkpoints_dir / ckpt_name)
         self.logger.info(f'{{"event": "checkpoint_saved", "path": "{path}"}}')
         return path
 
-    def train(self) -> Dict[str, Any]:
+    def train(self, resume: bool = False, nproc: int = 1) -> Dict[str, Any]:
         self.before_run()
-        self.logger.info('{"event": "train_start"}')
-        metrics = run_train_eval(
-            self.config,
+        self.logger.info(f'{{"event": "train_start", "nproc": {nproc}}}')
+        kwargs = {"mode": "train", "checkpoint_dir": self.checkpoints_dir, "resume": resume}
+        if nproc > 1:
+            metrics = launch(run_train_eval, nproc, self.config, self.task_dir, **kwargs)
+        else:
+            metrics = run_train_eval(self.config, self.task_dir, **kwargs)
+        last = self.checkpoints_dir / "last.pth"
+        if not last.exists():
+            # nothing was trained (no dataset/model, or save_last off); the metrics file records that
+            self.logger.warning(f'{{"event": "no_checkpoint", "path": "{last}"}}')
+        write_metrics_json(
             self.task_dir,
-            mode="train",
-            checkpoint_dir=self.checkpoints_dir,
+            {**metrics, "last_checkpoint": str(last) if last.exists() else None},
+            filename="metrics.train.json",
         )
-        write_metrics_json(self.task_dir, metrics, filename="metrics.train.json")
         self.after_run()
         return metrics
 
@@ -64,6 +72,7 @@ class BaseRunner:
             self.task_dir,
             mode="eval",
         )
+        write_metrics_json(self.task_dir, metrics, filename="metrics.eval.json")
         self.after_run()
         return metrics
 
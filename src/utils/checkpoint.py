@@ -0,0 +1,158 @@
+import os
+import random
+import re
+import shutil
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+TRAIN_STATE_PATTERN = re.compile(r"^state_(\d{8})\.pt$")
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Snapshot the python, numpy and torch (CPU) global RNGs."""
+    state: Dict[str, Any] = {"python": random.getstate(), "torch": torch.get_rng_state()}
+    if np is not None:
+        state["numpy"] = np.random.get_state()
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any]) -> None:
+    random.setstate(state["python"])
+    torch.set_rng_state(state["torch"])
+    if np is not None and "numpy" in state:
+        np.random.set_state(state["numpy"])
+
+
+def save_atomic(obj: Any, path: Path) -> Path:
+    """``torch.save`` to a temp file in the same directory, then rename over ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def train_state_path(checkpoint_dir: Path, global_step: int) -> Path:
+    return checkpoint_dir / f"state_{global_step:08d}.pt"
+
+
+def latest_train_state(checkpoint_dir: Path) -> Optional[Path]:
+    """Training-state file with the highest global step in ``checkpoint_dir`` (None if there is none)."""
+    if not checkpoint_dir.is_dir():
+        return None
+    found = [(int(m.group(1)), p) for p in checkpoint_dir.iterdir() if (m := TRAIN_STATE_PATTERN.match(p.name))]
+    return max(found)[1] if found else None
+
+
+def build_train_state(
+    model: Any, optimizer: Any, epoch: int, step: int, global_step: int, sampler_position: int
+) -> Dict[str, Any]:
+    """Everything needed to continue a run after ``step`` batches of ``epoch`` (1-based)."""
+    return {
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict() if optimizer is not None else None,
+        "epoch": epoch,
+        "step": step,
+        "global_step": global_step,
+        "sampler_position": sampler_position,
+        "rng": capture_rng_state(),
+    }
+
+
+def load_train_state(path: Path, model: Any, optimizer: Any = None) -> Dict[str, Any]:
+    """Restore model/optimizer/RNG from a training-state file; returns the state for epoch/step."""
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    model.load_state_dict(state["model"])
+    if optimizer is not None and state.get("optimizer") is not None:
+        optimizer.load_state_dict(state["optimizer"])
+    if state.get("rng"):
+        restore_rng_state(state["rng"])
+    return state
+
+
+def snapshot_to_cpu(obj: Any) -> Any:
+    """Copy every tensor in a (nested) state dict to CPU memory so training can keep mutating the originals."""
+    if torch is not None and isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot_to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot_to_cpu(v) for v in obj)
+    return obj
+
+
+class AsyncCheckpointWriter:
+    """Periodic checkpoints serialized on a background thread.
+
+    ``save`` snapshots the state to CPU, hands it to a single writer thread and returns the time the
+    caller was blocked (the snapshot plus waiting for the previous write, if still running). Files
+    are written atomically (``save_atomic``); ``aliases`` such as ``last.pth``/``best.pth`` are copied
+    from the finished file the same way. Only the ``keep`` most recent ``state_*.pt`` files are kept.
+    ``due`` fires every ``interval_steps`` steps or ``interval_minutes`` minutes, whichever is set.
+    Call ``close`` to flush; a failed write is raised by the next ``save``/``close``.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: Path,
+        keep: Optional[int] = 3,
+        interval_steps: Optional[int] = None,
+        interval_minutes: Optional[float] = None,
+    ):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.keep = keep
+        self.interval_steps = interval_steps
+        self.interval_minutes = interval_minutes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ckpt-writer")
+        self._pending: Optional[Future] = None
+        self._last_save = time.monotonic()
+
+    def due(self, global_step: int) -> bool:
+        if self.interval_steps and global_step % self.interval_steps == 0:
+            return True
+        return bool(self.interval_minutes) and time.monotonic() - self._last_save >= self.interval_minutes * 60
+
+    def save(self, state: Dict[str, Any], name: str, aliases: Sequence[str] = ()) -> float:
+        start = time.perf_counter()
+        snapshot = snapshot_to_cpu(state)
+        self.wait()
+        self._pending = self._executor.submit(self._write, snapshot, name, tuple(aliases))
+        self._last_save = time.monotonic()
+        return time.perf_counter() - start
+
+    def wait(self) -> None:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _write(self, snapshot: Dict[str, Any], name: str, aliases: Sequence[str]) -> None:
+        path = save_atomic(snapshot, self.checkpoint_dir / name)
+        for alias in aliases:
+            tmp = self.checkpoint_dir / f"{alias}.tmp"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, self.checkpoint_dir / alias)
+        if self.keep:
+            self._prune()
+
+    def _prune(self) -> None:
+        states = sorted(p for p in self.checkpoint_dir.iterdir() if TRAIN_STATE_PATTERN.match(p.name))
+        for stale in states[: -self.keep]:
+            stale.unlink(missing_ok=True)
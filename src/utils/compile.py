@@ -0,0 +1,104 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import torch
+except Exception:  # pragma: no cover
+    torch = None
+
+COMPILE_MODES = ("default", "reduce-overhead", "max-autotune", "max-autotune-no-cudagraphs")
+
+
+def split_compile_cfg(model_cfg: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Split ``model.compile`` off a model config; returns (build config, torch.compile kwargs or None).
+
+    ``compile`` may be ``true`` (default mode), a mode name, or a mapping of ``torch.compile`` kwargs
+    (``mode``, ``fullgraph``, ``dynamic``, ``backend``). ``model.fuse`` (see ``maybe_fuse``) is
+    dropped from the build config as well.
+    """
+    build_cfg = dict(model_cfg)
+    build_cfg.pop("fuse", None)
+    spec = build_cfg.pop("compile", None)
+    if spec in (None, False):
+        return build_cfg, None
+    if spec is True:
+        options: Dict[str, Any] = {"mode": "default"}
+    elif isinstance(spec, str):
+        options = {"mode": spec}
+    elif isinstance(spec, dict):
+        options = {"mode": "default", **spec}
+    else:
+        raise ValueError(f"model.compile must be a bool, mode name or mapping, got {spec!r}")
+    if options.get("mode") not in COMPILE_MODES:
+        raise ValueError(f"Unknown model.compile mode: {options.get('mode')} (expected one of {COMPILE_MODES})")
+    return build_cfg, options
+
+
+def maybe_fuse(model: Any, model_cfg: Dict[str, Any]) -> Any:
+    """Fold BatchNorm into the convs (``fuse_for_inference``) when ``model.fuse`` is set.
+
+    The one switch for every inference path: eval, eval-only, infer and export. Off by default,
+    since the folded model is faster but not bit-exact with the one that was trained.
+    """
+    if model_cfg.get("fuse", False) and hasattr(model, "fuse_for_inference"):
+        model.fuse_for_inference()
+    return model
+
+
+class CompiledCall:
+    """Call ``fn`` through ``torch.compile``, falling back to eager on failure.
+
+    Compilation happens on the first call, which is timed and logged on its own (``compile_time``)
+    so steady-state step times stay comparable with eager. If compiling or running the compiled
+    graph raises, a warning is logged and this and all later calls run ``fn`` eagerly.
+    """
+
+    def __init__(self, fn: Callable, options: Dict[str, Any], logger: logging.Logger, name: str = "model"):
+        self.eager = fn
+        self.options = options
+        self.logger = logger
+        self.name = name
+        self.compile_time: Optional[float] = None
+        try:
+            self.compiled: Optional[Callable] = torch.compile(fn, **options)
+        except Exception as e:
+            self._fall_back(e)
+
+    @property
+    def active(self) -> bool:
+        return self.compiled is not None
+
+    def _fall_back(self, error: Exception) -> None:
+        self.compiled = None
+        self.logger.warning("torch.compile of %s failed (%s: %s); running eager", self.name, type(error).__name__, error)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if self.compiled is None:
+            return self.eager(*args, **kwargs)
+        first = self.compile_time is None
+        start = time.perf_counter()
+        try:
+            out = self.compiled(*args, **kwargs)
+        except Exception as e:
+            self._fall_back(e)
+            return self.eager(*args, **kwargs)
+        if first:
+            self.compile_time = time.perf_counter() - start
+            self.logger.info(
+                "Compiled %s (mode=%s) in %.2fs (first call, incl. one step)",
+                self.name,
+                self.options.get("mode"),
+                self.compile_time,
+            )
+        return out
+
+
+def maybe_compile(fn: Callable, options: Optional[Dict[str, Any]], logger: logging.Logger, name: str) -> Callable:
+    """``CompiledCall`` when ``options`` is set and torch has ``compile``; otherwise ``fn`` unchanged."""
+    if options is None:
+        return fn
+    if torch is None or not hasattr(torch, "compile"):
+        logger.warning("model.compile requested but torch.compile is unavailable; running %s eager", name)
+        return fn
+    return CompiledCall(fn, options, logger, name)
@@ -1,5 +1,6 @@
+import statistics
 import time
-from typing import Tuple
+from typing import Callable, Dict, List, Tuple
 
 
 def measure_latency_fps() -> Tuple[float, float]:
@@ -9,3 +10,18 @@ def measure_latency_fps() -> Tuple[float, float]:
     latency_ms = (time.time() - start) * 1000.0
     fps = 1000.0 / latency_ms if latency_ms > 0 else 0.0
     return round(latency_ms, 3), round(fps, 3)
+
+
+def compare_latency_ms(fns: Dict[str, Callable[[], object]], iters: int = 20, warmup: int = 3) -> Dict[str, float]:
+    """Median wall time (ms) of each zero-argument callable.
+
+    Callables are timed in interleaved rounds, so drift in machine load hits all of them alike.
+    """
+    timings: Dict[str, List[float]] = {name: [] for name in fns}
+    for step in range(warmup + iters):
+        for name, fn in fns.items():
+            start = time.perf_counter()
+            fn()
+            if step >= warmup:
+                timings[name].append((time.perf_counter() - start) * 1000.0)
+    return {name: statistics.median(values) for name, values in timings.items()}
@@ -0,0 +1,31 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+
+@pytest.fixture
+def train_config() -> Callable[[Path], dict]:
+    """Factory for a tiny training config: six 16x16 images of distinct persons written under ``root``."""
+    Image = pytest.importorskip("PIL.Image")
+    from src.data.manifest import DatasetManifest
+
+    def make(root: Path) -> dict:
+        items = []
+        for n in range(6):
+            rel = f"P{n}/P{n}_0001.png"
+            (root / rel).parent.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (16, 16), (40 * n, 255 - 30 * n, 7 * n)).save(root / rel)
+            items.append({"id": f"P{n}_P{n}_0001", "path": rel})
+        DatasetManifest(version="1.0", items=items, splits={"train": [it["id"] for it in items]}).save(root / "m.json")
+        return {
+            "seed": 3,
+            "dataset": {"type": "LFWDataset", "root": str(root), "split": "train", "manifest": str(root / "m.json")},
+            "model": {"type": "UNetFaceSwap", "channels": 4},
+            "loss": {"type": "FaceSwapLoss"},
+            "train": {"epochs": 2, "batch_size": 2},
+            "augmentations": [{"type": "BatchLightAugmentation", "seed": 5}],
+            "hooks": {"checkpoint": {"interval": 2, "save_best": True}},
+        }
+
+    return make
@@ -1,3 +1,4 @@
+import json
 import sys
 from pathlib import Path
 
@@ -29,7 +30,9 @@ def test_cli_train_and_eval(tmp_path: Path, monkeypatch):
     argv_train = ["train", "--config", str(cfg), "--work-dir", str(tmp_path / "wd-train")]
     monkeypatch.setattr(sys, "argv", ["prog"] + argv_train)
     cli.main()
-    assert (tmp_path / "wd-train" / "checkpoints" / "last.pth").exists()
+    # the split is empty, so nothing is trained and no checkpoint is written
+    assert not (tmp_path / "wd-train" / "checkpoints" / "last.pth").exists()
+    assert json.loads((tmp_path / "wd-train" / "metrics.train.json").read_text())["last_checkpoint"] is None
 
     # eval
     argv_eval = ["eval", "--config", str(cfg), "--work-dir", str(tmp_path / "wd-eval")]
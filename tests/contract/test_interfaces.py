@@ -3,12 +3,14 @@ import sys
 from pathlib import Path
 
 import pytest
+import yaml
 
 
-def test_cli_parses_train(monkeypatch, capsys, tmp_path: Path):
+def test_cli_parses_train(monkeypatch, capsys, tmp_path: Path, train_config):
+    pytest.importorskip("torch")
     cli = importlib.import_module("src.interfaces.cli")
     cfg = tmp_path / "cfg.yaml"
-    cfg.write_text("name: cli-test\n")
+    cfg.write_text(yaml.safe_dump({"name": "cli-test", **train_config(tmp_path / "data")}))
     argv = ["train", "--config", str(cfg), "--work-dir", str(tmp_path / "wd")]
     monkeypatch.setattr(sys, "argv", ["prog"] + argv)
     cli.main()
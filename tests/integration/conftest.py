@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def infer_setup(tmp_path: Path):
+    """A tiny UNetFaceSwap checkpoint, four 16x16 source/target PNGs and an infer config under ``tmp_path``.
+
+    Returns ``(model, config, sources, targets)`` with the model in eval mode.
+    """
+    torch = pytest.importorskip("torch")
+    Image = pytest.importorskip("PIL.Image")
+    from src.registry.models import UNetFaceSwap
+
+    torch.manual_seed(0)
+    model = UNetFaceSwap(channels=4)
+    ckpt = tmp_path / "model.pt"
+    torch.save({"model": model.state_dict()}, ckpt)
+    sources, targets = [], []
+    for n in range(4):
+        for role, paths in (("src", sources), ("tgt", targets)):
+            path = tmp_path / "images" / f"{role}_{n}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (16, 16), (50 * n, 120, 200 if role == "src" else 20)).save(path)
+            paths.append(str(path))
+    config = {
+        "model": {"type": "UNetFaceSwap", "channels": 4},
+        "infer": {
+            "checkpoint": str(ckpt),
+            "batch_size": 2,
+            "warmup_size": [16, 16],
+            "output_dir": str(tmp_path / "out"),
+        },
+    }
+    return model.eval(), config, sources, targets
@@ -0,0 +1,140 @@
+import importlib
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+torch = pytest.importorskip("torch")
+
+from src.pipelines.batching import DynamicBatcher, QueueFullError
+
+
+def test_batcher_merges_concurrent_requests_and_routes_results():
+    sizes = []
+
+    def forward(source, target):
+        sizes.append(len(source))
+        return {"output": (source + target) / 2}
+
+    batcher = DynamicBatcher(forward, max_batch_size=4, max_wait_ms=200)
+    inputs = [torch.full((3, 8, 8), i / 10) for i in range(6)] + [torch.full((3, 4, 4), 0.9)]
+    futures = [batcher.submit(x, torch.zeros_like(x)) for x in inputs]
+    results = [f.result(timeout=10) for f in futures]
+    batcher.close()
+
+    for x, out in zip(inputs, results):
+        assert torch.equal(out, x / 2)
+    assert sum(sizes) == 7 and max(sizes) <= 4
+    stats = batcher.stats()
+    assert stats["requests"] == 7 and stats["queue_depth"] == 0
+    assert stats["batches"] < 7 and stats["latency_ms_p99"] is not None
+
+
+def test_batcher_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    def forward(source, target):
+        release.wait(10)
+        return {"output": source}
+
+    batcher = DynamicBatcher(forward, max_batch_size=1, max_wait_ms=0, max_queue=2)
+    pair = (torch.zeros(3, 4, 4), torch.zeros(3, 4, 4))
+    futures = [batcher.submit(*pair)]
+    while batcher.stats()["queue_depth"]:  # wait until the worker holds the first request
+        time.sleep(0.001)
+    futures += [batcher.submit(*pair), batcher.submit(*pair)]
+    with pytest.raises(QueueFullError):
+        batcher.submit(*pair)
+    release.set()
+    assert all(f.result(timeout=10) is not None for f in futures)
+    batcher.close()
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_batcher_rejects_oversized_request_whole():
+    calls = []
+
+    def forward(source, target):
+        calls.append(len(source))
+        return {"output": source}
+
+    batcher = DynamicBatcher(forward, max_batch_size=4, max_wait_ms=0, max_queue=2)
+    pair = (torch.zeros(3, 4, 4), torch.zeros(3, 4, 4))
+    with pytest.raises(QueueFullError, match="queue is full"):
+        batcher.submit_many([pair] * 3)
+    stats = batcher.stats()
+    assert (stats["queue_depth"], stats["rejected"]) == (0, 3)
+    futures = batcher.submit_many([pair] * 2)
+    assert all(f.result(timeout=10) is not None for f in futures)
+    batcher.close()
+    assert sum(calls) == 2
+
+
+def test_infer_async_rejects_request_larger_than_queue(tmp_path: Path, infer_setup):
+    import asyncio
+
+    api = importlib.import_module("src.interfaces.api")
+    _, config, sources, targets = infer_setup
+    config["serve"] = {"max_queue": 2}
+    cfg_path = tmp_path / "infer.yaml"
+    cfg_path.write_text(yaml.safe_dump(config))
+
+    with pytest.raises(RuntimeError, match="queue is full"):
+        asyncio.run(api.infer_async(cfg_path, sources[:3], targets[:3], work_dir=tmp_path / "out"))
+    stats = api.get_batcher(cfg_path).stats()
+    assert (stats["requests"], stats["queue_depth"], stats["rejected"]) == (0, 0, 3)
+    assert not (tmp_path / "out").exists()
+    result = asyncio.run(api.infer_async(cfg_path, sources[:2], targets[:2], work_dir=tmp_path / "out"))
+    assert len(result["outputs"]) == 2
+
+
+@pytest.mark.skipif(importlib.util.find_spec("httpx") is None, reason="httpx not installed")
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_rest_batch_requests_share_the_batcher(tmp_path: Path, infer_setup):
+    from fastapi.testclient import TestClient
+
+    _, config, sources, targets = infer_setup
+    config["serve"] = {"max_batch_size": 4, "max_wait_ms": 20}
+    cfg_path = tmp_path / "infer.yaml"
+    cfg_path.write_text(yaml.safe_dump(config))
+    rest = importlib.import_module("src.interfaces.rest")
+    client = TestClient(rest.app)
+
+    responses = []
+
+    def request(i):
+        body = {"config": str(cfg_path), "sources": [sources[i]], "targets": [targets[i]]}
+        responses.append(client.post("/face-swap/batch", json=body))
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert all(Path(r.json()["outputs"][0]).exists() for r in responses)
+    stats = client.get("/face-swap/metrics").json()["batchers"][str(cfg_path.resolve())]
+    assert stats["requests"] == 4 and stats["max_batch_size"] == 4
+
+
+@pytest.mark.skipif(importlib.util.find_spec("httpx") is None, reason="httpx not installed")
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_rest_forward_error_is_not_reported_as_queue_full(tmp_path: Path, infer_setup):
+    from fastapi.testclient import TestClient
+
+    _, config, sources, targets = infer_setup
+    cfg_path = tmp_path / "infer.yaml"
+    cfg_path.write_text(yaml.safe_dump(config))
+    rest = importlib.import_module("src.interfaces.rest")
+    api = importlib.import_module(rest.infer_async.__module__)  # the api module (and batchers) rest uses
+
+    def forward(source, target):
+        raise RuntimeError("forward failed")
+
+    api.get_batcher(cfg_path).forward = forward
+    body = {"config": str(cfg_path), "sources": sources[:1], "targets": targets[:1]}
+    resp = TestClient(rest.app, raise_server_exceptions=False).post("/face-swap/batch", json=body)
+    assert resp.status_code == 500
@@ -0,0 +1,90 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+from src.pipelines.infer import InferenceEngine, run_infer
+from src.registry.models import UNetFaceSwap
+
+
+def _pairs(tmp_path: Path):
+    sources, targets = [], []
+    for n in range(5):
+        size = 16 if n % 2 == 0 else 24  # mixed sizes end up in separate batches
+        for role, paths in (("src", sources), ("tgt", targets)):
+            path = tmp_path / "images" / f"{role}_{n}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (size, size), (30 * n, 200 - 20 * n, 90 if role == "src" else 10)).save(path)
+            paths.append(str(path))
+    return sources, targets
+
+
+def test_batched_pipelined_infer_matches_single_pair_outputs(tmp_path: Path):
+    torch.manual_seed(0)
+    model = UNetFaceSwap(channels=4).eval()
+    sources, targets = _pairs(tmp_path)
+    logger = logging.getLogger("test-infer")
+
+    single = run_infer(model, sources, targets, tmp_path / "single", logger)
+    batched = run_infer(
+        model, sources, targets, tmp_path / "batched", logger, batch_size=3, num_workers=2, save_workers=3
+    )
+
+    assert single["pairs"] == batched["pairs"] == 5
+    names = sorted(p.name for p in (tmp_path / "single").glob("*.png"))
+    assert names == [f"src_{n}_to_tgt_{n}.png" for n in range(5)]
+    for name in names:
+        assert (tmp_path / "single" / name).read_bytes() == (tmp_path / "batched" / name).read_bytes(), name
+
+
+def _baseline_infer(model_cfg, checkpoint: Path, sources, targets, output_dir: Path) -> None:
+    """The per-pair loop ``infer`` ran before batching and the inference engine."""
+    from torchvision import transforms as T
+
+    model = UNetFaceSwap(**{k: v for k, v in model_cfg.items() if k != "type"})
+    model.load_state_dict(torch.load(checkpoint, map_location="cpu")["model"], strict=False)
+    model.eval()
+    to_tensor, to_pil = T.ToTensor(), T.ToPILImage()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for src, tgt in zip(sources, targets):
+        src_tensor = to_tensor(Image.open(src).convert("RGB")).unsqueeze(0)
+        tgt_tensor = to_tensor(Image.open(tgt).convert("RGB")).unsqueeze(0)
+        with torch.no_grad():
+            pred = model(src_tensor, tgt_tensor).get("output", tgt_tensor)
+        to_pil(pred.clamp(0, 1).cpu().squeeze(0)).save(output_dir / f"{Path(src).stem}_to_{Path(tgt).stem}.png")
+
+
+def test_engine_swap_files_matches_baseline_loop(tmp_path: Path):
+    torch.manual_seed(0)
+    model_cfg = {"type": "UNetFaceSwap", "channels": 4}
+    model = UNetFaceSwap(channels=4)
+    for module in model.modules():  # non-trivial BatchNorm statistics, so folding changes the arithmetic
+        if isinstance(module, torch.nn.BatchNorm2d):
+            module.running_mean.uniform_(-0.2, 0.2)
+            module.running_var.uniform_(0.5, 2.0)
+    checkpoint = tmp_path / "model.pt"
+    torch.save({"model": model.state_dict()}, checkpoint)
+    sources, targets = _pairs(tmp_path)
+    _baseline_infer(model_cfg, checkpoint, sources, targets, tmp_path / "baseline")
+    names = sorted(p.name for p in (tmp_path / "baseline").glob("*.png"))
+    assert len(names) == 5
+
+    # default engine (no BatchNorm folding, one pair per forward): the same files, byte for byte
+    engine = InferenceEngine(model_cfg, checkpoint=str(checkpoint))
+    engine.swap_files(sources, targets, tmp_path / "engine")
+    for name in names:
+        assert (tmp_path / "baseline" / name).read_bytes() == (tmp_path / "engine" / name).read_bytes(), name
+
+    # folded and batched: within one 8-bit level of the baseline
+    config = {"model": {**model_cfg, "fuse": True}, "infer": {"checkpoint": str(checkpoint), "batch_size": 3}}
+    fused = InferenceEngine.from_config(config)
+    assert fused.model.fused
+    fused.swap_files(sources, targets, tmp_path / "fused")
+    for name in names:
+        expected = np.asarray(Image.open(tmp_path / "baseline" / name), dtype=np.int16)
+        actual = np.asarray(Image.open(tmp_path / "fused" / name), dtype=np.int16)
+        assert np.abs(expected - actual).max() <= 1, name
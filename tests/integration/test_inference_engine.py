@@ -0,0 +1,67 @@
+import importlib
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+torch = pytest.importorskip("torch")
+
+from src.pipelines.infer import InferenceEngine
+
+
+def test_engine_swap_matches_model_and_is_thread_safe(tmp_path: Path, infer_setup):
+    model, config, sources, targets = infer_setup
+    engine = InferenceEngine.from_config(config)
+
+    expected = []
+    with torch.no_grad():
+        for src, tgt in zip(sources, targets):
+            s, t = engine.load_image(src).unsqueeze(0), engine.load_image(tgt).unsqueeze(0)
+            expected.append(model(s, t)["output"].clamp(0, 1)[0])
+    results = {}
+
+    def request(i):
+        results[i] = engine.swap(sources[i:] + sources[:i], targets[i:] + targets[:i])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    for i, outs in results.items():
+        for k, out in enumerate(outs):
+            assert torch.allclose(out, expected[(i + k) % 4], atol=1e-5)
+
+
+def test_api_infer_reuses_warm_engine(tmp_path: Path, infer_setup):
+    _, config, sources, targets = infer_setup
+    cfg_path = tmp_path / "infer.yaml"
+    cfg_path.write_text(yaml.safe_dump(config))
+    api = importlib.import_module("src.interfaces.api")
+
+    first = api.infer(cfg_path, sources, targets)
+    engine = api.get_engine(cfg_path)
+    second = api.infer(cfg_path, sources[:2], targets[:2], work_dir=tmp_path / "second")
+
+    assert api.get_engine(cfg_path) is engine
+    assert first["status"] == second["status"] == "ok"
+    assert [Path(p).name for p in first["outputs"]] == [f"src_{n}_to_tgt_{n}.png" for n in range(4)]
+    assert all(Path(p).exists() for p in first["outputs"] + second["outputs"])
+
+
+@pytest.mark.skipif(importlib.util.find_spec("httpx") is None, reason="httpx not installed")
+@pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+def test_rest_batch_endpoint_swaps(tmp_path: Path, infer_setup):
+    from fastapi.testclient import TestClient
+
+    _, config, sources, targets = infer_setup
+    cfg_path = tmp_path / "infer.yaml"
+    cfg_path.write_text(yaml.safe_dump(config))
+    rest = importlib.import_module("src.interfaces.rest")
+
+    resp = TestClient(rest.app).post(
+        "/face-swap/batch", json={"config": str(cfg_path), "sources": sources, "targets": targets}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["pairs"] == 4
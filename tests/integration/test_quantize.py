@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from src.data.manifest import DatasetManifest
+
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("torch.ao.quantization.quantize_fx")
+
+from src.pipelines.quantize import load_quantized, run_quantize
+
+
+def _config(tmp_path: Path) -> dict:
+    items = []
+    for n in range(6):
+        rel = f"P{n}/P{n}_0001.png"
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (32, 32), (40 * n, 255 - 30 * n, 7 * n)).save(tmp_path / rel)
+        items.append({"id": f"P{n}_P{n}_0001", "path": rel})
+    DatasetManifest(version="1.0", items=items, splits={"val": [it["id"] for it in items]}).save(tmp_path / "m.json")
+    return {
+        "dataset": {"type": "LFWDataset", "root": str(tmp_path), "split": "train", "manifest": str(tmp_path / "m.json")},
+        "model": {"type": "UNetFaceSwap", "channels": 4},
+        "quantize": {"calibration_samples": 4, "eval_samples": 2, "batch_size": 2, "latency_iters": 2},
+    }
+
+
+def test_quantize_saves_loadable_int8_checkpoint(tmp_path: Path):
+    report = run_quantize(_config(tmp_path), tmp_path / "run")
+
+    assert (report["calibration_samples"], report["eval_samples"], report["image_size"]) == (4, 2, [32, 32])
+    for key in ("psnr_fp32", "psnr_int8", "ssim_drop", "latency_ms_int8", "speedup"):
+        assert key in report
+    state = torch.load(report["checkpoint"], weights_only=False)
+    assert state["quantization"]["backend"] == "x86"
+    model = load_quantized(state)
+    assert any(".quantized." in type(m).__module__ for m in model.modules())
+    with torch.no_grad():
+        out = model(torch.rand(1, 3, 32, 32), torch.rand(1, 3, 32, 32))["output"]
+    assert out.shape == (1, 3, 32, 32) and out.dtype == torch.float32
+
+
+def test_quantize_keeps_skipped_modules_float(tmp_path: Path):
+    cfg = _config(tmp_path)
+    cfg["quantize"]["skip_modules"] = ["out_conv"]
+    report = run_quantize(cfg, tmp_path / "run")
+
+    model = load_quantized(torch.load(report["checkpoint"], weights_only=False))
+    assert type(model.out_conv) is torch.nn.Conv2d
+    assert ".quantized." in type(model.get_submodule("dec1.0")).__module__
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from src.pipelines.train_eval import run_train_eval
+
+torch = pytest.importorskip("torch")
+
+
+def _train(cfg: dict, tmp_path: Path, name: str, **train_cfg) -> dict:
+    cfg = {**cfg, "train": dict(cfg["train"])}
+    cfg["train"].update(epochs=1, **train_cfg)
+    run_train_eval(cfg, tmp_path / name, checkpoint_dir=tmp_path / name / "checkpoints")
+    return torch.load(tmp_path / name / "checkpoints" / "last.pth", weights_only=False)
+
+
+def test_accumulation_matches_micro_batching(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    # one sample per forward in both runs (BatchNorm sees the same batches), two samples per update
+    accumulated = _train(cfg, tmp_path, "accum", batch_size=1, accumulation_steps=2)
+    micro = _train(cfg, tmp_path, "micro", batch_size=2, micro_batch_size=1)
+    assert accumulated["optimizer_steps"] == micro["optimizer_steps"] == 3
+    assert (accumulated["global_step"], micro["global_step"]) == (6, 3)
+    for key, value in micro["model"].items():
+        assert torch.allclose(accumulated["model"][key].float(), value.float(), atol=1e-6), key
+
+
+def test_invalid_accumulation_is_rejected(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    cfg["train"]["accumulation_steps"] = 0
+    with pytest.raises(ValueError, match="accumulation_steps"):
+        run_train_eval(cfg, tmp_path / "run")
+
+
+@pytest.mark.parametrize("empty_step", [2, 3, 4])
+def test_empty_batch_keeps_accumulation_windows_aligned(tmp_path: Path, train_config, empty_step: int):
+    from src.data.samplers import ResumableSampler
+
+    cfg = train_config(tmp_path)
+    cfg.pop("augmentations")
+    cfg["train"].update(epochs=1, batch_size=1, accumulation_steps=3, log_interval=1)
+    sampler = ResumableSampler(6, seed=cfg["seed"])
+    sampler.set_epoch(1)
+    missing = list(sampler)[empty_step - 1]
+    # a missing image file yields a sample without image_tensor
+    (tmp_path / f"P{missing}" / f"P{missing}_0001.png").unlink()
+    run_train_eval(cfg, tmp_path / "run", checkpoint_dir=tmp_path / "run" / "checkpoints")
+    state = torch.load(tmp_path / "run" / "checkpoints" / "last.pth", weights_only=False)
+    assert (state["optimizer_steps"], state["global_step"]) == (2, 5)
+    log = next((tmp_path / "run").glob("train_*.log")).read_text()
+    assert [line.split("]")[1] for line in log.splitlines() if "\teta: " in line] == ["[1/2", "[2/2"]
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+
+from src.pipelines.distributed import launch
+from src.pipelines.train_eval import run_train_eval
+
+torch = pytest.importorskip("torch")
+dist = pytest.importorskip("torch.distributed")
+pytestmark = pytest.mark.skipif(not dist.is_available(), reason="torch.distributed not available")
+
+
+def _params(path: Path) -> dict:
+    state = torch.load(path, weights_only=False)["model"]
+    # BatchNorm running stats are per-rank (rank 0's are kept); compare trainable weights only
+    return {k: v for k, v in state.items() if "running_" not in k and "num_batches" not in k}
+
+
+def test_two_rank_ddp_matches_single_process(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    cfg["train"].update(epochs=1, batch_size=1)
+    metrics = launch(run_train_eval, 2, cfg, tmp_path / "ddp", checkpoint_dir=tmp_path / "ddp" / "checkpoints")
+    assert set(metrics) >= {"psnr", "ssim", "lpips"}
+    state = torch.load(tmp_path / "ddp" / "checkpoints" / "last.pth", weights_only=False)
+    assert (state["world_size"], state["optimizer_steps"]) == (2, 3)
+    assert len(list((tmp_path / "ddp").glob("train_*.log"))) == 1
+
+    # same global batches (2 samples, one per forward) in one process
+    cfg["train"].update(batch_size=2, micro_batch_size=1)
+    run_train_eval(cfg, tmp_path / "single", checkpoint_dir=tmp_path / "single" / "checkpoints")
+    ddp, single = _params(tmp_path / "ddp" / "checkpoints" / "last.pth"), _params(
+        tmp_path / "single" / "checkpoints" / "last.pth"
+    )
+    for key, value in single.items():
+        assert torch.allclose(ddp[key], value, atol=1e-5), key
+
+
+def test_empty_batch_on_one_rank_is_skipped_on_all(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    cfg.pop("augmentations")
+    cfg["train"].update(epochs=1, batch_size=1)
+    # a missing image file yields a sample without image_tensor on whichever rank draws it
+    (tmp_path / "P2" / "P2_0001.png").unlink()
+    launch(run_train_eval, 2, cfg, tmp_path / "ddp", checkpoint_dir=tmp_path / "ddp" / "checkpoints")
+    state = torch.load(tmp_path / "ddp" / "checkpoints" / "last.pth", weights_only=False)
+    assert (state["optimizer_steps"], state["global_step"]) == (3, 2)
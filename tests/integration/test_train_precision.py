@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from src.pipelines.train_eval import run_train_eval
+
+torch = pytest.importorskip("torch")
+
+
+def _train(cfg: dict, run_dir: Path, **train_cfg) -> dict:
+    cfg = {**cfg, "train": {**cfg["train"], "epochs": 1, **train_cfg}}
+    run_train_eval(cfg, run_dir, checkpoint_dir=run_dir / "checkpoints")
+    return torch.load(run_dir / "checkpoints" / "last.pth", weights_only=False)
+
+
+def test_bf16_channels_last_training_tracks_fp32(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    fp32 = _train(cfg, tmp_path / "fp32")
+    bf16 = _train(cfg, tmp_path / "bf16", precision="bf16", channels_last=True)
+    # same seed and batches: the bf16 loss differs by rounding only
+    assert bf16["epoch_loss_sum"] != fp32["epoch_loss_sum"]
+    assert bf16["epoch_loss_sum"] == pytest.approx(fp32["epoch_loss_sum"], rel=0.01)
+    assert all(v.dtype != torch.bfloat16 for v in bf16["model"].values())
+    log = next((tmp_path / "bf16").glob("train_*.log")).read_text()
+    assert "precision=bf16 channels_last=True" in log
+    assert ("\tmemory: " if torch.cuda.is_available() else "\tpeak_rss: ") in log
+
+
+def test_unknown_precision_is_rejected(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    cfg["train"]["precision"] = "fp8"
+    with pytest.raises(ValueError, match="precision"):
+        run_train_eval(cfg, tmp_path / "run")
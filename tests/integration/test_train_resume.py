@@ -0,0 +1,34 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.pipelines.train_eval import run_train_eval
+
+torch = pytest.importorskip("torch")
+
+
+def test_mid_epoch_resume_is_bit_identical(tmp_path: Path, train_config):
+    cfg = train_config(tmp_path)
+    ckpt = tmp_path / "run" / "checkpoints"
+    torch.manual_seed(0)
+    run_train_eval(cfg, tmp_path / "run", checkpoint_dir=ckpt)
+    full = torch.load(ckpt / "state_00000006.pt", weights_only=False)
+    assert (full["epoch"], full["step"]) == (2, 3)
+    assert sorted(p.name for p in ckpt.glob("state_*.pt")) == [f"state_0000000{n}.pt" for n in (3, 4, 6)]
+    assert torch.load(ckpt / "last.pth", weights_only=False)["global_step"] == 6
+    assert (ckpt / "best.pth").exists()
+
+    # interrupt after global step 4 (epoch 2, step 1): drop the later states and resume
+    resumed = tmp_path / "resumed" / "checkpoints"
+    shutil.copytree(ckpt, resumed)
+    for name in ("state_00000006.pt", "epoch_02.pt"):
+        (resumed / name).unlink()
+    assert torch.load(resumed / "state_00000004.pt", weights_only=False)["sampler_position"] == 2
+    torch.manual_seed(1)
+    run_train_eval(cfg, tmp_path / "resumed", checkpoint_dir=resumed, resume=True)
+    final = torch.load(resumed / "state_00000006.pt", weights_only=False)
+
+    for key, value in full["model"].items():
+        assert torch.equal(final["model"][key], value), key
+    assert torch.equal(final["rng"]["torch"], full["rng"]["torch"])
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from src.data.transforms import BatchLightAugmentation, LightAugmentation
+
+torch = pytest.importorskip("torch")
+F = pytest.importorskip("torchvision.transforms.functional")
+
+
+def test_params_depend_only_on_seed_epoch_index():
+    aug = BatchLightAugmentation(seed=7)
+    images = torch.rand(6, 3, 8, 8)
+    full = aug(images, list(range(10, 16)), epoch=2)
+    # a different batch composition yields the same per-sample result
+    assert torch.equal(aug(images[3:], [13, 14, 15], epoch=2), full[3:])
+    assert not torch.equal(aug(images, list(range(10, 16)), epoch=3), full)
+    flips = aug.sample_params(range(200), epoch=0)[:, 4]
+    assert 0.3 < float(flips.mean()) < 0.7
+
+
+def test_matches_torchvision_jitter_without_saturation():
+    aug = BatchLightAugmentation(seed=1, brightness=0.2, contrast=0.2, saturation=0.2, hue=0.0)
+    images = torch.rand(4, 3, 8, 8) * 0.4 + 0.3
+    out = aug(images, [0, 1, 2, 3])
+    params = aug.sample_params([0, 1, 2, 3])
+    for n in range(4):
+        ref = F.adjust_brightness(images[n], float(params[n, 0]))
+        ref = F.adjust_contrast(ref, float(params[n, 1]))
+        ref = F.adjust_saturation(ref, float(params[n, 2]))
+        if params[n, 4] > 0.5:
+            ref = F.hflip(ref)
+        assert torch.allclose(out[n], ref, atol=1e-5)
+
+
+def test_hue_rotation_keeps_gray_pixels():
+    aug = BatchLightAugmentation(seed=3, brightness=0.0, contrast=0.0, saturation=0.0, hue=0.5, flip_p=0.0)
+    gray = torch.full((2, 3, 4, 4), 0.4)
+    assert torch.allclose(aug(gray, [0, 1]), gray, atol=1e-6)
+
+
+def test_light_augmentation_leaves_global_rng_alone():
+    random.seed(0)
+    expected = [random.random() for _ in range(3)]
+    random.seed(0)
+    aug = LightAugmentation(seed=123)
+    aug({"id": "a"})
+    assert [random.random() for _ in range(3)] == expected
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from src.data.embedding_store import EmbeddingStore, build_embedding_store
+from src.data.lfw_dataset import LFWDataset
+from src.data.manifest import DatasetManifest
+from src.data.pair_dataset import LFWPairDataset
+from src.pipelines.train_eval import run_train_eval
+
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+
+def _channel_means(batch):
+    return batch.mean(dim=(2, 3))
+
+
+def _write(tmp_path: Path, size: int = 4) -> Path:
+    items = []
+    for n, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+        rel = f"P{n}/P{n}_0001.png"
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (size, size), color).save(tmp_path / rel)
+        items.append({"id": f"P{n}_P{n}_0001", "path": rel})
+    items.append({"id": "missing", "path": "nope.png"})
+    pairs = [{"type": "diff", "person1": "P0", "img1": "1", "person2": "P2", "img2": "1"}]
+    splits = {"train": [it["id"] for it in items[:3]]}
+    DatasetManifest(version="1.0", items=items, splits=splits, pairs=pairs).save(tmp_path / "m.json")
+    return tmp_path / "m.json"
+
+
+def test_store_round_trip_and_dataset_lookup(tmp_path: Path):
+    manifest = _write(tmp_path)
+    index = build_embedding_store(manifest, tmp_path, tmp_path / "emb", _channel_means, batch_size=2)
+    store = EmbeddingStore(str(index.parent))
+    assert (len(store), store.dim, store.dtype) == (3, 3, "float16")
+    assert store.rows(["P1_P1_0001", "missing"]).tolist() == [1, -1]
+    assert torch.equal(store.lookup(2), torch.tensor([0.0, 0.0, 1.0]))
+
+    ds = LFWDataset(root=str(tmp_path), split="train", manifest=str(manifest), embedding_store=str(tmp_path / "emb"))
+    for idx in range(len(ds)):
+        sample = ds[idx]
+        assert torch.equal(sample["target_embedding"], _channel_means(sample["image_tensor"][None])[0])
+
+    pairs = LFWPairDataset(root=str(tmp_path), split="train", manifest=str(manifest), embedding_store=str(tmp_path / "emb"))
+    batch = pairs[pairs.pairs.tolist()]
+    assert torch.equal(batch["target_embedding"], _channel_means(batch["target_tensor"]))
+
+
+def test_dataset_rejects_incomplete_store(tmp_path: Path):
+    manifest = _write(tmp_path)
+    (tmp_path / "P1" / "P1_0001.png").unlink()
+    build_embedding_store(manifest, tmp_path, tmp_path / "emb", _channel_means)
+    with pytest.raises(ValueError, match="build-embeddings"):
+        LFWDataset(root=str(tmp_path), split="train", manifest=str(manifest), embedding_store=str(tmp_path / "emb"))
+
+
+def test_training_with_augmentations_ignores_store(tmp_path: Path, monkeypatch):
+    losses = pytest.importorskip("models.losses")
+    manifest = _write(tmp_path, size=16)
+    build_embedding_store(manifest, tmp_path, tmp_path / "emb", _channel_means)
+    seen = []
+    forward = losses.FaceSwapLoss.forward
+
+    def spy(self, outputs, targets):
+        seen.append(targets.get("target_embedding"))
+        return forward(self, outputs, targets)
+
+    monkeypatch.setattr(losses.FaceSwapLoss, "forward", spy)
+    cfg = {
+        "dataset": {
+            "type": "LFWDataset",
+            "root": str(tmp_path),
+            "split": "train",
+            "manifest": str(manifest),
+            "embedding_store": str(tmp_path / "emb"),
+        },
+        "model": {"type": "UNetFaceSwap", "channels": 4},
+        "loss": {"type": "FaceSwapLoss"},
+        "train": {"epochs": 1, "batch_size": 3},
+    }
+    run_train_eval(cfg, tmp_path / "plain")
+    assert seen and all(emb is not None for emb in seen)
+
+    seen.clear()
+    cfg["augmentations"] = [{"type": "BatchLightAugmentation", "seed": 5}]
+    run_train_eval(cfg, tmp_path / "augmented")
+    assert seen and all(emb is None for emb in seen)
+    log = next((tmp_path / "augmented").glob("train_*.log")).read_text()
+    assert "Ignoring dataset.embedding_store" in log
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+from src.data.image_cache import SharedImageCache, build_image_cache, hit_rate
+from src.data.lfw_dataset import LFWDataset
+from src.data.manifest import DatasetManifest
+
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_ring_evicts_oldest_entries():
+    cache = SharedImageCache(num_items=4, max_bytes=2 * 48)
+    images = [torch.full((4, 4, 3), i, dtype=torch.uint8) for i in range(3)]
+    for i, img in enumerate(images):
+        assert cache.put(i, img)
+    assert cache.get(0) is None
+    assert torch.equal(cache.get(1), images[1])
+    assert torch.equal(cache.get(2), images[2])
+    assert not cache.put(3, torch.zeros((8, 8, 3), dtype=torch.uint8))
+    assert hit_rate(cache.stats()) == (2, 1, pytest.approx(200 / 3))
+
+
+def test_unknown_cache_mode_rejected():
+    assert build_image_cache(None, 10, 1) is None
+    with pytest.raises(ValueError):
+        build_image_cache("disk", 10, 1)
+
+
+def test_second_epoch_served_from_shared_cache(tmp_path: Path):
+    items = []
+    for i in range(6):
+        rel = f"P{i}/P{i}_0001.png"
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (8, 8), (i * 40, 10, 20)).save(tmp_path / rel)
+        items.append({"id": f"P{i}_P{i}_0001", "path": rel})
+    DatasetManifest(version="1.0", items=items, splits={"train": [it["id"] for it in items]}).save(
+        tmp_path / "manifest.json"
+    )
+    ds = LFWDataset(
+        root=str(tmp_path), split="train", manifest=str(tmp_path / "manifest.json"), cache="shm", cache_max_mb=1
+    )
+    loader = torch.utils.data.DataLoader(ds, batch_size=2, num_workers=2, multiprocessing_context="fork")
+    first = torch.cat([batch["image_tensor"] for batch in loader])
+    assert hit_rate(ds.cache_stats()) == (0, 6, 0.0)
+    # Workers filled the shared slab; the second epoch must not touch the files at all.
+    for item in items:
+        (tmp_path / item["path"]).unlink()
+    before = ds.cache_stats()
+    second = torch.cat([batch["image_tensor"] for batch in loader])
+    assert hit_rate(ds.cache_stats(), before) == (6, 0, 100.0)
+    assert torch.equal(first, second)
@@ -0,0 +1,14 @@
+from src.data.infer_pairs import SizeGroupedBatchSampler, pair_output_name
+
+
+def test_size_grouped_batches_keep_order_within_groups():
+    keys = ["a", "b", "a", "a", "b", "a", "c"]
+    sampler = SizeGroupedBatchSampler(keys, batch_size=2)
+    batches = list(sampler)
+    assert batches == [[0, 2], [3, 5], [1, 4], [6]]
+    assert len(sampler) == len(batches)
+    assert sorted(i for b in batches for i in b) == list(range(len(keys)))
+
+
+def test_pair_output_name():
+    assert pair_output_name("x/A_0001.jpg", "y/B_0002.png") == "A_0001_to_B_0002.png"
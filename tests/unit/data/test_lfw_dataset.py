@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+import pytest
+
 from src.data.lfw_dataset import LFWDataset
 from src.data.transforms import LightAugmentation
 from src.data.manifest import DatasetManifest
@@ -29,3 +31,19 @@ def test_lfw_dataset_with_transform(tmp_path: Path):
     ds = LFWDataset(root=str(tmp_path), split="train", manifest=str(manifest_path), transform=aug)
     sample = ds[0]
     assert sample["aug_seed"] == 123
+
+
+def test_lfw_dataset_uint8_matches_float_path(tmp_path: Path):
+    torch = pytest.importorskip("torch")
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", (6, 4), (200, 30, 7)).save(tmp_path / "a.png")
+    manifest = DatasetManifest(version="1.0", items=[{"id": "a", "path": "a.png"}], splits={"train": ["a"]})
+    manifest_path = tmp_path / "manifest.json"
+    manifest.save(manifest_path)
+    fast = LFWDataset(root=str(tmp_path), split="train", manifest=str(manifest_path), uint8=True)[0]
+    slow = LFWDataset(root=str(tmp_path), split="train", manifest=str(manifest_path))[0]
+    assert fast["image_tensor"].dtype == torch.uint8
+    assert fast["image_tensor"].shape == (3, 4, 6)
+    assert torch.equal(fast["image_tensor"].float().div(255.0), slow["image_tensor"])
+    # target equals source, so it is not duplicated for collate
+    assert "target_tensor" not in fast and "target_tensor" not in slow
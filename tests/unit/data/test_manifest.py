@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from src.data.lfw_dataset import LFWDataset
+from src.data.manifest import DatasetManifest, ManifestReader, SqliteManifestReader, open_manifest
+from src.data.validate_manifest import load_manifest
+
+
+def _manifest(n: int = 20) -> DatasetManifest:
+    items = [{"id": f"P{i}_P{i}_0001", "path": f"P{i}/P{i}_0001.jpg", "checksum": f"{i:08x}"} for i in range(n)]
+    ids = [it["id"] for it in items]
+    return DatasetManifest(
+        version="1.0",
+        items=items,
+        splits={"train": ids[:15], "val": ids[15:] + ["missing_id"], "test": []},
+        checksums={it["id"]: it["checksum"] for it in items},
+        meta={"checksum_algo": "crc32"},
+        pairs=[{"split": "test", "label": 1, "src": ids[0], "tgt": ids[1]}],
+    )
+
+
+def test_sqlite_round_trip_matches_json(tmp_path: Path):
+    manifest = _manifest()
+    manifest.save(tmp_path / "manifest.json")
+    DatasetManifest.load(tmp_path / "manifest.json").save(tmp_path / "manifest.sqlite")
+    loaded = DatasetManifest.load(tmp_path / "manifest.sqlite")
+    assert loaded == manifest
+    assert load_manifest(tmp_path / "manifest.sqlite") == load_manifest(tmp_path / "manifest.json")
+
+
+def test_sqlite_reader_returns_split_items_lazily(tmp_path: Path):
+    manifest = _manifest()
+    manifest.save(tmp_path / "manifest.sqlite")
+    with open_manifest(tmp_path / "manifest.sqlite") as reader:
+        assert isinstance(reader, SqliteManifestReader)
+        # unknown ids are dropped, split order is kept
+        assert reader.split_ids("val") == [f"P{i}_P{i}_0001" for i in range(15, 20)]
+        assert reader.split_ids("test") == []
+        picked = reader.get_items(["P3_P3_0001", "P1_P1_0001"])
+    assert [it["path"] for it in picked] == ["P3/P3_0001.jpg", "P1/P1_0001.jpg"]
+
+
+def test_lfw_dataset_same_samples_from_json_and_sqlite(tmp_path: Path):
+    manifest = _manifest()
+    manifest.save(tmp_path / "manifest.json")
+    manifest.save(tmp_path / "manifest.sqlite")
+    for split, ratio, expected in (("train", 1.0, 15), ("train", 0.4, 6), ("val", 0.5, 2)):
+        kwargs = dict(root=str(tmp_path), split=split, to_tensor=False, sample_ratio=ratio, sample_seed=7)
+        from_json = LFWDataset(manifest=str(tmp_path / "manifest.json"), **kwargs)
+        from_sqlite = LFWDataset(manifest=str(tmp_path / "manifest.sqlite"), **kwargs)
+        assert list(from_json.samples) == list(from_sqlite.samples)
+        assert len(from_sqlite) == expected
+
+
+def test_manifest_reader_requires_all_methods():
+    class Partial(ManifestReader):
+        def split_ids(self, split):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.data.manifest import DatasetManifest
+from src.data.packed_dataset import PackedLFWDataset, pack_split
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+
+def _write_split(tmp_path: Path) -> Path:
+    items = []
+    for i, size in enumerate([8, 8, 12]):
+        rel = f"Person_{i}/Person_{i}_0001.png"
+        (tmp_path / "processed" / rel).parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (size, size), (10 * i, 20, 30)).save(tmp_path / "processed" / rel)
+        items.append({"id": f"Person_{i}_Person_{i}_0001", "path": rel})
+    manifest = DatasetManifest(version="1.0", items=items, splits={"train": [it["id"] for it in items]})
+    manifest.save(tmp_path / "manifest.json")
+    return pack_split(tmp_path / "manifest.json", tmp_path / "processed", "train", tmp_path / "packed", size=8)
+
+
+def test_pack_split_writes_array_and_index(tmp_path: Path):
+    index_path = _write_split(tmp_path)
+    index = json.loads(index_path.read_text())
+    assert index["shape"] == [3, 8, 8, 3]
+    assert index["labels"] == ["Person_0", "Person_1", "Person_2"]
+    assert index["offsets"] == [0, 192, 384]
+    assert (tmp_path / "packed" / "train.u8").stat().st_size == 3 * 192
+
+
+def test_packed_dataset_returns_mapped_uint8_tensors(tmp_path: Path):
+    _write_split(tmp_path)
+    ds = PackedLFWDataset(packed_dir=str(tmp_path / "packed"), split="train")
+    assert len(ds) == 3
+    sample = ds[1]
+    img = sample["image_tensor"]
+    assert img.dtype == torch.uint8 and tuple(img.shape) == (3, 8, 8)
+    assert img[:, 0, 0].tolist() == [10, 20, 30]
+    # The tensor aliases the memory map rather than a decoded copy.
+    base = ds._array()
+    assert base.ctypes.data <= img.data_ptr() < base.ctypes.data + base.nbytes
+    assert sample["label"] == "Person_1"
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from src.data.manifest import DatasetManifest
+from src.data.pair_dataset import LFWPairDataset, PairBatchSampler
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+PEOPLE = {"Ann": 3, "Bob": 1, "Cid": 2}
+
+
+def _write(tmp_path: Path) -> Path:
+    items = []
+    for p_idx, (person, count) in enumerate(PEOPLE.items()):
+        for n in range(1, count + 1):
+            rel = f"{person}/{person}_{n:04d}.png"
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (4, 4), (40 * p_idx, 10 * n, 0)).save(tmp_path / rel)
+            items.append({"id": f"{person}_{person}_{n:04d}", "path": rel})
+    pairs = [
+        {"type": "same", "person": "Ann", "img1": "1", "img2": "3"},
+        {"type": "diff", "person1": "Bob", "img1": "1", "person2": "Cid", "img2": "2"},
+        {"type": "same", "person": "Ann", "img1": "1", "img2": "9"},  # not in the split
+    ]
+    # split order interleaves people so the identity index has to regroup them
+    ids = [it["id"] for it in items]
+    split = [ids[i] for i in (0, 3, 4, 1, 5, 2)]
+    DatasetManifest(version="1.0", items=items, splits={"train": split}, pairs=pairs).save(tmp_path / "m.json")
+    return tmp_path / "m.json"
+
+
+def test_manifest_pairs_and_identity_index(tmp_path: Path):
+    ds = LFWPairDataset(root=str(tmp_path), split="train", manifest=str(_write(tmp_path)), uint8=True)
+    assert len(ds) == 2
+    ids = [[ds.samples[int(p)]["id"] for p in pair] for pair in ds.pairs]
+    assert ids == [["Ann_Ann_0001", "Ann_Ann_0003"], ["Bob_Bob_0001", "Cid_Cid_0002"]]
+    assert ds.person_names == ["Ann", "Bob", "Cid"]
+    assert ds.person_count.tolist() == [3, 1, 2]
+    for person, (start, count) in enumerate(zip(ds.person_start, ds.person_count)):
+        members = {ds.samples[int(p)]["id"].split("_")[0] for p in ds.order[start : start + count]}
+        assert members == {ds.person_names[person]}
+
+
+def test_identity_pairs_respect_same_ratio(tmp_path: Path):
+    ds = LFWPairDataset(
+        root=str(tmp_path), split="train", manifest=str(_write(tmp_path)), pair_source="identity", num_pairs=400
+    )
+    pairs = ds.draw_pairs(np.random.default_rng(0), 400)
+    person = {pos: ds.samples[pos]["id"].split("_")[0] for pos in range(len(ds.samples))}
+    same = [person[int(a)] == person[int(b)] for a, b in pairs]
+    assert sum(same) == 200
+    assert all(a != b for a, b in pairs)
+
+
+def test_batch_decodes_each_image_once(tmp_path: Path, monkeypatch):
+    ds = LFWPairDataset(root=str(tmp_path), split="train", manifest=str(_write(tmp_path)), uint8=True)
+    calls = []
+    original = ds._load_uint8
+    monkeypatch.setattr(ds, "_load_uint8", lambda path, idx: calls.append(idx) or original(path, idx))
+    batch = ds[[(0, 3), (0, 1), (3, 0)]]
+    assert sorted(calls) == [0, 1, 3]
+    assert batch["image_tensor"].shape == (3, 3, 4, 4)
+    assert torch.equal(batch["image_tensor"][0], batch["target_tensor"][2])
+    assert batch["id"][0] == ds.samples[0]["id"] and batch["target_id"][0] == ds.samples[3]["id"]
+
+
+def test_sampler_is_reproducible_per_epoch(tmp_path: Path):
+    ds = LFWPairDataset(
+        root=str(tmp_path), split="train", manifest=str(_write(tmp_path)), pair_source="identity", num_pairs=10
+    )
+    sampler = PairBatchSampler(ds, batch_size=4, seed=3)
+    assert len(sampler) == 3
+    sampler.set_epoch(1)
+    first = list(sampler)
+    assert list(sampler) == first
+    sampler.set_epoch(2)
+    assert list(sampler) != first
+    loader = torch.utils.data.DataLoader(ds, batch_size=None, sampler=sampler)
+    assert [b["image_tensor"].shape[0] for b in loader] == [4, 4, 2]
+    sampler.set_epoch(1)
+    sampler.set_start(4)
+    assert len(sampler) == 2
+    assert list(sampler) == first[1:]
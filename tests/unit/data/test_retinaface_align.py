@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from src.data import retinaface_align
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _make_raw_tree(raw_dir: Path, people: int = 3, per_person: int = 2) -> None:
+    for p in range(people):
+        person_dir = raw_dir / f"Person_{p}"
+        person_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(per_person):
+            color = (40 * p, 60 * i, 90)
+            Image.new("RGB", (32, 32), color).save(person_dir / f"Person_{p}_{i + 1:04d}.jpg")
+
+
+def test_build_manifest_parallel_matches_serial(tmp_path: Path):
+    raw = tmp_path / "raw"
+    _make_raw_tree(raw)
+    serial = retinaface_align.build_manifest_from_raw(raw, tmp_path / "serial")
+    parallel = retinaface_align.build_manifest_from_raw(raw, tmp_path / "parallel", num_workers=2)
+    assert len(serial) == 6
+    assert serial == parallel
+    for item in parallel:
+        assert (tmp_path / "parallel" / item["path"]).exists()
+
+
+class _FakeDetector:
+    """Mimics the MTCNN batch API: detects one face per image and records batch shapes."""
+
+    keep_all = False
+    selection_method = "probability"
+
+    def __init__(self):
+        self.batches = []
+
+    def detect(self, imgs, landmarks=True):
+        import numpy as np
+
+        self.batches.append([img.size for img in imgs])
+        n = len(imgs)
+        return np.zeros((n, 1, 4)) + 1.0, np.full((n, 1), 0.99), np.zeros((n, 1, 5, 2))
+
+    def select_boxes(self, boxes, probs, points, imgs, method="probability"):
+        return boxes, probs, points
+
+    def extract(self, imgs, boxes, save_path):
+        import torch
+
+        return [torch.full((3, 8, 8), 0.5) for _ in imgs]
+
+
+def test_detect_and_align_batch_groups_equal_sizes(tmp_path: Path):
+    pytest.importorskip("facenet_pytorch")
+    paths = []
+    for i, size in enumerate([(32, 32), (40, 40), (32, 32), (32, 32)]):
+        path = tmp_path / "raw" / f"img_{i}.jpg"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", size).save(path)
+        paths.append(path)
+    outputs = [tmp_path / "out" / p.name for p in paths]
+    detector = _FakeDetector()
+    results = retinaface_align.detect_and_align_batch(paths, outputs, detector=detector, batch_size=4)
+    assert sorted(map(len, detector.batches)) == [1, 3]
+    assert [r["aligned_path"] for r in results] == [str(o) for o in outputs]
+    assert results[0]["bbox"] == [1.0, 1.0, 1.0, 1.0]
+    assert len(results[0]["landmarks"]) == 5
+    assert all(o.exists() for o in outputs)
+
+
+def test_build_manifest_batched_matches_serial(tmp_path: Path):
+    raw = tmp_path / "raw"
+    _make_raw_tree(raw)
+    serial = retinaface_align.build_manifest_from_raw(raw, tmp_path / "serial")
+    batched = retinaface_align.build_manifest_from_raw(raw, tmp_path / "batched", batch_size=4)
+    assert serial == batched
+
+
+def test_incremental_cache_skips_unchanged_and_prunes_deleted(tmp_path: Path):
+    from src.data.align_cache import AlignmentCache
+
+    raw, proc = tmp_path / "raw", tmp_path / "proc"
+    _make_raw_tree(raw)
+    cache_path = proc / ".align_cache.json"
+    first = retinaface_align.build_manifest_from_raw(raw, proc, cache=AlignmentCache(cache_path))
+
+    cache = AlignmentCache(cache_path)
+    second = retinaface_align.build_manifest_from_raw(raw, proc, cache=cache)
+    assert second == first
+    assert (cache.hits, cache.misses) == (6, 0)
+
+    (raw / "Person_0" / "Person_0_0001.jpg").unlink()
+    Image.new("RGB", (32, 32), (1, 2, 3)).save(raw / "Person_2" / "Person_2_0003.jpg")
+    cache = AlignmentCache(cache_path)
+    third = retinaface_align.build_manifest_from_raw(raw, proc, cache=cache)
+    ids = [item["id"] for item in third]
+    assert "Person_0_Person_0_0001" not in ids
+    assert "Person_2_Person_2_0003" in ids
+    assert (cache.hits, cache.misses, cache.pruned) == (5, 1, 1)
+    assert not (proc / "Person_0" / "Person_0_0001.jpg").exists()
+
+
+def test_fallback_mirrors_without_copy_and_hashes_in_memory(tmp_path: Path):
+    raw, proc = tmp_path / "raw", tmp_path / "proc"
+    _make_raw_tree(raw, people=1, per_person=2)
+    items = retinaface_align.build_manifest_from_raw(raw, proc)
+    for item in items:
+        mirrored = proc / item["path"]
+        assert item["checksum"] == retinaface_align.compute_checksum(mirrored)
+        assert mirrored.stat().st_ino == (raw / item["path"]).stat().st_ino
+
+    # Writing an aligned crop over a hardlinked fallback must not touch the raw image.
+    pytest.importorskip("facenet_pytorch")
+    raw_img = raw / items[0]["path"]
+    before = raw_img.read_bytes()
+    results = retinaface_align.detect_and_align_batch([raw_img], [proc / items[0]["path"]], detector=_FakeDetector())
+    assert raw_img.read_bytes() == before
+    assert results[0]["checksum"] == retinaface_align.compute_checksum(proc / items[0]["path"])
@@ -0,0 +1,39 @@
+import pytest
+
+from src.data.samplers import ResumableSampler
+
+torch = pytest.importorskip("torch")
+
+
+def test_order_depends_on_seed_and_epoch_only():
+    sampler = ResumableSampler(10, seed=4)
+    sampler.set_epoch(1)
+    first = list(sampler)
+    torch.manual_seed(123)
+    assert list(sampler) == first
+    assert sorted(first) == list(range(10))
+    sampler.set_epoch(2)
+    assert list(sampler) != first
+
+
+def test_set_start_fast_forwards_within_epoch():
+    sampler = ResumableSampler(10, seed=4)
+    sampler.set_epoch(3)
+    order = list(sampler)
+    sampler.set_start(4)
+    assert len(sampler) == 6
+    assert list(sampler) == order[4:]
+    sampler.set_epoch(4)
+    assert len(sampler) == 10
+    assert list(ResumableSampler(5, shuffle=False)) == [0, 1, 2, 3, 4]
+
+
+def test_replicas_shard_evenly_and_cover_the_split():
+    shards = [ResumableSampler(10, seed=1, num_replicas=4, rank=r) for r in range(4)]
+    for sampler in shards:
+        sampler.set_epoch(2)
+    assert [len(s) for s in shards] == [3, 3, 3, 3]
+    seen = [i for s in shards for i in s]
+    assert sorted(set(seen)) == list(range(10))
+    shards[1].set_start(1)
+    assert len(shards[1]) == 2
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from src.data.checksums import digest_file
+from src.data.validate_manifest import StatCache, validate_items
+
+
+def _manifest(tmp_path: Path, algo=None) -> dict:
+    items, checksums = [], {}
+    for i in range(4):
+        path = tmp_path / f"img_{i}.bin"
+        path.write_bytes(bytes([i]) * 1024)
+        items.append({"id": f"id{i}", "path": path.name})
+        checksums[f"id{i}"] = digest_file(path, algo or "sha256")
+    manifest = {"version": "1.0", "items": items, "checksums": checksums, "splits": {}}
+    if algo:
+        manifest["meta"] = {"checksum_algo": algo}
+    return manifest
+
+
+def test_validate_items_uses_stat_cache_and_full_rehash(tmp_path: Path):
+    manifest = _manifest(tmp_path)
+    cache_path = tmp_path / "manifest.json.statcache.json"
+    stats: dict = {}
+    assert validate_items(manifest, tmp_path, stat_cache=StatCache(cache_path), stats=stats) == ([], [])
+    assert (stats["files_hashed"], stats["files_skipped"]) == (4, 0)
+
+    validate_items(manifest, tmp_path, stat_cache=StatCache(cache_path), stats=stats)
+    assert (stats["files_hashed"], stats["files_skipped"]) == (0, 4)
+
+    validate_items(manifest, tmp_path, stat_cache=StatCache(cache_path), full=True, stats=stats)
+    assert stats["files_hashed"] == 4
+
+    (tmp_path / "img_2.bin").write_bytes(b"corrupt")
+    missing, bad = validate_items(manifest, tmp_path, stat_cache=StatCache(cache_path), stats=stats)
+    assert bad == ["img_2.bin"] and stats["files_hashed"] == 1
+
+
+def test_validate_items_reads_checksum_algo_from_manifest(tmp_path: Path):
+    manifest = _manifest(tmp_path, algo="crc32")
+    assert len(manifest["checksums"]["id0"]) == 8
+    assert validate_items(manifest, tmp_path, workers=2) == ([], [])
@@ -28,3 +28,95 @@ def test_loss_forward_returns_number():
     loss_fn = losses.FaceSwapLoss()
     result = loss_fn({}, {})
     assert result == 0.0 or result is not None
+
+
+@pytest.mark.skipif(not torch_available(), reason="torch not installed")
+def test_loss_uses_precomputed_target_embedding():
+    import torch
+
+    losses = importlib.import_module("src.models.losses")
+    loss_fn = losses.FaceSwapLoss()
+    calls = []
+
+    class MeanEmbedder(torch.nn.Module):
+        def forward(self, x):
+            calls.append(x.shape[0])
+            return x.mean(dim=(2, 3))
+
+    loss_fn.arcface = MeanEmbedder()
+    pred, target = torch.rand(2, 3, 4, 4), torch.rand(2, 3, 4, 4)
+    full = loss_fn({"output": pred}, {"target": target})
+    cached = loss_fn({"output": pred}, {"target": target, "target_embedding": target.mean(dim=(2, 3))})
+    assert calls == [2, 2, 2]
+    assert torch.allclose(full, cached)
+
+
+@pytest.mark.skipif(not torch_available(), reason="torch not installed")
+def test_bf16_channels_last_loss_tracks_fp32():
+    import torch
+
+    models = importlib.import_module("src.registry.models")
+    losses = importlib.import_module("src.models.losses")
+    torch.manual_seed(0)
+    model = models.UNetFaceSwap(channels=8)
+    loss_fn = losses.FaceSwapLoss()
+    x = torch.rand(2, 3, 16, 16)
+    ref = loss_fn(model(x), {"target": x})
+    model = model.to(memory_format=torch.channels_last)
+    x_cl = x.contiguous(memory_format=torch.channels_last)
+    with torch.autocast("cpu", dtype=torch.bfloat16):
+        out = model(x_cl)
+        loss = loss_fn(out, {"target": x_cl})
+    assert out["output"].dtype == torch.bfloat16
+    assert abs(float(loss) - float(ref)) < 0.02 * float(ref)
+
+
+@pytest.mark.skipif(not torch_available(), reason="torch not installed")
+@pytest.mark.parametrize("mode", ["encoder", "blocks"])
+def test_activation_checkpointing_matches_plain(mode):
+    import torch
+
+    models = importlib.import_module("src.registry.models")
+    torch.manual_seed(0)
+    plain = models.UNetFaceSwap(channels=4)
+    ckpt = models.UNetFaceSwap(channels=4, activation_checkpointing=mode)
+    ckpt.load_state_dict(plain.state_dict())
+    x = torch.rand(2, 3, 16, 16)
+    for model in (plain, ckpt):
+        model.train()
+        model(x)["output"].square().mean().backward()
+
+    for (name, p), q in zip(plain.named_parameters(), ckpt.parameters()):
+        assert torch.allclose(p.grad, q.grad, atol=1e-6), name
+    # recomputation in backward must not update BatchNorm running stats a second time
+    for (name, a), b in zip(plain.state_dict().items(), ckpt.state_dict().values()):
+        assert torch.equal(a, b), name
+
+
+def test_activation_checkpointing_rejects_unknown_mode():
+    models = importlib.import_module("src.registry.models")
+    with pytest.raises(ValueError):
+        models.UNetFaceSwap(channels=4, activation_checkpointing="decoder")
+
+
+@pytest.mark.skipif(not torch_available(), reason="torch not installed")
+def test_fuse_for_inference_matches_unfused():
+    import torch
+
+    models = importlib.import_module("src.registry.models")
+    torch.manual_seed(0)
+    model = models.UNetFaceSwap(channels=4)
+    for m in model.modules():
+        if isinstance(m, torch.nn.BatchNorm2d):
+            m.running_mean.uniform_(-1, 1)
+            m.running_var.uniform_(0.5, 2.0)
+            m.weight.data.uniform_(0.5, 1.5)
+            m.bias.data.uniform_(-0.5, 0.5)
+    model.eval()
+    x, y = torch.rand(2, 3, 16, 16), torch.rand(2, 3, 16, 16)
+    with torch.no_grad():
+        expected = model(x, y)["output"]
+        fused = model.fuse_for_inference()
+        assert fused.fused
+        assert not any(isinstance(m, torch.nn.BatchNorm2d) for m in fused.modules())
+        assert torch.allclose(fused(x, y)["output"], expected, atol=1e-5)
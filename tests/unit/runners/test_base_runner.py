@@ -1,5 +1,8 @@
+import json
 from pathlib import Path
 
+import pytest
+
 from src.runners.base_runner import BaseRunner
 
 
@@ -8,10 +11,22 @@ def test_runner_creates_checkpoint_dir(tmp_path: Path):
     assert runner.checkpoints_dir.exists()
 
 
-def test_runner_train_saves_checkpoint(tmp_path: Path):
+def test_runner_train_saves_checkpoint(tmp_path: Path, train_config):
+    torch = pytest.importorskip("torch")
+    cfg = train_config(tmp_path / "data")
+    cfg["train"]["epochs"] = 1
+    runner = BaseRunner(work_dir=tmp_path / "run", config=cfg)
+    runner.train()
+    last = tmp_path / "run" / "checkpoints" / "last.pth"
+    assert torch.load(last, weights_only=False)["model"]
+    assert json.loads((tmp_path / "run" / "metrics.train.json").read_text())["last_checkpoint"] == str(last)
+
+
+def test_runner_train_without_model_writes_no_checkpoint(tmp_path: Path):
     runner = BaseRunner(work_dir=tmp_path, config={"name": "test"})
     runner.train()
-    assert (tmp_path / "checkpoints" / "last.pth").exists()
+    assert not (tmp_path / "checkpoints" / "last.pth").exists()
+    assert json.loads((tmp_path / "metrics.train.json").read_text())["last_checkpoint"] is None
 
 
 def test_runner_evaluate_returns_metrics(tmp_path: Path):
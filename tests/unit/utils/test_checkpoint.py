@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from src.utils.checkpoint import AsyncCheckpointWriter, latest_train_state, train_state_path
+
+torch = pytest.importorskip("torch")
+
+
+def test_writer_snapshots_before_returning(tmp_path: Path):
+    weights = torch.zeros(4)
+    writer = AsyncCheckpointWriter(tmp_path, keep=None)
+    stall = writer.save({"model": {"w": weights}}, "state_00000001.pt", aliases=("last.pth",))
+    weights.add_(1.0)  # training keeps mutating the live tensors
+    writer.close()
+    assert stall >= 0.0
+    for name in ("state_00000001.pt", "last.pth"):
+        assert torch.equal(torch.load(tmp_path / name)["model"]["w"], torch.zeros(4))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_writer_keeps_most_recent_states(tmp_path: Path):
+    writer = AsyncCheckpointWriter(tmp_path, keep=2, interval_steps=5)
+    assert [step for step in range(1, 16) if writer.due(step)] == [5, 10, 15]
+    for step in (5, 10, 15):
+        writer.save({"step": step}, train_state_path(tmp_path, step).name)
+    writer.save({"model": {}}, "epoch_01.pt")
+    writer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["epoch_01.pt", "state_00000010.pt", "state_00000015.pt"]
+    assert latest_train_state(tmp_path) == train_state_path(tmp_path, 15)
+
+
+def test_writer_time_interval(tmp_path: Path):
+    writer = AsyncCheckpointWriter(tmp_path, interval_minutes=1e-9)
+    assert writer.due(1)
+    assert not AsyncCheckpointWriter(tmp_path).due(1)
+    writer.close()
@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from src.utils.compile import CompiledCall, maybe_compile, maybe_fuse, split_compile_cfg
+
+torch = pytest.importorskip("torch")
+
+
+def test_split_compile_cfg():
+    assert split_compile_cfg({"type": "UNetFaceSwap", "channels": 8}) == ({"type": "UNetFaceSwap", "channels": 8}, None)
+    assert split_compile_cfg({"type": "M", "compile": True})[1] == {"mode": "default"}
+    assert split_compile_cfg({"type": "M", "compile": "max-autotune"}) == ({"type": "M"}, {"mode": "max-autotune"})
+    assert split_compile_cfg({"type": "M", "compile": {"dynamic": False}})[1] == {"mode": "default", "dynamic": False}
+    with pytest.raises(ValueError, match="mode"):
+        split_compile_cfg({"type": "M", "compile": "fastest"})
+    assert split_compile_cfg({"type": "M", "fuse": True}) == ({"type": "M"}, None)
+
+
+def test_maybe_fuse_follows_model_fuse():
+    from src.registry.models import UNetFaceSwap
+
+    assert not maybe_fuse(UNetFaceSwap(channels=4), {"type": "UNetFaceSwap"}).fused
+    assert not maybe_fuse(UNetFaceSwap(channels=4), {"type": "UNetFaceSwap", "fuse": False}).fused
+    assert maybe_fuse(UNetFaceSwap(channels=4), {"type": "UNetFaceSwap", "fuse": True}).fused
+
+
+def test_compiled_call_runs_and_records_compile_time(caplog):
+    fn = torch.nn.Linear(4, 2)
+    call = maybe_compile(fn, {"mode": "default", "backend": "eager"}, logging.getLogger("test"), "linear")
+    x = torch.rand(3, 4)
+    with caplog.at_level(logging.INFO):
+        assert torch.allclose(call(x), fn(x))
+    assert isinstance(call, CompiledCall) and call.active
+    assert call.compile_time is not None and "Compiled linear" in caplog.text
+
+
+def test_compile_failure_falls_back_to_eager(caplog):
+    def broken_backend(gm, example_inputs):
+        raise RuntimeError("backend exploded")
+
+    fn = torch.nn.Linear(4, 2)
+    call = CompiledCall(fn, {"backend": broken_backend}, logging.getLogger("test"), "linear")
+    x = torch.rand(3, 4)
+    with caplog.at_level(logging.WARNING):
+        assert torch.allclose(call(x), fn(x))
+    assert not call.active
+    assert "running eager" in caplog.text
+    assert torch.allclose(call(x), fn(x))